@@ -0,0 +1,74 @@
+"""Microbenchmark of ImagePreprocessor autocrop on synthetic A4 scans.
+
+Run from ``src/``: ``uv run python -m benchmarks.autocrop --dpi 300 --repeat 20``
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from pipeline.config import PipelineConfig
+from pipeline.preprocess import ImagePreprocessor
+
+from .fixtures import synthetic_scan
+
+
+def legacy_bounds(image: Image.Image, threshold: int) -> tuple[int, int, int, int] | None:
+    """Full-resolution mask implementation the strided path replaced."""
+    mask = np.array(image.convert("L")) < threshold
+    if not mask.any():
+        return None
+    rows = np.where(mask.any(axis=1))[0]
+    cols = np.where(mask.any(axis=0))[0]
+    return int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1])
+
+
+def legacy_autocrop(image: Image.Image, threshold: int, margin: int) -> Image.Image:
+    bounds = legacy_bounds(image, threshold)
+    if bounds is None:
+        return image
+    left, top, right, bottom = bounds
+    cropped = image.crop((left, top, right + 1, bottom + 1))
+    return ImageOps.expand(cropped, border=margin, fill="white")
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--stride", type=int, default=PipelineConfig().autocrop_stride)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = PipelineConfig(autocrop_stride=args.stride, preprocess_cache=False)
+    preprocessor = ImagePreprocessor(config)
+    threshold, margin = config.autocrop_threshold, config.autocrop_margin
+    image = synthetic_scan(dpi=args.dpi, seed=args.seed)
+
+    expected = legacy_bounds(image, threshold)
+    actual = preprocessor._content_bounds(image)
+    if expected != actual:
+        raise SystemExit(f"crop box mismatch: legacy {expected} vs strided {actual}")
+
+    legacy_ms = _time(lambda: legacy_autocrop(image, threshold, margin), args.repeat)
+    strided_ms = _time(lambda: preprocessor._autocrop(image), args.repeat)
+    print(f"A4 @ {args.dpi} dpi ({image.width}x{image.height}), crop box {actual}")
+    print(f"  legacy   {legacy_ms:8.2f} ms")
+    print(f"  strided  {strided_ms:8.2f} ms  (stride {args.stride}, {legacy_ms / strided_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
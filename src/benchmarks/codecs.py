@@ -0,0 +1,81 @@
+"""Compare page image codecs: encode/decode time, bytes per page and writer throughput.
+
+Run from ``src/``: ``uv run python -m benchmarks.codecs --pages 8 --dpi 200 --threads 2``
+
+Pages are synthetic Vietnamese text pages (``--page clean``) or noisy scans
+(``--page scan``). Each codec writes the pages through an ``ImageWriter``
+with ``--threads`` encoder threads; decode time is that of ``load_image``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from PIL import Image
+
+from pipeline.storage import ImageCodec, ImageWriter, load_image
+
+from .fixtures import synthetic_scan, vietnamese_page
+
+CODECS = {
+    "png-1": ImageCodec("png", png_compress_level=1),
+    "png-6": ImageCodec("png"),
+    "png-9": ImageCodec("png", png_compress_level=9),
+    "png-6-opt": ImageCodec("png", png_optimize=True),
+    "webp": ImageCodec("webp"),
+    "tiff": ImageCodec("tiff"),
+    "npy": ImageCodec("npy"),
+}
+
+
+def _pages(kind: str, count: int, dpi: int) -> List[Image.Image]:
+    if kind == "scan":
+        return [synthetic_scan(dpi=dpi, seed=seed) for seed in range(count)]
+    return [
+        vietnamese_page(dpi, table=seed % 2 == 1, seed=seed).convert("RGB")
+        for seed in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--page", choices=["clean", "scan"], default="clean")
+    parser.add_argument("--threads", type=int, default=2, help="Encoder threads (0 = inline)")
+    parser.add_argument("--codecs", nargs="+", choices=sorted(CODECS), default=list(CODECS))
+    args = parser.parse_args()
+
+    pages = _pages(args.page, args.pages, args.dpi)
+    print(f"{args.pages} {args.page} pages @ {args.dpi} dpi ({pages[0].width}x{pages[0].height})")
+    for name in args.codecs:
+        codec = CODECS[name]
+        with tempfile.TemporaryDirectory() as scratch:
+            writer = ImageWriter(max_workers=args.threads, codec=codec)
+            paths = [Path(scratch) / f"page_{index:03d}{codec.suffix}" for index in range(len(pages))]
+            start = time.perf_counter()
+            for page, path in zip(pages, paths):
+                writer.save(page, path)
+            writer.close()
+            elapsed = time.perf_counter() - start
+            stats = writer.stats.to_dict()
+
+            start = time.perf_counter()
+            for path, page in zip(paths, pages):
+                if load_image(path).tobytes() != page.tobytes():
+                    raise SystemExit(f"{name}: decoded pixels differ from the source page")
+            decode_ms = (time.perf_counter() - start) * 1000 / len(paths)
+
+        print(
+            f"  {name:<10} {stats['bytes_per_image'] / 1024:9.0f} KiB/page  "
+            f"encode {stats['encode_ms_per_image']:7.1f} ms/page  "
+            f"decode {decode_ms:6.1f} ms/page  {len(pages) / elapsed:6.1f} pages/s written"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Synthetic document fixtures generated locally for benchmarks."""
+
+from __future__ import annotations
+
+import zlib
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+A4_POINTS = (595, 842)
+
+VIETNAMESE_LINES = (
+    "Lịch sử Việt Nam trải qua nhiều thời kỳ dựng nước và giữ nước.",
+    "Nhà Lý dời đô từ Hoa Lư ra thành Đại La vào năm một nghìn không trăm mười.",
+    "Chiến thắng Bạch Đằng năm chín trăm ba mươi tám mở ra thời kỳ độc lập.",
+    "Đồng bằng sông Cửu Long là vựa lúa lớn nhất của cả nước.",
+    "Học sinh cần đọc kỹ đề bài trước khi trả lời các câu hỏi trắc nghiệm.",
+    "Phương trình bậc hai có hai nghiệm phân biệt khi biệt thức lớn hơn không.",
+    "Truyện Kiều của Nguyễn Du gồm ba nghìn hai trăm năm mươi tư câu thơ lục bát.",
+    "Khí hậu nhiệt đới gió mùa ẩm ảnh hưởng sâu sắc đến sản xuất nông nghiệp.",
+    "Bảng dưới đây thống kê dân số và diện tích của một số tỉnh thành.",
+    "Quá trình quang hợp diễn ra chủ yếu ở lục lạp của tế bào lá cây.",
+)
+
+TABLE_WORDS = ("Hà Nội", "Huế", "Đà Nẵng", "Cần Thơ", "Số liệu", "Năm 2020", "Tổng", "Diện tích")
+
+
+def write_synthetic_pdf(
+    path: Path,
+    pages: int = 20,
+    *,
+    lines_per_page: int = 40,
+    page_size: tuple[int, int] = A4_POINTS,
+) -> Path:
+    """Write a text-only PDF with *pages* pages of filler lines to *path*."""
+
+    width, height = page_size
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids: List[int] = []
+    for page in range(1, pages + 1):
+        commands = ["BT /F1 11 Tf 14 TL 56 %d Td" % (height - 72)]
+        for line in range(1, lines_per_page + 1):
+            text = f"Trang {page} dong {line}: lich su va dia li Viet Nam qua cac thoi ky."
+            commands.append(f"({text}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (width, height, content_id)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_assemble_pdf(objects))
+    return path
+
+
+def write_synthetic_scan_pdf(
+    path: Path,
+    pages: int = 8,
+    *,
+    dpi: int = 150,
+    tall_every: int = 4,
+    table_every: int = 3,
+    seed: int = 0,
+) -> Path:
+    """Write a scanned-book style PDF of Vietnamese text pages to *path*.
+
+    Every page is a grayscale image; every *tall_every*-th page is 2.5 A4
+    pages tall (so the preprocessor splits it) and every *table_every*-th page
+    carries a ruled table. The same arguments always produce the same file.
+    """
+
+    objects: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>", b""]
+    page_ids: List[int] = []
+    for page in range(1, pages + 1):
+        tall = bool(tall_every) and page % tall_every == 0
+        table = bool(table_every) and page % table_every == 0
+        image = vietnamese_page(dpi=dpi, tall=tall, table=table, seed=seed + page)
+        pixels = zlib.compress(image.tobytes(), 6)
+        objects.append(
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+            b"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode "
+            b"/Length %d >>\nstream\n%s\nendstream"
+            % (image.width, image.height, len(pixels), pixels)
+        )
+        image_id = len(objects)
+        width_pt = image.width * 72.0 / dpi
+        height_pt = image.height * 72.0 / dpi
+        stream = b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (width_pt, height_pt)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+            % (width_pt, height_pt, image_id, content_id)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_assemble_pdf(objects))
+    return path
+
+
+def _assemble_pdf(objects: List[bytes]) -> bytes:
+    buffer = bytearray(b"%PDF-1.4\n")
+    offsets: List[int] = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(buffer))
+        buffer += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(buffer)
+    buffer += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        buffer += b"%010d 00000 n \n" % offset
+    buffer += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref_offset,
+    )
+    return bytes(buffer)
+
+
+def vietnamese_page(
+    dpi: int = 150, *, tall: bool = False, table: bool = False, seed: int = 0
+) -> Image.Image:
+    """Render a grayscale page of Vietnamese paragraphs, optionally with a table."""
+
+    rng = np.random.default_rng(seed)
+    width = round(8.27 * dpi)
+    height = round(11.69 * dpi * (2.5 if tall else 1.0))
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = _font(max(8, dpi // 7))
+    line_height = round(font.size * 1.6)
+    margin_x, margin_y = width // 9, round(dpi * 0.8)
+    y = margin_y
+    table_at = height // 3 if table else None
+    while y + line_height < height - margin_y:
+        if table_at is not None and y >= table_at:
+            y = _draw_table(draw, font, margin_x, y, width - 2 * margin_x, line_height, rng)
+            table_at = None
+            continue
+        text = VIETNAMESE_LINES[int(rng.integers(len(VIETNAMESE_LINES)))]
+        draw.text((margin_x, y), text, fill=int(rng.integers(0, 60)), font=font)
+        y += line_height
+    return page
+
+
+def _draw_table(draw, font, left: int, top: int, width: int, row_height: int, rng) -> int:
+    rows, cols = 5, 4
+    cell_width = width // cols
+    height = rows * row_height
+    for row in range(rows + 1):
+        draw.line((left, top + row * row_height, left + width, top + row * row_height), fill=0, width=2)
+    for col in range(cols + 1):
+        x = left + col * cell_width
+        draw.line((x, top, x, top + height), fill=0, width=2)
+    for row in range(rows):
+        for col in range(cols):
+            word = TABLE_WORDS[int(rng.integers(len(TABLE_WORDS)))]
+            draw.text(
+                (left + col * cell_width + 6, top + row * row_height + row_height // 5),
+                word,
+                fill=0,
+                font=font,
+            )
+    return top + height + row_height
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    # A font with Vietnamese glyphs when one is installed; Pillow's bundled one otherwise.
+    for name in ("DejaVuSans.ttf", "NotoSans-Regular.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def synthetic_scan(dpi: int = 300, seed: int = 0) -> Image.Image:
+    """Return an A4 page image with paper noise, text-like blocks and a thin rule."""
+
+    rng = np.random.default_rng(seed)
+    width, height = round(8.27 * dpi), round(11.69 * dpi)
+    page = rng.integers(246, 256, size=(height, width), dtype=np.uint8)
+    margin_x, margin_y = width // 9, height // 12
+    line_height = max(4, dpi // 8)
+    y = margin_y
+    while y + line_height < height - margin_y:
+        x = margin_x
+        while x < width - margin_x:
+            word = int(rng.integers(line_height, line_height * 6))
+            page[y : y + line_height // 2, x : min(x + word, width - margin_x)] = rng.integers(
+                0, 90
+            )
+            x += word + line_height
+        y += line_height * 2
+    # A one pixel rule close to the edge, thinner than any sampling stride.
+    page[margin_y // 2, margin_x : width - margin_x] = 40
+    return Image.fromarray(page).convert("RGB")
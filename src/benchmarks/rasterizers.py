@@ -0,0 +1,95 @@
+"""Compare pages/sec and peak RSS of the available rasterizer backends.
+
+Run from ``src/``: ``uv run python -m benchmarks.rasterizers --pages 50 --dpi 200``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from pipeline.converter import convert_pdf_to_images
+from pipeline.rasterizers import RASTERIZERS, get_rasterizer
+
+from .fixtures import write_synthetic_pdf
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in KiB on Linux; children covers poppler subprocesses.
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024.0
+
+
+def _run_backend(name: str, pdf_path: str, dpi: int, results) -> None:
+    rasterizer = get_rasterizer(name)
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        try:
+            paths = convert_pdf_to_images(
+                Path(pdf_path), Path(scratch), dpi=dpi, overwrite=True, rasterizer=rasterizer
+            )
+        except Exception as exc:  # missing binaries or optional packages
+            results.put({"backend": name, "error": str(exc)})
+            return
+        elapsed = time.perf_counter() - start
+    results.put(
+        {
+            "backend": name,
+            "pages": len(paths),
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(len(paths) / elapsed, 2) if elapsed else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+    )
+
+
+def benchmark(pdf_path: Path, dpi: int, backends: list[str]) -> list[dict]:
+    # Each backend runs in a fresh process so peak RSS is not shared between them.
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for name in backends:
+        results = context.Queue()
+        process = context.Process(
+            target=_run_backend, args=(name, str(pdf_path), dpi, results)
+        )
+        process.start()
+        row = results.get()
+        process.join()
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument(
+        "--backends", nargs="+", choices=sorted(RASTERIZERS), default=sorted(RASTERIZERS)
+    )
+    parser.add_argument("--json", type=Path, help="Also write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        pdf_path = write_synthetic_pdf(Path(scratch) / "synthetic.pdf", args.pages)
+        rows = benchmark(pdf_path, args.dpi, args.backends)
+
+    for row in rows:
+        if "error" in row:
+            print(f"{row['backend']:>10}  failed ({row['error']})")
+            continue
+        print(
+            f"{row['backend']:>10}  {row['pages_per_sec']:>8} pages/s  "
+            f"{row['peak_rss_mb']:>8} MB peak RSS  ({row['pages']} pages in {row['seconds']}s)"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
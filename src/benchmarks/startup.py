@@ -0,0 +1,99 @@
+"""Measure CLI startup and check that conversion-only runs never import paddle.
+
+Run from ``src/``: ``uv run python -m benchmarks.startup``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("paddle", "paddleocr", "pdf2image", "pymupdf", "bs4")
+
+# Runs main.main() in a fresh interpreter and reports which heavy modules it loaded.
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+heavy = json.loads(sys.argv[2])
+sys.argv = ["main.py", *json.loads(sys.argv[1])]
+import main
+try:
+    main.main()
+except SystemExit:
+    pass
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "loaded": [name for name in heavy if name in sys.modules],
+}))
+"""
+
+
+def probe(cli_args: list[str]) -> dict:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE, json.dumps(cli_args), json.dumps(HEAVY_MODULES)],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"main.py {' '.join(cli_args)} failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start
+    return result
+
+
+def eager_import_seconds(module: str) -> float | None:
+    """Cost of importing *module* in a fresh interpreter (None if not installed)."""
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import time; t = time.perf_counter(); import {module}; "
+         "print(time.perf_counter() - t)"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rasterizer", default="pdf2image")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        root = Path(scratch)
+        (root / "raw").mkdir()
+        convert_args = [
+            "--convert-only",
+            "--raw-dir", str(root / "raw"),
+            "--image-dir", str(root / "image"),
+            "--annotations", str(root / "annotations.jsonl"),
+            "--rasterizer", args.rasterizer,
+        ]
+        rows = {"--help": probe(["--help"]), "--convert-only": probe(convert_args)}
+
+    failed = False
+    for name, result in rows.items():
+        paddle_loaded = "paddle" in result["loaded"] or "paddleocr" in result["loaded"]
+        failed = failed or paddle_loaded
+        print(
+            f"{name:>15}  {result['process_seconds']:6.2f}s wall  "
+            f"(in-process {result['seconds']:.2f}s)  "
+            f"heavy modules: {', '.join(result['loaded']) or 'none'}"
+        )
+    paddle_cost = eager_import_seconds("paddleocr")
+    if paddle_cost is not None:
+        print(f"{'import paddleocr':>15}  {paddle_cost:6.2f}s avoided by lazy loading")
+    if failed:
+        raise SystemExit("paddle was imported by a run that does not need OCR")
+
+
+if __name__ == "__main__":
+    main()
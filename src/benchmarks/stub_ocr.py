@@ -0,0 +1,131 @@
+"""Deterministic stand-ins for PaddleOCR/PPStructure so benchmarks run without paddle.
+
+The stubs do real (cheap) image work - text rows and table rules are found with
+numpy - so the pipeline code around the engine is exercised with realistic
+line counts, crops and table HTML.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+from pipeline.ocr import OCRService
+
+from .fixtures import TABLE_WORDS, VIETNAMESE_LINES
+
+_INK = 128
+
+
+def _gray(image) -> np.ndarray:
+    array = np.asarray(image)
+    return array.mean(axis=2) if array.ndim == 3 else array
+
+
+def _runs(mask: np.ndarray) -> List[tuple[int, int]]:
+    """``(start, stop)`` of every run of True values in the 1-D *mask*."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def _rule_rows(dark: np.ndarray) -> np.ndarray:
+    return dark.mean(axis=1) > 0.6
+
+
+def _detect(img) -> np.ndarray:
+    """``(N, 4, 2)`` boxes of the text rows of *img*, like ``dt_polys``."""
+    dark = _gray(img) < _INK
+    rows = dark.any(axis=1) & ~_rule_rows(dark)
+    boxes: List[list] = []
+    for top, bottom in _runs(rows):
+        columns = np.flatnonzero(dark[top:bottom].any(axis=0))
+        left, right = int(columns[0]), int(columns[-1]) + 1
+        boxes.append([[left, top], [right, top], [right, bottom], [left, bottom]])
+    return np.asarray(boxes, dtype=np.int16).reshape(-1, 4, 2)
+
+
+def _text(width: int) -> tuple[str, float]:
+    # Keyed on the line width so a line reads the same however it is batched.
+    return VIETNAMESE_LINES[width % len(VIETNAMESE_LINES)], 0.97
+
+
+class StubOCREngine:
+    """Mimics the PaddleOCR 3.x pipeline's ``ocr(img)`` result."""
+
+    def ocr(self, img) -> List[dict]:
+        polys = _detect(img)
+        texts = [_text(int(poly[:, 0].max() - poly[:, 0].min())) for poly in polys]
+        return [
+            {
+                "rec_texts": [text for text, _ in texts],
+                "rec_scores": [score for _, score in texts],
+                "rec_polys": list(polys),
+            }
+        ]
+
+
+class StubTextDetection:
+    """Mimics ``paddleocr.TextDetection.predict``."""
+
+    def predict(self, img, batch_size: int = 1) -> List[dict]:
+        polys = _detect(img)
+        return [{"dt_polys": polys, "dt_scores": [0.9] * len(polys)}]
+
+
+class StubTextRecognition:
+    """Mimics ``paddleocr.TextRecognition.predict`` on a list of line crops."""
+
+    def predict(self, crops, batch_size: int = 1) -> List[dict]:
+        results = []
+        for crop in crops:
+            text, score = _text(crop.shape[1])
+            results.append({"rec_text": text, "rec_score": score})
+        return results
+
+
+class StubTableEngine:
+    """Mimics ``PPStructure``: one table result per block of ruled lines."""
+
+    def __call__(self, img) -> List[dict]:
+        dark = _gray(img) < _INK
+        rules = np.flatnonzero(_rule_rows(dark))
+        if len(rules) < 3:
+            return []
+        # Merge the 2px rule rows into distinct lines.
+        lines = [start for start, _ in _runs(_rule_rows(dark))]
+        rows = len(lines) - 1
+        cells = "".join(
+            "<tr>"
+            + "".join(
+                f"<td>{TABLE_WORDS[(row * 4 + col) % len(TABLE_WORDS)]}</td>" for col in range(4)
+            )
+            + "</tr>"
+            for row in range(rows)
+        )
+        return [
+            {
+                "type": "table",
+                "bbox": [0, int(rules[0]), dark.shape[1], int(rules[-1]) + 1],
+                "res": {"html": f"<html><body><table>{cells}</table></body></html>"},
+            }
+        ]
+
+
+def install_stub_engines(service: OCRService) -> OCRService:
+    """Give *service* the stub engines instead of loading paddle.
+
+    As with the real engines, the separate detection/recognition modules are
+    only present when the configuration batches pages or detects at a lower
+    resolution; the full-pipeline engine is used otherwise.
+    """
+    if service.wants_split_stages():
+        service.det_engine = StubTextDetection()
+        service.rec_engine = StubTextRecognition()
+    else:
+        service.ocr_engine = StubOCREngine()
+    service.table_engine = StubTableEngine()
+    service.layout_engine = None
+    service._loaded = True
+    return service
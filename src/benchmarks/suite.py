@@ -0,0 +1,279 @@
+"""Time every pipeline stage on synthetic Vietnamese scans and compare to a baseline.
+
+Run from ``src/``::
+
+    uv run python -m benchmarks.suite --output benchmarks/baseline.json
+    uv run python -m benchmarks.suite --baseline benchmarks/baseline.json
+
+OCR uses the stub engines from :mod:`benchmarks.stub_ocr`, so the suite runs
+offline and without a GPU. Each stage reports its best and median time over
+``--repeat`` runs; ``--baseline`` prints the ratio against an earlier result
+file and exits non-zero when a stage got slower than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from PIL import Image
+
+from pipeline.annotations import AnnotationWriter
+from pipeline.caption import CaptionGenerator
+from pipeline.config import PipelineConfig
+from pipeline.converter import convert_pdf_to_images
+from pipeline.models import DatasetRecord, ImageArtifact
+from pipeline.ocr import OCRService
+from pipeline.pipeline import DatasetPipeline
+from pipeline.preprocess import ImagePreprocessor
+from pipeline.qa import QualityAssurance
+from pipeline.rasterizers import RASTERIZERS, get_rasterizer
+from pipeline.storage import ImageWriter
+
+from .fixtures import write_synthetic_scan_pdf
+from .stub_ocr import install_stub_engines
+
+SUITE_VERSION = 1
+
+
+def _measure(fn: Callable[[], int], repeat: int) -> dict:
+    """Run *fn* (which returns the number of items it handled) *repeat* times."""
+    timings: List[float] = []
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "items": items,
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(timings), 6),
+        "items_per_s": round(items / best, 3) if best > 0 else None,
+    }
+
+
+class Suite:
+    """Holds the fixture and the intermediate results each stage feeds the next."""
+
+    def __init__(self, args: argparse.Namespace, scratch: Path) -> None:
+        self.args = args
+        self.scratch = scratch
+        self.config = PipelineConfig(
+            raw_pdf_dir=scratch / "raw",
+            image_output_dir=scratch / "images",
+            annotation_output_path=scratch / "annotations.jsonl",
+            dpi=args.dpi,
+            rasterizer=args.rasterizer,
+            preprocess_cache=False,
+            overwrite_images=True,
+            ocr_cache=False,
+            ocr_batch_size=args.ocr_batch_size,
+            ocr_detect_dpi=args.detect_dpi,
+            metrics_output_path=None,
+        )
+        self.pdf_path = write_synthetic_scan_pdf(
+            self.config.raw_pdf_dir / "synthetic.pdf",
+            pages=args.pages,
+            dpi=args.dpi,
+            seed=args.seed,
+        )
+        self.rasterizer = get_rasterizer(args.rasterizer)
+        self.pages: List[Image.Image] = []
+        self.pieces: List[ImageArtifact] = []
+        self.documents: list = []
+        self.captions: list = []
+        self.records: List[DatasetRecord] = []
+
+    def convert(self) -> int:
+        paths = convert_pdf_to_images(
+            self.pdf_path,
+            self.scratch / "converted",
+            dpi=self.args.dpi,
+            overwrite=True,
+            rasterizer=self.rasterizer,
+        )
+        self.pages = []
+        for path in paths:
+            with Image.open(path) as image:
+                self.pages.append(image.convert("RGB"))
+        return len(paths)
+
+    def preprocess(self) -> int:
+        writer = ImageWriter(max_workers=0)
+        preprocessor = ImagePreprocessor(self.config, writer=writer)
+        self.config.image_output_dir.mkdir(parents=True, exist_ok=True)
+        self.pieces = []
+        for number, page in enumerate(self.pages, start=1):
+            artifact = ImageArtifact(
+                image_path=self.config.image_output_dir / f"synthetic_page_{number:03d}.png",
+                parent_pdf=self.pdf_path,
+                page_number=number,
+                image=page.copy(),
+            )
+            self.pieces.extend(preprocessor.process(artifact))
+        writer.flush()
+        return len(self.pages)
+
+    def ocr(self) -> int:
+        service = install_stub_engines(OCRService(self.config))
+        images = [piece.load_image() for piece in self.pieces]
+        size = max(1, self.args.ocr_batch_size)
+        self.documents = []
+        for start in range(0, len(images), size):
+            self.documents.extend(service.extract_batch(images[start : start + size]))
+        return len(images)
+
+    def caption(self) -> int:
+        captioner = CaptionGenerator()
+        self.captions = [
+            captioner.generate(piece.load_image().size, document)
+            for piece, document in zip(self.pieces, self.documents)
+        ]
+        return len(self.captions)
+
+    def qa(self) -> int:
+        qa = QualityAssurance(self.config)
+        self.records = [
+            DatasetRecord(
+                artifact=piece,
+                ocr=document,
+                caption=caption,
+                qa=qa.evaluate(document, caption),
+            )
+            for piece, document, caption in zip(self.pieces, self.documents, self.captions)
+        ]
+        return len(self.records)
+
+    def serialize(self) -> int:
+        with AnnotationWriter(self.scratch / "serialized.jsonl") as writer:
+            for record in self.records:
+                writer.write(record)
+        return len(self.records)
+
+    def end_to_end(self) -> int:
+        config = replace(
+            self.config,
+            image_output_dir=self.scratch / "e2e" / "images",
+            annotation_output_path=self.scratch / "e2e" / "annotations.jsonl",
+        )
+        pipeline = DatasetPipeline(config)
+        install_stub_engines(pipeline.ocr_service)
+        pipeline.run()
+        return self.args.pages
+
+    def stages(self) -> Dict[str, Callable[[], int]]:
+        # Order matters: each stage consumes the previous stage's output.
+        return {
+            "convert": self.convert,
+            "preprocess": self.preprocess,
+            "ocr": self.ocr,
+            "caption": self.caption,
+            "qa": self.qa,
+            "serialize": self.serialize,
+            "end_to_end": self.end_to_end,
+        }
+
+
+def _version(package: str) -> str | None:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as scratch:
+        suite = Suite(args, Path(scratch))
+        results = {
+            name: _measure(stage, args.repeat) for name, stage in suite.stages().items()
+        }
+    return {
+        "suite_version": SUITE_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "pillow": _version("pillow"),
+            "numpy": _version("numpy"),
+        },
+        "parameters": {
+            "pages": args.pages,
+            "dpi": args.dpi,
+            "rasterizer": args.rasterizer,
+            "ocr_batch_size": args.ocr_batch_size,
+            "detect_dpi": args.detect_dpi,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """Print per-stage ratios against *baseline*; False if any exceeds *tolerance*."""
+    if current["parameters"] != baseline.get("parameters"):
+        print("warning: baseline was recorded with different parameters")
+    ok = True
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"  {name:<12} (no baseline)")
+            continue
+        ratio = result["best_s"] / previous["best_s"] if previous["best_s"] else float("inf")
+        flag = "SLOWER" if ratio > tolerance else ""
+        ok = ok and ratio <= tolerance
+        print(f"  {name:<12} {previous['best_s']:9.4f}s -> {result['best_s']:9.4f}s  x{ratio:5.2f} {flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument(
+        "--rasterizer", choices=sorted(RASTERIZERS), default=PipelineConfig().rasterizer
+    )
+    parser.add_argument("--ocr-batch-size", type=int, default=1)
+    parser.add_argument(
+        "--detect-dpi", type=int, help="Detect text on pages downscaled to this DPI"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="Compare against an earlier results file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.25,
+        help="Fail when a stage is this many times slower than the baseline (default 1.25)",
+    )
+    args = parser.parse_args()
+
+    report = run(args)
+    for name, result in report["results"].items():
+        print(
+            f"{name:<12} {result['best_s']:9.4f}s best  {result['median_s']:9.4f}s median  "
+            f"{result['items']:>4} items  {result['items_per_s']} items/s"
+        )
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        print(f"Compared with {args.baseline}:")
+        if not compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Microbenchmark of table HTML parsing: stdlib streaming parser vs BeautifulSoup.
+
+Run from ``src/``: ``uv run python -m benchmarks.tables --rows 30 --cols 6 --repeat 20``
+
+The BeautifulSoup path is the one ``OCRService._parse_tables`` used before;
+it needs ``beautifulsoup4`` (in the ``dev`` dependency group) and is skipped
+when that is not installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List
+
+from pipeline.models import TableCell, TableContent
+from pipeline.tables import parse_table_html
+
+from .fixtures import TABLE_WORDS
+
+
+def synthetic_table_html(rows: int, cols: int, seed: int = 0, spans: bool = False) -> str:
+    """PPStructure-style table HTML; with *spans* the header row merges cells."""
+    rng = random.Random(seed)
+    parts = ["<html><body><table>"]
+    for row in range(rows):
+        parts.append("<tr>")
+        col = 0
+        while col < cols:
+            word = TABLE_WORDS[rng.randrange(len(TABLE_WORDS))]
+            if spans and row == 0 and col + 2 <= cols and rng.random() < 0.5:
+                parts.append(f'<td colspan="2">{word}</td>')
+                col += 2
+                continue
+            parts.append(f"<td>{word} {rng.randrange(1000)}</td>")
+            col += 1
+        parts.append("</tr>")
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+def legacy_parse(html: str) -> TableContent:
+    """The BeautifulSoup implementation the streaming parser replaced."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    rows = soup.find_all("tr")
+    col_count = 0
+    cells: List[TableCell] = []
+    for r_idx, row in enumerate(rows):
+        columns = row.find_all(["td", "th"])
+        col_count = max(col_count, len(columns))
+        for c_idx, col in enumerate(columns):
+            cells.append(TableCell(row=r_idx, col=c_idx, text=col.get_text(" ", strip=True)))
+    return TableContent(rows=len(rows), cols=col_count, cells=cells)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--tables", type=int, default=20, help="Tables parsed per timed run")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tables = [
+        synthetic_table_html(args.rows, args.cols, seed=args.seed + index)
+        for index in range(args.tables)
+    ]
+    streaming_ms = _time(lambda: [parse_table_html(html) for html in tables], args.repeat)
+    print(f"{args.tables} tables of {args.rows}x{args.cols} ({len(tables[0])} bytes each)")
+    print(f"  streaming  {streaming_ms:8.2f} ms")
+
+    try:
+        import bs4  # noqa: F401
+    except ImportError:
+        print("  bs4        skipped (beautifulsoup4 not installed)")
+        return
+    # Without spans both parsers must agree cell for cell.
+    for html in tables:
+        if legacy_parse(html) != parse_table_html(html):
+            raise SystemExit("table mismatch between BeautifulSoup and streaming parser")
+    legacy_ms = _time(lambda: [legacy_parse(html) for html in tables], args.repeat)
+    print(f"  bs4        {legacy_ms:8.2f} ms  (streaming is {legacy_ms / streaming_ms:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,11 @@ from dataclasses import replace
 from pathlib import Path
 
 from pipeline import DatasetPipeline, PipelineConfig
+from pipeline.annotations import rerun_qa
+from pipeline.columnar import COLUMNAR_FORMATS
+from pipeline.split_merge import SPLIT_MERGE_MODES
+from pipeline.storage import IMAGE_FORMATS
+from pipeline.rasterizers import RASTERIZERS
 
 
 def parse_args() -> argparse.Namespace:
@@ -25,6 +30,11 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--dpi", type=int, help="Resolution for PDF to image conversion"
     )
+    parser.add_argument(
+        "--rasterizer",
+        choices=sorted(RASTERIZERS),
+        help="Backend used to render PDF pages (default pdf2image)",
+    )
     parser.add_argument(
         "--limit-pdfs", type=int, help="Process only the first N PDF files"
     )
@@ -36,16 +46,173 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Regenerate page images even if they already exist",
     )
+    parser.add_argument(
+        "--split-mode",
+        choices=["uniform", "gutter"],
+        help="Cut tall pages into equal slices or along blank gutters (default uniform)",
+    )
+    parser.add_argument(
+        "--detect-dpi",
+        type=int,
+        help=(
+            "Run text detection on a copy downscaled to this DPI and recognize "
+            "line crops from the full --dpi render (e.g. 100 with --dpi 300)"
+        ),
+    )
+    parser.add_argument(
+        "--image-format",
+        choices=IMAGE_FORMATS,
+        help=(
+            "Codec for page images: png (default), lossless webp (smallest), or "
+            "uncompressed tiff/npy for fast scratch output"
+        ),
+    )
+    parser.add_argument(
+        "--png-compress-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="zlib level for PNG output (default 6; lower is faster and larger)",
+    )
+    parser.add_argument(
+        "--png-optimize",
+        action="store_true",
+        help="Search PNG filters for smaller files (much slower to encode)",
+    )
+    parser.add_argument(
+        "--encoder-threads",
+        type=int,
+        help="Threads encoding and writing page images (default 2, 0 = inline)",
+    )
+    parser.add_argument(
+        "--split-merge",
+        choices=SPLIT_MERGE_MODES,
+        help=(
+            "Drop OCR spans repeated in the overlap of split pieces (dedup), or also "
+            "emit one record per page in page coordinates instead of one per piece (page)"
+        ),
+    )
+    parser.add_argument(
+        "--no-preprocess-cache",
+        action="store_true",
+        help="Ignore the preprocessing manifest and crop/split every page again",
+    )
     parser.add_argument(
         "--num-workers",
         type=int,
-        help="Number of parallel workers for OCR/caption steps",
+        help="Number of OCR worker threads (default 1)",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Where to write per-stage timings as JSON (default dataset/metrics.json)",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Print a live progress line with throughput and queue depths",
+    )
+    parser.add_argument(
+        "--preprocess-workers",
+        type=int,
+        help="Number of threads cropping/splitting pages (default 1)",
+    )
+    parser.add_argument(
+        "--annotate-workers",
+        type=int,
+        help="Number of threads running captioning and QA (default 1)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        help="Pages buffered between pipeline stages (default 4)",
+    )
+    parser.add_argument(
+        "--conversion-window",
+        type=int,
+        help="Number of pages rasterized per poppler call (default 1)",
+    )
+    parser.add_argument(
+        "--conversion-workers",
+        type=int,
+        help="Number of processes converting PDFs in parallel (default 1)",
+    )
+    parser.add_argument(
+        "--conversion-chunk-pages",
+        type=int,
+        help="Split large PDFs into conversion jobs of N pages (0 disables)",
+    )
+    parser.add_argument(
+        "--poppler-threads",
+        type=int,
+        help="Number of poppler threads used per conversion job (default 1)",
+    )
+    parser.add_argument(
+        "--ocr-pool",
+        choices=["thread", "process"],
+        help="Run OCR workers as threads sharing one engine or as processes with "
+        "one engine each (default thread)",
+    )
+    parser.add_argument(
+        "--ocr-mode",
+        choices=["separate", "layout"],
+        help="Run full PPStructure on every page, or layout detection first and "
+        "table recognition only on table regions (default separate; layout needs "
+        "PaddleOCR 2.x)",
+    )
+    parser.add_argument(
+        "--ocr-batch-size",
+        type=int,
+        help="Number of pages whose text lines are recognized together (default 1)",
+    )
+    parser.add_argument(
+        "--no-ocr-cache",
+        action="store_true",
+        help="Do not read or write the on-disk OCR result cache",
+    )
+    parser.add_argument(
+        "--refresh-ocr",
+        action="store_true",
+        help="Re-run OCR for every page and overwrite cached results",
+    )
+    parser.add_argument(
+        "--ocr-cache-dir", type=Path, help="Directory holding cached OCR results"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep the existing annotations file and only process missing pages",
     )
     parser.add_argument(
         "--convert-only",
         action="store_true",
         help="Only convert PDFs to images and skip OCR/caption steps",
     )
+    parser.add_argument(
+        "--columnar",
+        choices=COLUMNAR_FORMATS,
+        help="Also write annotations in a columnar format (auto picks arrow if pyarrow is installed, else npy)",
+    )
+    parser.add_argument(
+        "--rerun-qa",
+        action="store_true",
+        help="Re-run QA checks over the existing annotations file and rewrite its qa fields",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        help="Split the corpus into N shards by a stable hash of each PDF path (default 1)",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help="Process only shard I (0-based) and write its own annotations file",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        action="store_true",
+        help="Merge the annotations of all --shard-count shards and check every page is covered once",
+    )
     return parser.parse_args()
 
 
@@ -61,14 +228,70 @@ def build_config(args: argparse.Namespace) -> PipelineConfig:
         config = replace(config, pdf_glob_pattern=args.pattern)
     if args.dpi:
         config = replace(config, dpi=args.dpi)
+    if args.rasterizer:
+        config = replace(config, rasterizer=args.rasterizer)
     if args.limit_pdfs is not None:
         config = replace(config, max_pdfs=args.limit_pdfs)
     if args.limit_pages is not None:
         config = replace(config, max_pages_per_pdf=args.limit_pages)
     if args.num_workers is not None:
         config = replace(config, num_workers=max(1, args.num_workers))
+    if args.metrics is not None:
+        config = replace(config, metrics_output_path=args.metrics)
+    if args.progress:
+        config = replace(config, progress=True)
+    if args.preprocess_workers is not None:
+        config = replace(config, preprocess_workers=max(1, args.preprocess_workers))
+    if args.annotate_workers is not None:
+        config = replace(config, annotate_workers=max(1, args.annotate_workers))
+    if args.queue_size is not None:
+        config = replace(config, stage_queue_size=max(1, args.queue_size))
+    if args.conversion_window is not None:
+        config = replace(config, conversion_window=max(1, args.conversion_window))
+    if args.ocr_pool:
+        config = replace(config, ocr_pool=args.ocr_pool)
+    if args.ocr_mode:
+        config = replace(config, ocr_mode=args.ocr_mode)
+    if args.ocr_batch_size is not None:
+        config = replace(config, ocr_batch_size=max(1, args.ocr_batch_size))
+    if args.no_ocr_cache:
+        config = replace(config, ocr_cache=False)
+    if args.refresh_ocr:
+        config = replace(config, refresh_ocr=True)
+    if args.ocr_cache_dir:
+        config = replace(config, ocr_cache_dir=args.ocr_cache_dir)
+    if args.resume:
+        config = replace(config, resume=True)
+    if args.conversion_workers is not None:
+        config = replace(config, conversion_workers=max(1, args.conversion_workers))
+    if args.conversion_chunk_pages is not None:
+        config = replace(config, conversion_chunk_pages=max(0, args.conversion_chunk_pages))
+    if args.poppler_threads is not None:
+        config = replace(config, poppler_threads=max(1, args.poppler_threads))
     if args.overwrite_images:
         config = replace(config, overwrite_images=True)
+    if args.split_mode:
+        config = replace(config, split_mode=args.split_mode)
+    if args.detect_dpi is not None:
+        config = replace(config, ocr_detect_dpi=max(1, args.detect_dpi))
+    if args.image_format:
+        config = replace(config, image_format=args.image_format)
+    if args.png_compress_level is not None:
+        config = replace(config, png_compress_level=args.png_compress_level)
+    if args.png_optimize:
+        config = replace(config, png_optimize=True)
+    if args.encoder_threads is not None:
+        config = replace(config, image_writer_threads=max(0, args.encoder_threads))
+    if args.split_merge:
+        config = replace(config, split_merge=args.split_merge)
+    if args.no_preprocess_cache:
+        config = replace(config, preprocess_cache=False)
+    if args.columnar:
+        config = replace(config, columnar_format=args.columnar)
+    if args.shard_count is not None:
+        config = replace(config, shard_count=args.shard_count)
+    if args.shard_index is not None:
+        config = replace(config, shard_index=args.shard_index)
 
     project_root = Path(__file__).resolve().parent
     return config.resolve(project_root)
@@ -78,12 +301,32 @@ def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
     args = parse_args()
     config = build_config(args)
-    pipeline = DatasetPipeline(config)
+    if args.merge_shards:
+        # Merging reads every shard; the shard index does not apply.
+        config = replace(config, shard_index=0)
+    try:
+        pipeline = DatasetPipeline(config)
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}")
+    if args.merge_shards:
+        report = pipeline.merge_shards()
+        if not report.ok:
+            for problem in report.problems():
+                logging.error(problem)
+            raise SystemExit(f"Merge failed with {len(report.problems())} problems")
+        logging.info("Merged %d records into %s", report.records, config.annotation_output_path)
+        return
+    if args.rerun_qa:
+        total, acceptable = rerun_qa(pipeline.annotation_path, pipeline.qa)
+        logging.info("Re-ran QA on %d records; %d acceptable", total, acceptable)
+        return
     if args.convert_only:
         artifacts = pipeline.convert_pdfs()
         logging.info("Conversion completed: %d base images prepared", len(artifacts))
         return
-    pipeline.run()
+    # Stream records instead of run() so memory stays flat on large corpora.
+    for _ in pipeline.iter_records():
+        pass
 
 
 if __name__ == "__main__":
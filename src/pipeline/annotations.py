@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import IO, Set, Tuple
+
+from .models import DatasetRecord, ImageArtifact
+from .qa import QualityAssurance
+
+LOGGER = logging.getLogger(__name__)
+
+RecordKey = Tuple[str, int]
+
+
+def record_key(artifact: ImageArtifact) -> RecordKey:
+    return (str(artifact.image_path), artifact.split_index)
+
+
+def load_completed_keys(path: Path) -> Set[RecordKey]:
+    """Return the ``(image_path, split_index)`` keys already written to *path*.
+
+    A trailing line left incomplete by a crash is cut off so appending can
+    continue from the last complete record.
+    """
+    keys: Set[RecordKey] = set()
+    try:
+        handle = path.open("rb+")
+    except FileNotFoundError:
+        return keys
+    with handle:
+        good_end = 0
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                data = json.loads(line)
+            except ValueError:
+                break
+            keys.add((data["image_path"], data["split_index"]))
+            good_end += len(line)
+        if good_end < handle.seek(0, os.SEEK_END):
+            LOGGER.warning("Truncating incomplete tail of %s at byte %d", path, good_end)
+            handle.truncate(good_end)
+    return keys
+
+
+def rerun_qa(path: Path, qa: QualityAssurance) -> Tuple[int, int]:
+    """Re-evaluate QA for every record of *path* in place.
+
+    Records are checked as plain dicts and only their ``qa`` field is
+    replaced; the file is swapped atomically. Returns ``(records, acceptable)``.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    total = acceptable = 0
+    with path.open("r", encoding="utf-8") as source, tmp_path.open("w", encoding="utf-8") as target:
+        for line in source:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            result = qa.evaluate_record(data)
+            data["qa"] = {
+                "warnings": result.warnings,
+                "blocking_issues": result.blocking_issues,
+                "is_acceptable": result.is_acceptable(),
+            }
+            target.write(json.dumps(data, ensure_ascii=False) + "\n")
+            total += 1
+            acceptable += result.is_acceptable()
+        target.flush()
+        os.fsync(target.fileno())
+    os.replace(tmp_path, path)
+    return total, acceptable
+
+
+class AnnotationWriter:
+    """Streams records to a JSONL file as they complete.
+
+    Every *checkpoint_every* records the file is flushed and fsync'ed, so a
+    crash loses at most that many records; with *append* an existing file is
+    extended instead of replaced. The file is only created on the first write.
+    """
+
+    def __init__(self, path: Path, *, append: bool = False, checkpoint_every: int = 100) -> None:
+        self.path = path
+        self.append = append
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.count = 0
+        self._handle: IO[str] | None = None
+
+    def write(self, record: DatasetRecord) -> None:
+        if self._handle is None:
+            self._handle = self.path.open("a" if self.append else "w", encoding="utf-8")
+        self._handle.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+        self.count += 1
+        if self.count % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        if self._handle is None:
+            return
+        self.checkpoint()
+        self._handle.close()
+        self._handle = None
+
+    def __enter__(self) -> "AnnotationWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,19 +1,17 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
-from PIL import Image
+import numpy as np
 
-from .models import CaptionResult, OCRDocument, TableContent, TextSpan
+from .models import CaptionResult, OCRDocument, TableContent
 
 
 class CaptionGenerator:
     """Creates heuristic Vietnamese captions based on OCR output."""
 
-    def generate(self, image_path: Path, document: OCRDocument) -> CaptionResult:
-        image = Image.open(image_path)
-        width, height = image.size
+    def generate(self, image_size: Tuple[int, int], document: OCRDocument) -> CaptionResult:
+        width, height = image_size
         sentences: List[str] = []
 
         if not document.texts and not document.tables:
@@ -24,10 +22,13 @@ class CaptionGenerator:
             "Ảnh tài liệu với bố cục dọc, nền giấy sáng và nội dung tiếng Việt."  # baseline context
         )
 
-        top_spans = sorted(document.texts, key=lambda span: span.bbox.top)[:3]
-        for span in top_spans:
-            position = self._describe_position(span, width, height)
-            sentences.append(f"{position} có đoạn chữ: \"{span.text}\".")
+        spans = document.texts
+        # Stable, so spans at the same height keep their reading order.
+        top_spans = np.argsort(spans.tops, kind="stable")[:3]
+        centers = spans.centers
+        for index in top_spans:
+            position = self._describe_position(centers[index], width, height)
+            sentences.append(f"{position} có đoạn chữ: \"{spans.strings[index]}\".")
 
         for table in document.tables:
             sentences.append(self._describe_table(table))
@@ -39,8 +40,8 @@ class CaptionGenerator:
         caption = " ".join(sentences)
         return CaptionResult(caption=caption, supporting_sentences=sentences)
 
-    def _describe_position(self, span: TextSpan, width: int, height: int) -> str:
-        cx, cy = span.bbox.center
+    def _describe_position(self, center: np.ndarray, width: int, height: int) -> str:
+        cx, cy = center
         horizontal = "bên trái" if cx < width * 0.33 else "bên phải" if cx > width * 0.66 else "chính giữa"
         vertical = "phần trên" if cy < height * 0.33 else "phần dưới" if cy > height * 0.66 else "khoảng giữa"
         return f"Ở {vertical} {horizontal}".strip()
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from .models import DatasetRecord, OCRDocument
+
+COLUMNAR_FORMATS = ("auto", "arrow", "parquet", "npy")
+SCHEMA_VERSION = 1
+_SUFFIXES = {"arrow": ".arrow", "parquet": ".parquet", "npy": ".columns"}
+
+# Row-level string and scalar columns, in output order.
+_STRING_COLUMNS = ("image_path", "parent_pdf", "caption", "tables")
+_LIST_COLUMNS = ("supporting_sentences", "qa_warnings", "qa_blocking_issues")
+_SCALAR_COLUMNS = {"page_number": np.int32, "split_index": np.int32, "qa_is_acceptable": np.bool_}
+
+
+def _pyarrow():
+    # Imported on demand so runs without columnar output never load pyarrow.
+    try:
+        import pyarrow
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return pyarrow
+
+
+def resolve_format(name: str) -> str:
+    if name not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format {name!r}; choose from {COLUMNAR_FORMATS}")
+    if name == "auto":
+        return "arrow" if _pyarrow() is not None else "npy"
+    if name in ("arrow", "parquet") and _pyarrow() is None:
+        raise ValueError(f"The {name} format needs pyarrow; use 'npy' or install the 'arrow' extra")
+    return name
+
+
+def columnar_path(annotation_path: Path, fmt: str) -> Path:
+    """``annotations.jsonl`` -> ``annotations.arrow`` (or ``.parquet``/``.columns``)."""
+    return annotation_path.with_suffix(_SUFFIXES[resolve_format(fmt)])
+
+
+class ColumnarWriter:
+    """Writes records as Arrow IPC, Parquet or raw NumPy columns.
+
+    Every record becomes one row; text spans are flattened into span-level
+    columns (``span_text``, ``span_confidence`` and ``span_bbox`` as packed
+    float32 ``(4, 2)`` polygons) addressed through per-row offsets, and tables
+    are kept as a JSON string column. Without pyarrow the ``npy`` format writes
+    a directory of raw column files plus ``schema.json`` that
+    :func:`load_columns` memory-maps.
+
+    Records are buffered column-wise and written every *chunk_records*; the
+    ``write``/``checkpoint``/``close`` interface matches
+    :class:`~pipeline.annotations.AnnotationWriter`.
+    """
+
+    def __init__(self, path: Path, fmt: str = "auto", *, chunk_records: int = 1000) -> None:
+        self.format = resolve_format(fmt)
+        self.path = path
+        self.chunk_records = max(1, chunk_records)
+        self.count = 0
+        self._rows: Dict[str, list] = {}
+        self._span_texts: List[str] = []
+        self._span_confidences: List[float] = []
+        self._span_boxes: List[np.ndarray] = []
+        self._span_counts: List[int] = []
+        self._sink = None
+        self._reset()
+
+    def write(self, record: DatasetRecord) -> None:
+        texts = record.ocr.texts
+        self._add(
+            {
+                "image_path": str(record.artifact.image_path),
+                "parent_pdf": str(record.artifact.parent_pdf),
+                "page_number": record.artifact.page_number,
+                "split_index": record.artifact.split_index,
+                "caption": record.caption.caption,
+                "supporting_sentences": record.caption.supporting_sentences,
+                "qa_warnings": record.qa.warnings,
+                "qa_blocking_issues": record.qa.blocking_issues,
+                "qa_is_acceptable": record.qa.is_acceptable(),
+                "tables": json.dumps(
+                    OCRDocument(tables=record.ocr.tables).to_dict()["tables"], ensure_ascii=False
+                ),
+            },
+            texts.strings,
+            texts.confidences.tolist(),
+            texts.polygons,
+        )
+
+    def write_dict(self, data: dict) -> None:
+        """Add a record given as ``DatasetRecord.to_dict()`` output (e.g. a JSONL line)."""
+        texts = data["ocr"]["texts"]
+        self._add(
+            {
+                "image_path": data["image_path"],
+                "parent_pdf": data["parent_pdf"],
+                "page_number": data["page_number"],
+                "split_index": data["split_index"],
+                "caption": data["caption"]["text"],
+                "supporting_sentences": data["caption"]["supporting_sentences"],
+                "qa_warnings": data["qa"]["warnings"],
+                "qa_blocking_issues": data["qa"]["blocking_issues"],
+                "qa_is_acceptable": data["qa"]["is_acceptable"],
+                "tables": json.dumps(data["ocr"]["tables"], ensure_ascii=False),
+            },
+            [span["text"] for span in texts],
+            [span["confidence"] for span in texts],
+            _quads([span["bbox"] for span in texts]),
+        )
+
+    def extend_from_jsonl(self, path: Path) -> None:
+        """Add every record of an annotations JSONL file (used when resuming)."""
+        with path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    self.write_dict(json.loads(line))
+
+    def checkpoint(self) -> None:
+        if not self._span_counts:
+            return
+        if self._sink is None:
+            self._sink = _open_sink(self.format, self.path)
+        self._sink.write(
+            self._rows,
+            self._span_counts,
+            self._span_texts,
+            np.asarray(self._span_confidences, dtype=np.float32),
+            _concat_quads(self._span_boxes),
+        )
+        self._reset()
+
+    def close(self) -> None:
+        self.checkpoint()
+        if self._sink is None:
+            # No records: still leave a valid, empty dataset behind.
+            self._sink = _open_sink(self.format, self.path)
+        self._sink.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _add(self, row: dict, texts: List[str], confidences: List[float], boxes: np.ndarray) -> None:
+        for name, value in row.items():
+            self._rows[name].append(value)
+        self._span_texts.extend(texts)
+        self._span_confidences.extend(confidences)
+        self._span_boxes.append(boxes)
+        self._span_counts.append(len(texts))
+        self.count += 1
+        if len(self._span_counts) >= self.chunk_records:
+            self.checkpoint()
+
+    def _reset(self) -> None:
+        self._rows = {name: [] for name in (*_STRING_COLUMNS, *_LIST_COLUMNS, *_SCALAR_COLUMNS)}
+        self._span_texts = []
+        self._span_confidences = []
+        self._span_boxes = []
+        self._span_counts = []
+
+
+def export_columnar(jsonl_path: Path, output_path: Path, fmt: str = "auto") -> int:
+    """Convert an annotations JSONL file into a columnar dataset; return the row count."""
+    with ColumnarWriter(output_path, fmt) as writer:
+        writer.extend_from_jsonl(jsonl_path)
+    return writer.count
+
+
+def _quads(polygons: list) -> np.ndarray:
+    """Pack polygons into an ``(N, 4, 2)`` float32 array (first four points of each)."""
+    if not polygons:
+        return np.empty((0, 4, 2), dtype=np.float32)
+    try:
+        return np.asarray(polygons, dtype=np.float32)[:, :4, :2]
+    except ValueError:  # ragged polygons
+        return np.asarray([np.asarray(points, dtype=np.float32)[:4, :2] for points in polygons])
+
+
+def _concat_quads(chunks: List[np.ndarray]) -> np.ndarray:
+    return np.concatenate(chunks) if chunks else np.empty((0, 4, 2), dtype=np.float32)
+
+
+def _open_sink(fmt: str, path: Path):
+    if fmt == "npy":
+        return _NpySink(path)
+    return _ArrowSink(path, parquet=fmt == "parquet")
+
+
+class _ArrowSink:
+    def __init__(self, path: Path, parquet: bool) -> None:
+        pa = _pyarrow()
+        self.path = path
+        self.parquet = parquet
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.schema = pa.schema(
+            [
+                ("image_path", pa.string()),
+                ("parent_pdf", pa.string()),
+                ("page_number", pa.int32()),
+                ("split_index", pa.int32()),
+                ("caption", pa.string()),
+                ("supporting_sentences", pa.list_(pa.string())),
+                ("qa_warnings", pa.list_(pa.string())),
+                ("qa_blocking_issues", pa.list_(pa.string())),
+                ("qa_is_acceptable", pa.bool_()),
+                ("tables", pa.string()),
+                ("span_text", pa.list_(pa.string())),
+                ("span_confidence", pa.list_(pa.float32())),
+                ("span_bbox", pa.list_(pa.list_(pa.float32(), 8))),
+            ]
+        )
+        if parquet:
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(self.tmp_path, self.schema)
+
+    def write(self, rows, span_counts, texts, confidences, boxes) -> None:
+        pa = _pyarrow()
+        offsets = pa.array(np.concatenate(([0], np.cumsum(span_counts))).astype(np.int32))
+        flat_boxes = pa.FixedSizeListArray.from_arrays(pa.array(boxes.reshape(-1)), 8)
+        columns = [
+            pa.array(rows["image_path"], pa.string()),
+            pa.array(rows["parent_pdf"], pa.string()),
+            pa.array(rows["page_number"], pa.int32()),
+            pa.array(rows["split_index"], pa.int32()),
+            pa.array(rows["caption"], pa.string()),
+            pa.array(rows["supporting_sentences"], pa.list_(pa.string())),
+            pa.array(rows["qa_warnings"], pa.list_(pa.string())),
+            pa.array(rows["qa_blocking_issues"], pa.list_(pa.string())),
+            pa.array(rows["qa_is_acceptable"], pa.bool_()),
+            pa.array(rows["tables"], pa.string()),
+            pa.ListArray.from_arrays(offsets, pa.array(texts, pa.string())),
+            pa.ListArray.from_arrays(offsets, pa.array(confidences)),
+            pa.ListArray.from_arrays(offsets, flat_boxes),
+        ]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class _NpySink:
+    """Appends each column to a raw file; ``schema.json`` is written on close."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        for stale in directory.iterdir():
+            stale.unlink()
+        self.rows = 0
+        self.spans = 0
+        self.string_sizes: Dict[str, int] = {}
+        self.handles = {}
+        self._open_strings("span_text")
+        for name in (*_STRING_COLUMNS, *_LIST_COLUMNS):
+            self._open_strings(name)
+        self._raw("span_offsets").write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def write(self, rows, span_counts, texts, confidences, boxes) -> None:
+        for name in _STRING_COLUMNS:
+            self._append_strings(name, rows[name])
+        for name in _LIST_COLUMNS:
+            # Short lists per row; stored as JSON strings to keep the layout flat.
+            self._append_strings(name, [json.dumps(value, ensure_ascii=False) for value in rows[name]])
+        for name, dtype in _SCALAR_COLUMNS.items():
+            self._raw(name).write(np.asarray(rows[name], dtype=dtype).tobytes())
+        ends = self.spans + np.cumsum(span_counts, dtype=np.int64)
+        self._raw("span_offsets").write(ends.tobytes())
+        self._append_strings("span_text", texts)
+        self._raw("span_confidence").write(confidences.astype(np.float32).tobytes())
+        self._raw("span_bbox").write(boxes.astype(np.float32).tobytes())
+        self.rows += len(span_counts)
+        self.spans += len(texts)
+
+    def close(self) -> None:
+        for handle in self.handles.values():
+            handle.close()
+        columns = {name: {"kind": "string"} for name in ("span_text", *_STRING_COLUMNS, *_LIST_COLUMNS)}
+        for name, dtype in _SCALAR_COLUMNS.items():
+            columns[name] = {"kind": "array", "dtype": np.dtype(dtype).str, "shape": [self.rows]}
+        columns["span_offsets"] = {"kind": "array", "dtype": "<i8", "shape": [self.rows + 1]}
+        columns["span_confidence"] = {"kind": "array", "dtype": "<f4", "shape": [self.spans]}
+        columns["span_bbox"] = {"kind": "array", "dtype": "<f4", "shape": [self.spans, 4, 2]}
+        schema = {"version": SCHEMA_VERSION, "rows": self.rows, "spans": self.spans, "columns": columns}
+        (self.directory / "schema.json").write_text(json.dumps(schema, indent=2), encoding="utf-8")
+
+    def _raw(self, name: str):
+        handle = self.handles.get(name)
+        if handle is None:
+            handle = self.handles[name] = (self.directory / f"{name}.bin").open("wb")
+        return handle
+
+    def _open_strings(self, name: str) -> None:
+        self.string_sizes[name] = 0
+        self._raw(f"{name}.offsets").write(np.zeros(1, dtype=np.int64).tobytes())
+        self._raw(f"{name}.data")
+
+    def _append_strings(self, name: str, values: List[str]) -> None:
+        encoded = [value.encode("utf-8") for value in values]
+        sizes = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+        ends = self.string_sizes[name] + np.cumsum(sizes)
+        self._raw(f"{name}.offsets").write(ends.tobytes())
+        self._raw(f"{name}.data").write(b"".join(encoded))
+        if len(ends):
+            self.string_sizes[name] = int(ends[-1])
+
+
+class StringColumn:
+    """Read-only sequence of strings backed by memory-mapped offsets and UTF-8 data."""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray) -> None:
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return bytes(self.data[start:end]).decode("utf-8")
+
+
+def load_columns(directory: Path) -> Dict[str, object]:
+    """Memory-map an ``npy`` columnar dataset written by :class:`ColumnarWriter`.
+
+    Array columns come back as read-only ``np.memmap`` objects and string
+    columns as :class:`StringColumn`; list columns are JSON strings per row.
+    """
+    schema = json.loads((directory / "schema.json").read_text(encoding="utf-8"))
+    columns: Dict[str, object] = {}
+    for name, spec in schema["columns"].items():
+        if spec["kind"] == "string":
+            columns[name] = StringColumn(
+                _map(directory / f"{name}.offsets.bin", "<i8", None),
+                _map(directory / f"{name}.data.bin", "u1", None),
+            )
+        else:
+            columns[name] = _map(directory / f"{name}.bin", spec["dtype"], tuple(spec["shape"]))
+    return columns
+
+
+def _map(path: Path, dtype: str, shape: tuple | None) -> np.ndarray:
+    if path.stat().st_size == 0:
+        return np.empty(shape or (0,), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 
@@ -12,28 +12,65 @@ class PipelineConfig:
     pdf_glob_pattern: str = "*.pdf"
     image_output_dir: Path = Path("../dataset/image")
     annotation_output_path: Path = Path("../dataset/annotations.jsonl")
+    ocr_cache_dir: Path = Path("../dataset/.ocr_cache")
     dpi: int = 200
+    rasterizer: str = "pdf2image"
     min_ocr_confidence: float = 0.5
     split_height_ratio: float = 1.6
     split_overlap: int = 32
+    split_mode: str = "uniform"
+    split_gutter_max_ink: int = 0
+    split_merge: str | None = None
+    autocrop_threshold: int = 245
+    autocrop_margin: int = 5
+    autocrop_stride: int = 8
+    preprocess_cache: bool = True
     overwrite_images: bool = False
     max_pdfs: int | None = None
     max_pages_per_pdf: int | None = None
     num_workers: int = 1
+    preprocess_workers: int = 1
+    annotate_workers: int = 1
+    stage_queue_size: int = 4
+    ocr_pool: str = "thread"
+    ocr_mode: str = "separate"
+    ocr_batch_size: int = 1
+    ocr_rec_batch_size: int = 32
+    ocr_detect_dpi: int | None = None
+    # Detection/recognition models for the batched path; None uses STAGE_MODELS.
+    ocr_det_model: str | None = None
+    ocr_rec_model: str | None = None
+    ocr_cache: bool = True
+    ocr_cache_max_bytes: int = 2 * 1024**3
+    refresh_ocr: bool = False
+    resume: bool = False
+    annotation_checkpoint_every: int = 100
+    conversion_window: int = 1
+    conversion_workers: int = 1
+    conversion_chunk_pages: int = 64
+    poppler_threads: int = 1
+    image_writer_threads: int = 2
+    image_format: str = "png"
+    png_compress_level: int = 6
+    png_optimize: bool = False
+    metrics_output_path: Path | None = Path("../dataset/metrics.json")
+    progress: bool = False
+    progress_interval: float = 5.0
+    columnar_format: str | None = None
+    shard_index: int = 0
+    shard_count: int = 1
 
     def resolve(self, anchor: Path) -> "PipelineConfig":
         """Return a new config with paths resolved against *anchor*."""
-        return PipelineConfig(
+        return replace(
+            self,
             raw_pdf_dir=(anchor / self.raw_pdf_dir).resolve(),
-            pdf_glob_pattern=self.pdf_glob_pattern,
             image_output_dir=(anchor / self.image_output_dir).resolve(),
             annotation_output_path=(anchor / self.annotation_output_path).resolve(),
-            dpi=self.dpi,
-            min_ocr_confidence=self.min_ocr_confidence,
-            split_height_ratio=self.split_height_ratio,
-            split_overlap=self.split_overlap,
-            overwrite_images=self.overwrite_images,
-            max_pdfs=self.max_pdfs,
-            max_pages_per_pdf=self.max_pages_per_pdf,
-            num_workers=self.num_workers,
+            ocr_cache_dir=(anchor / self.ocr_cache_dir).resolve(),
+            metrics_output_path=(
+                (anchor / self.metrics_output_path).resolve()
+                if self.metrics_output_path is not None
+                else None
+            ),
         )
@@ -1,13 +1,110 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Callable, Container, Iterator, List, Tuple
 
-from pdf2image import convert_from_path
+from PIL import Image
 
+from .rasterizers import Pdf2ImageRasterizer, Rasterizer
+from .storage import ImageCodec
 
-# TODO: Evaluate replacing pdf2image/poppler with (a) PyMuPDF for a pure-Python path, or
-# (b) direct poppler-utils CLI for faster, dependency-light batch conversion.
+
+SaveFn = Callable[[Image.Image, Path], None]
+
+
+def iter_pdf_pages(
+    pdf_path: Path,
+    output_dir: Path,
+    base_name: str | None = None,
+    *,
+    dpi: int = 300,
+    overwrite: bool = False,
+    max_pages: int | None = None,
+    window: int = 1,
+    first_page: int = 1,
+    last_page: int | None = None,
+    rasterizer: Rasterizer | None = None,
+    codec: ImageCodec | None = None,
+    save: SaveFn | None = None,
+    write: bool = True,
+    cached: Container[Path] = frozenset(),
+) -> Iterator[Tuple[Path, Image.Image | None]]:
+    """Render *pdf_path* page by page, yielding ``(path, image)`` for every page.
+
+    Only *window* decoded pages are held in memory at a time, so peak memory does
+    not grow with the length of the document. Unless *overwrite* is set, pages whose
+    image already exists are yielded as ``(path, None)`` without being rasterized
+    again. *codec* names and encodes the page files (PNG by default). Rendered
+    pages are written before being yielded, through *save* if given (e.g. a
+    background :class:`~pipeline.storage.ImageWriter`); pass ``write=False``
+    when a later stage writes the final image itself. Paths in *cached* count as
+    present even when missing on disk (their derived images already exist).
+    *first_page* and *last_page* (1-based, inclusive) restrict the work to part
+    of the document.
+    """
+
+    rasterizer = rasterizer or Pdf2ImageRasterizer()
+    codec = codec or ImageCodec()
+    save = (save or codec) if write else None
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = base_name or pdf_path.stem
+    page_count = rasterizer.page_count(pdf_path)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+    if last_page is not None:
+        page_count = min(page_count, last_page)
+    first_page = max(1, first_page)
+    paths = {
+        page: page_image_path(output_dir, stem, page, codec.suffix)
+        for page in range(first_page, page_count + 1)
+    }
+    missing = [
+        page
+        for page, path in paths.items()
+        if overwrite or not (path in cached or path.exists())
+    ]
+
+    next_page = first_page
+    for range_first, range_last in _page_ranges(missing, max(1, window)):
+        # Pages before this range are already on disk; hand them out untouched.
+        for page in range(next_page, range_first):
+            yield paths[page], None
+        images = rasterizer.render(pdf_path, range_first, range_last, dpi=dpi)
+        for page, image in enumerate(images, start=range_first):
+            if save is not None:
+                save(image, paths[page])
+            yield paths[page], image
+            del image
+        next_page = range_last + 1
+    for page in range(next_page, page_count + 1):
+        yield paths[page], None
+
+
+def iter_pdf_images(
+    pdf_path: Path,
+    output_dir: Path,
+    base_name: str | None = None,
+    **options,
+) -> Iterator[Path]:
+    """Like :func:`iter_pdf_pages` but only yield the image paths once written."""
+
+    for path, _ in iter_pdf_pages(pdf_path, output_dir, base_name, **options):
+        yield path
+
+
+def render_pdf_pages(
+    pdf_path: Path,
+    output_dir: Path,
+    base_name: str | None = None,
+    **options,
+) -> List[Tuple[Path, Image.Image | None]]:
+    """Like :func:`iter_pdf_pages` with ``write=False``, collected into a list.
+
+    Meant for process pool workers: decoded pages pickle as their raw pixel
+    buffer, so the parent receives them without a PNG encode and decode.
+    """
+
+    return list(iter_pdf_pages(pdf_path, output_dir, base_name, write=False, **options))
 
 
 def convert_pdf_to_images(
@@ -18,22 +115,57 @@ def convert_pdf_to_images(
     dpi: int = 300,
     overwrite: bool = False,
     max_pages: int | None = None,
+    window: int = 1,
+    first_page: int = 1,
+    last_page: int | None = None,
+    rasterizer: Rasterizer | None = None,
+    codec: ImageCodec | None = None,
+    cached: Container[Path] = frozenset(),
 ) -> List[Path]:
-    """Convert *pdf_path* to PNG images and return their paths."""
+    """Convert *pdf_path* to page images (PNG unless *codec* says otherwise)."""
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    last_page = max_pages if max_pages is not None else None
-    images = convert_from_path(pdf_path, dpi=dpi, last_page=last_page)
-    saved_paths: List[Path] = []
-
-    for index, image in enumerate(images, start=1):
-        stem = base_name or pdf_path.stem
-        filename = f"{stem}_page_{index:03d}.png"
-        image_path = output_dir / filename
-        if image_path.exists() and not overwrite:
-            saved_paths.append(image_path)
-            continue
-        image.save(image_path, "PNG")
-        saved_paths.append(image_path)
+    return list(
+        iter_pdf_images(
+            pdf_path,
+            output_dir,
+            base_name,
+            dpi=dpi,
+            overwrite=overwrite,
+            max_pages=max_pages,
+            window=window,
+            first_page=first_page,
+            last_page=last_page,
+            rasterizer=rasterizer,
+            codec=codec,
+            cached=cached,
+        )
+    )
 
-    return saved_paths
+
+def pdf_page_count(pdf_path: Path, rasterizer: Rasterizer | None = None) -> int:
+    """Return the number of pages in *pdf_path* from its metadata."""
+
+    return (rasterizer or Pdf2ImageRasterizer()).page_count(pdf_path)
+
+
+def page_image_path(
+    output_dir: Path, stem: str, page_number: int, suffix: str = ".png"
+) -> Path:
+    """Return the image path used for page *page_number* of the document *stem*."""
+
+    return output_dir / f"{stem}_page_{page_number:03d}{suffix}"
+
+
+def _page_ranges(pages: List[int], window: int) -> Iterator[Tuple[int, int]]:
+    """Group sorted *pages* into contiguous ``(first, last)`` runs of at most *window*."""
+
+    start = previous = None
+    for page in pages:
+        if start is not None and page == previous + 1 and page - start < window:
+            previous = page
+            continue
+        if start is not None:
+            yield start, previous
+        start = previous = page
+    if start is not None:
+        yield start, previous
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Sequence, Set, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+class PreprocessManifest:
+    """On-disk record of preprocessing results for the pages in one image directory.
+
+    Entries are keyed by the rendered page file name and store the hash of the
+    page pixels that were preprocessed, the preprocessing parameters and the
+    derived images (with their size and mtime, captured when the manifest is
+    saved) so unchanged pages can be skipped on the next run. A cached entry
+    is only reused while those images are untouched and, when the page pixels
+    are at hand, while their hash still matches.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: Dict[str, dict] = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def lookup(self, source: Path, params: dict, source_hash: str | None = None) -> dict | None:
+        """Return the entry for *source* if it was produced with *params*.
+
+        With *source_hash* the entry must also have been produced from those
+        page pixels; a file name alone does not identify what was rendered.
+        """
+        with self._lock:
+            entry = self._entries.get(source.name)
+        if entry is None or entry["params"] != params:
+            return None
+        if source_hash is not None and entry["source_hash"] != source_hash:
+            return None
+        return entry
+
+    def record(
+        self,
+        source: Path,
+        source_hash: str,
+        params: dict,
+        outputs: Sequence[Tuple[Path, int, int]],
+    ) -> None:
+        entry = {
+            "source_hash": source_hash,
+            "params": params,
+            "outputs": [
+                {"name": path.name, "split_index": split_index, "offset": offset}
+                for path, split_index, offset in outputs
+            ],
+        }
+        with self._lock:
+            self._entries[source.name] = entry
+            self._dirty.add(source.name)
+
+    def outputs_unchanged(self, entry: dict) -> bool:
+        """Whether every derived image is still exactly as it was when recorded."""
+        for out in entry["outputs"]:
+            try:
+                stat = (self.path.parent / out["name"]).stat()
+            except OSError:
+                return False
+            if out.get("size") != stat.st_size or out.get("mtime_ns") != stat.st_mtime_ns:
+                return False
+        return True
+
+    def cached_sources(self, params: dict) -> Set[Path]:
+        """Return page paths whose derived images are up to date for *params*."""
+        with self._lock:
+            items = list(self._entries.items())
+        return {
+            self.path.parent / name
+            for name, entry in items
+            if entry["params"] == params and self.outputs_unchanged(entry)
+        }
+
+    def save(self) -> None:
+        """Persist the manifest; call once the recorded images are on disk."""
+        with self._lock:
+            for name in self._dirty:
+                entry = self._entries[name]
+                outputs: List[dict] = []
+                for out in entry["outputs"]:
+                    try:
+                        stat = (self.path.parent / out["name"]).stat()
+                    except OSError:
+                        break
+                    outputs.append(
+                        {**out, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                    )
+                else:
+                    entry["outputs"] = outputs
+                    continue
+                # A derived image failed to write; forget the page so it is redone.
+                del self._entries[name]
+            self._dirty.clear()
+            payload = {"version": MANIFEST_VERSION, "pages": self._entries}
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable manifest %s: %s", self.path, exc)
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self._entries = data.get("pages", {})
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+try:  # Unix only; peak RSS is reported as null elsewhere.
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+# Upper bucket bounds in seconds; the last bucket collects everything slower.
+HISTOGRAM_BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 30, 60)
+
+MetricsHook = Callable[[dict], None]
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, value: float) -> None:
+        index = 0
+        while index < len(HISTOGRAM_BOUNDS) and value > HISTOGRAM_BOUNDS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> dict:
+        count = sum(self.counts)
+        labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS] + ["+inf"]
+        return {
+            "count": count,
+            "total": round(self.total, 6),
+            "mean": round(self.total / count, 6) if count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class _StageStats:
+    def __init__(self) -> None:
+        self.items = 0
+        self.wall = Histogram()
+        self.cpu = Histogram()
+
+    def to_dict(self) -> dict:
+        return {"items": self.items, "wall": self.wall.to_dict(), "cpu": self.cpu.to_dict()}
+
+
+class _QueueStats:
+    def __init__(self) -> None:
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+        self.current = 0
+
+    def to_dict(self) -> dict:
+        mean = self.total / self.samples if self.samples else 0.0
+        return {
+            "samples": self.samples,
+            "current": self.current,
+            "mean": round(mean, 3),
+            "max": self.max,
+        }
+
+
+class PipelineMetrics:
+    """Thread-safe timings, throughput, queue depths and peak RSS of a run.
+
+    Stages report through :meth:`time`; :meth:`snapshot` returns everything as
+    a JSON-ready dict. Hooks added with :meth:`add_hook` receive a snapshot
+    every *interval* seconds while a run is active and once when it ends,
+    which is how the live progress line and external collectors are fed.
+    """
+
+    def __init__(self, interval: float = 5.0) -> None:
+        self.interval = interval
+        self.hooks: List[MetricsHook] = []
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageStats] = {}
+        self._queues: Dict[str, _QueueStats] = {}
+        self._counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._stop = threading.Event()
+        self._reporter: threading.Thread | None = None
+
+    def add_hook(self, hook: MetricsHook) -> None:
+        self.hooks.append(hook)
+
+    @contextmanager
+    def time(self, stage: str, items: int = 1) -> Iterator[None]:
+        """Record wall and CPU time of the enclosed block under *stage*.
+
+        CPU time is that of the calling thread, so work done in OCR worker
+        processes shows up as wall time only.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.record(
+                stage,
+                time.perf_counter() - wall_start,
+                time.thread_time() - cpu_start,
+                items,
+            )
+
+    def record(self, stage: str, wall: float, cpu: float, items: int = 1) -> None:
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.items += items
+            stats.wall.add(wall)
+            stats.cpu.add(cpu)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def sample_queues(self, depths: Dict[str, int]) -> None:
+        with self._lock:
+            for name, depth in depths.items():
+                stats = self._queues.get(name)
+                if stats is None:
+                    stats = self._queues[name] = _QueueStats()
+                stats.samples += 1
+                stats.total += depth
+                stats.max = max(stats.max, depth)
+                stats.current = depth
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            pages = self._counters.get("pages", 0)
+            return {
+                "elapsed_seconds": round(elapsed, 3),
+                "pages_per_second": round(pages / elapsed, 3) if elapsed > 0 else 0.0,
+                "counters": dict(self._counters),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "stages": {name: stats.to_dict() for name, stats in self._stages.items()},
+                "queues": {name: stats.to_dict() for name, stats in self._queues.items()},
+            }
+
+    def start(self) -> None:
+        """Reset the clock and start reporting to hooks in the background."""
+        self._started = time.perf_counter()
+        if not self.hooks or self._reporter is not None:
+            return
+        self._stop.clear()
+        self._reporter = threading.Thread(
+            target=self._report_loop, name="metrics-reporter", daemon=True
+        )
+        self._reporter.start()
+
+    def stop(self) -> dict:
+        """Stop background reporting and send the final snapshot to every hook."""
+        if self._reporter is not None:
+            self._stop.set()
+            self._reporter.join()
+            self._reporter = None
+        snapshot = self.snapshot()
+        self._emit(snapshot)
+        return snapshot
+
+    def write(self, path: Path, snapshot: dict | None = None) -> None:
+        """Write *snapshot* (default: a fresh one) to *path* as JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        data = snapshot if snapshot is not None else self.snapshot()
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _report_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._emit(self.snapshot())
+
+    def _emit(self, snapshot: dict) -> None:
+        for hook in self.hooks:
+            hook(snapshot)
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process plus its largest child, if known."""
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB everywhere else.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (own + children) * scale
+
+
+def progress_line(snapshot: dict) -> str:
+    counters = snapshot["counters"]
+    queues = " ".join(
+        f"{name}={stats['current']}" for name, stats in snapshot["queues"].items()
+    )
+    rss = snapshot["peak_rss_bytes"]
+    parts = [
+        f"{counters.get('pages', 0)} pages",
+        f"{counters.get('records', 0)} records",
+        f"{snapshot['pages_per_second']:.2f} pages/s",
+    ]
+    if queues:
+        parts.append(f"queued {queues}")
+    if rss is not None:
+        parts.append(f"peak RSS {rss / 1024**2:.0f} MB")
+    return " | ".join(parts)
+
+
+class ProgressPrinter:
+    """Metrics hook that keeps a one-line progress summary on a stream."""
+
+    def __init__(self, stream=None) -> None:
+        self.stream = stream or sys.stderr
+
+    def __call__(self, snapshot: dict) -> None:
+        end = "\r" if self.stream.isatty() else "\n"
+        self.stream.write(progress_line(snapshot) + end)
+        self.stream.flush()
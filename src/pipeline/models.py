@@ -2,7 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Sequence
+from typing import Iterable, List, Sequence, overload
+
+import numpy as np
+from PIL import Image
+
+from .storage import load_image
 
 
 @dataclass(slots=True)
@@ -33,11 +38,157 @@ class TextSpan:
     bbox: BoundingBox
 
 
+def as_polygon(points) -> np.ndarray | None:
+    """Return *points* as a ``(4, 2)`` float64 array, or None if it is not a polygon.
+
+    Extra points beyond the first four and extra coordinates are dropped.
+    """
+    try:
+        polygon = np.asarray(points, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    if polygon.ndim != 2 or polygon.shape[0] < 4 or polygon.shape[1] < 2:
+        return None
+    return polygon[:4, :2]
+
+
+class TextSpans(Sequence[TextSpan]):
+    """Text spans of a page stored column-wise.
+
+    Polygons live in one ``(N, 4, 2)`` array and confidences in another, so
+    geometry is computed for all spans at once (see :attr:`centers`,
+    :attr:`tops`, :attr:`bottoms`). Both are float64: coordinates serialize
+    back exactly as they were added. Indexing and iteration still yield
+    :class:`TextSpan` objects for existing callers, and :meth:`append`
+    accepts them.
+    """
+
+    __slots__ = ("strings", "_polygons", "_confidences", "_pending")
+
+    def __init__(self, spans: Iterable[TextSpan] = ()) -> None:
+        self.strings: List[str] = []
+        self._polygons = np.empty((0, 4, 2), dtype=np.float64)
+        self._confidences = np.empty(0, dtype=np.float64)
+        # Added spans are batched here and concatenated on the next array access.
+        self._pending: List[tuple[np.ndarray, float]] = []
+        self.extend(spans)
+
+    @classmethod
+    def from_arrays(
+        cls, strings: Sequence[str], polygons: np.ndarray, confidences: Sequence[float]
+    ) -> "TextSpans":
+        spans = cls()
+        spans.strings = list(strings)
+        spans._polygons = np.asarray(polygons, dtype=np.float64).reshape(-1, 4, 2)
+        spans._confidences = np.asarray(confidences, dtype=np.float64)
+        return spans
+
+    def add(self, text: str, polygon: np.ndarray, confidence: float) -> None:
+        """Append one span; *polygon* must already be a ``(4, 2)`` array."""
+        self.strings.append(text)
+        self._pending.append((polygon, confidence))
+
+    def append(self, span: TextSpan) -> None:
+        polygon = as_polygon(span.bbox.points)
+        if polygon is None:
+            raise ValueError(f"Span bbox is not a 4-point polygon: {span.bbox.points!r}")
+        self.add(span.text, polygon, span.confidence)
+
+    def extend(self, spans: Iterable[TextSpan]) -> None:
+        for span in spans:
+            self.append(span)
+
+    @property
+    def polygons(self) -> np.ndarray:
+        self._flush()
+        return self._polygons
+
+    @property
+    def confidences(self) -> np.ndarray:
+        self._flush()
+        return self._confidences
+
+    @property
+    def centers(self) -> np.ndarray:
+        """``(N, 2)`` polygon centers."""
+        return self.polygons.sum(axis=1) / 4.0
+
+    @property
+    def tops(self) -> np.ndarray:
+        return self.polygons[:, :, 1].min(axis=1)
+
+    @property
+    def bottoms(self) -> np.ndarray:
+        return self.polygons[:, :, 1].max(axis=1)
+
+    def to_list(self) -> List[dict]:
+        return [
+            {"text": text, "confidence": confidence, "bbox": bbox}
+            for text, confidence, bbox in zip(
+                self.strings, self.confidences.tolist(), self.polygons.tolist()
+            )
+        ]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    @overload
+    def __getitem__(self, index: int) -> TextSpan: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[TextSpan]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        polygons, confidences = self.polygons, self.confidences
+        return TextSpan(
+            text=self.strings[index],
+            confidence=float(confidences[index]),
+            bbox=BoundingBox(points=polygons[index].tolist()),
+        )
+
+    def __iter__(self):
+        # Plain lists keep the per-span BoundingBox accessors in pure Python.
+        polygons, confidences = self.polygons.tolist(), self.confidences.tolist()
+        for index, text in enumerate(self.strings):
+            yield TextSpan(
+                text=text, confidence=confidences[index], bbox=BoundingBox(points=polygons[index])
+            )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TextSpans):
+            return (
+                self.strings == other.strings
+                and np.array_equal(self.polygons, other.polygons)
+                and np.array_equal(self.confidences, other.confidences)
+            )
+        if isinstance(other, list):
+            return self == TextSpans(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"TextSpans({list(self)!r})"
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        polygons = np.stack([polygon for polygon, _ in self._pending])
+        confidences = np.fromiter(
+            (confidence for _, confidence in self._pending), dtype=np.float64, count=len(self._pending)
+        )
+        self._polygons = np.concatenate((self._polygons, polygons))
+        self._confidences = np.concatenate((self._confidences, confidences))
+        self._pending = []
+
+
 @dataclass(slots=True)
 class TableCell:
     row: int
     col: int
     text: str
+    row_span: int = 1
+    col_span: int = 1
 
 
 @dataclass(slots=True)
@@ -50,11 +201,67 @@ class TableContent:
 
 @dataclass(slots=True)
 class OCRDocument:
-    texts: List[TextSpan] = field(default_factory=list)
+    texts: TextSpans = field(default_factory=TextSpans)
     tables: List[TableContent] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.texts, TextSpans):
+            self.texts = TextSpans(self.texts)
+
     def all_text(self) -> str:
-        return "\n".join(span.text for span in self.texts)
+        return "\n".join(self.texts.strings)
+
+    def to_dict(self) -> dict:
+        return {
+            "texts": self.texts.to_list(),
+            "tables": [
+                {
+                    "rows": table.rows,
+                    "cols": table.cols,
+                    "cells": [
+                        {
+                            "row": cell.row,
+                            "col": cell.col,
+                            "text": cell.text,
+                            "row_span": cell.row_span,
+                            "col_span": cell.col_span,
+                        }
+                        for cell in table.cells
+                    ],
+                    "bbox": table.bbox.points if table.bbox else None,
+                }
+                for table in self.tables
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OCRDocument":
+        spans = data.get("texts", [])
+        return cls(
+            texts=TextSpans.from_arrays(
+                [span["text"] for span in spans],
+                np.asarray([span["bbox"] for span in spans], dtype=np.float64),
+                [span["confidence"] for span in spans],
+            ),
+            tables=[
+                TableContent(
+                    rows=table["rows"],
+                    cols=table["cols"],
+                    cells=[
+                        TableCell(
+                            row=cell["row"],
+                            col=cell["col"],
+                            text=cell["text"],
+                            row_span=cell.get("row_span", 1),
+                            col_span=cell.get("col_span", 1),
+                        )
+                        for cell in table["cells"]
+                    ],
+                    bbox=BoundingBox(points=table["bbox"]) if table["bbox"] else None,
+                )
+                for table in data.get("tables", [])
+            ],
+        )
 
 
 @dataclass(slots=True)
@@ -78,6 +285,17 @@ class ImageArtifact:
     parent_pdf: Path
     page_number: int
     split_index: int = 0
+    # Top row of a split piece within its (cropped) page.
+    split_offset: int = 0
+    # Number of pieces the page was split into (0 for an unsplit page).
+    split_count: int = 0
+    image: Image.Image | None = field(default=None, repr=False, compare=False)
+
+    def load_image(self) -> Image.Image:
+        """Return the decoded RGB page, reading it from disk if not held in memory."""
+        if self.image is not None:
+            return self.image
+        return load_image(self.image_path)
 
 
 @dataclass(slots=True)
@@ -93,32 +311,8 @@ class DatasetRecord:
             "parent_pdf": str(self.artifact.parent_pdf),
             "page_number": self.artifact.page_number,
             "split_index": self.artifact.split_index,
-            "ocr": {
-                "texts": [
-                    {
-                        "text": span.text,
-                        "confidence": span.confidence,
-                        "bbox": span.bbox.points,
-                    }
-                    for span in self.ocr.texts
-                ],
-                "tables": [
-                    {
-                        "rows": table.rows,
-                        "cols": table.cols,
-                        "cells": [
-                            {
-                                "row": cell.row,
-                                "col": cell.col,
-                                "text": cell.text,
-                            }
-                            for cell in table.cells
-                        ],
-                        "bbox": table.bbox.points if table.bbox else None,
-                    }
-                    for table in self.ocr.tables
-                ],
-            },
+            "split_count": self.artifact.split_count,
+            "ocr": self.ocr.to_dict(),
             "caption": {
                 "text": self.caption.caption,
                 "supporting_sentences": self.caption.supporting_sentences,
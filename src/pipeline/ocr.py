@@ -1,43 +1,286 @@
 from __future__ import annotations
 
 import logging
+import threading
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List
+from typing import List, Sequence, Tuple
 
-from paddleocr import PaddleOCR
-
-try:
-    from paddleocr import PPStructure
-except ImportError:  # pragma: no cover - optional dependency
-    PPStructure = None  # type: ignore
-
-try:
-    from bs4 import BeautifulSoup
-except ImportError:  # pragma: no cover - optional dependency
-    BeautifulSoup = None  # type: ignore
+import numpy as np
+from PIL import Image
 
 from .config import PipelineConfig
-from .models import BoundingBox, OCRDocument, TableCell, TableContent, TextSpan
+from .metrics import PipelineMetrics
+from .ocr_cache import engine_version
+from .models import BoundingBox, OCRDocument, TableContent, TextSpans, as_polygon
+from .storage import load_image
+from .tables import TABLE_PARSER_VERSION, parse_table_html
 
 LOGGER = logging.getLogger(__name__)
 
+# Resize limits of PaddleOCR's default text detection configuration.
+_DET_LIMIT_SIDE_LEN = 64
+_DET_LIMIT_TYPE = "min"
+
+# Text line orientation model of PaddleOCR's default OCR pipeline configuration.
+_TEXTLINE_ORIENTATION_MODEL = "PP-LCNet_x1_0_textline_ori"
+
+# (detection, recognition) models ``PaddleOCR(lang=...)`` 3.3 loads for the
+# languages this pipeline is run with (PP-OCRv5). Vietnamese uses the Latin
+# recognizer; English has its own; the Chinese/Japanese scripts share the
+# server recognizer. Other languages need ocr_det_model/ocr_rec_model.
+STAGE_MODELS = {
+    "vi": ("PP-OCRv5_server_det", "latin_PP-OCRv5_mobile_rec"),
+    "en": ("PP-OCRv5_server_det", "en_PP-OCRv5_mobile_rec"),
+    "ch": ("PP-OCRv5_server_det", "PP-OCRv5_server_rec"),
+    "chinese_cht": ("PP-OCRv5_server_det", "PP-OCRv5_server_rec"),
+    "japan": ("PP-OCRv5_server_det", "PP-OCRv5_server_rec"),
+}
+
 
 class OCRService:
     """Runs OCR (and optional table extraction) on images."""
 
     def __init__(self, config: PipelineConfig, language: str = "vi") -> None:
+        if config.ocr_mode == "layout" and not _has_ppstructure():
+            raise ValueError(
+                f"--ocr-mode layout needs PaddleOCR 2.x's PPStructure; paddleocr "
+                f"{engine_version('paddleocr')} only provides PPStructureV3. Use --ocr-mode separate"
+            )
         self.config = config
-        self.ocr_engine = PaddleOCR(use_angle_cls=True, lang=language)
+        self.language = language
+        # Engines (and paddle itself) are loaded on first use, see load_engines().
+        self.ocr_engine = None
         self.table_engine = None
-        if PPStructure is not None:
+        self.layout_engine = None
+        self._loaded = False
+        # Separate detection/recognition modules (PaddleOCR 3.x), loaded only
+        # when pages are batched or detected at a lower resolution.
+        self.det_engine = None
+        self.rec_engine = None
+        self.cls_engine = None
+        self._load_lock = threading.Lock()
+        # Set by the pipeline to time the table pass separately from text OCR.
+        self.metrics: PipelineMetrics | None = None
+
+    def load_engines(self) -> None:
+        """Import paddleocr and build the OCR/table engines, once."""
+        with self._load_lock:
+            if self._loaded:
+                return
+            import paddleocr
+            from paddleocr import PaddleOCR
+
             try:
-                self.table_engine = PPStructure(lang=language, layout=True, table=True)
-            except Exception as exc:  # pragma: no cover - PPStructure is optional
-                LOGGER.warning("PPStructure unavailable: %s", exc)
+                from paddleocr import PPStructure
+            except ImportError:
+                # paddleocr 3.x replaced it with PPStructureV3.
+                PPStructure = None  # type: ignore
+                if self.config.ocr_mode == "layout":
+                    raise RuntimeError("--ocr-mode layout needs PaddleOCR 2.x's PPStructure")
+                LOGGER.warning(
+                    "paddleocr %s has no PPStructure; tables are not extracted",
+                    engine_version("paddleocr"),
+                )
+
+            language = self.language
+            if self.wants_split_stages():
+                self._load_stage_engines(paddleocr)
+            if self.rec_engine is None:
+                self.ocr_engine = PaddleOCR(
+                    use_angle_cls=True,
+                    lang=language,
+                    rec_batch_num=self.config.ocr_rec_batch_size,
+                )
+            if PPStructure is not None:
+                try:
+                    if self.config.ocr_mode == "layout":
+                        # Layout analysis alone is cheap; table recognition then only
+                        # runs on regions classified as tables.
+                        self.layout_engine = PPStructure(
+                            lang=language, layout=True, table=False, ocr=False
+                        )
+                        self.table_engine = PPStructure(
+                            lang=language, layout=False, table=True
+                        )
+                    else:
+                        self.table_engine = PPStructure(
+                            lang=language, layout=True, table=True
+                        )
+                except Exception as exc:
+                    if self.config.ocr_mode == "layout":
+                        raise RuntimeError(f"--ocr-mode layout: PPStructure failed to load: {exc}") from exc
+                    LOGGER.warning("PPStructure unavailable; tables are not extracted: %s", exc)
+            self._loaded = True
+
+    def wants_split_stages(self) -> bool:
+        """Whether the configuration needs separate detection and recognition."""
+        return self.config.ocr_batch_size > 1 or self._detect_scale() < 1.0
+
+    def _load_stage_engines(self, paddleocr) -> None:
+        """Build the PaddleOCR 3.x text detection, orientation and recognition modules.
+
+        They use the models pinned in :data:`STAGE_MODELS` for the language
+        (or the configured overrides), and the detector keeps the pipeline's resize limits: it
+        only enlarges images whose short side is under 64px, so a page
+        downscaled for ``ocr_detect_dpi`` is detected at that resolution.
+        Without the modules every page takes one full-resolution pipeline
+        call, which is logged as a warning.
+        """
+        if not hasattr(paddleocr, "TextRecognition"):
+            self._warn_no_stages(
+                f"paddleocr {engine_version('paddleocr')} has no TextDetection/TextRecognition"
+            )
+            return
+        det_model, rec_model = self.stage_models()
+        if det_model is None or rec_model is None:
+            self._warn_no_stages(
+                f"no detection/recognition models pinned for language {self.language!r} "
+                "(set ocr_det_model and ocr_rec_model)"
+            )
+            return
+        self.det_engine = paddleocr.TextDetection(
+            model_name=det_model,
+            limit_side_len=_DET_LIMIT_SIDE_LEN,
+            limit_type=_DET_LIMIT_TYPE,
+        )
+        self.cls_engine = paddleocr.TextLineOrientationClassification(
+            model_name=_TEXTLINE_ORIENTATION_MODEL
+        )
+        self.rec_engine = paddleocr.TextRecognition(model_name=rec_model)
+
+    def stage_models(self) -> Tuple[str | None, str | None]:
+        """Detection and recognition model names for the separate stages."""
+        det_model, rec_model = STAGE_MODELS.get(self.language, (None, None))
+        return self.config.ocr_det_model or det_model, self.config.ocr_rec_model or rec_model
+
+    def _warn_no_stages(self, reason: str) -> None:
+        ignored = []
+        if self.config.ocr_batch_size > 1:
+            ignored.append(f"ocr_batch_size={self.config.ocr_batch_size}")
+        if self._detect_scale() < 1.0:
+            ignored.append(f"ocr_detect_dpi={self.config.ocr_detect_dpi}")
+        LOGGER.warning(
+            "%s; OCRing pages one at a time at full resolution (%s ignored)",
+            reason,
+            ", ".join(ignored),
+        )
+
+    def cache_settings(self) -> dict:
+        """Settings that change OCR output; part of every OCR cache key.
+
+        Computed without loading the engines; table support is implied by the
+        paddleocr version.
+        """
+        settings = {
+            "language": self.language,
+            "engine": engine_version("paddleocr"),
+            "batched": self.config.ocr_batch_size > 1,
+            "mode": self.config.ocr_mode,
+            "table_parser": TABLE_PARSER_VERSION,
+        }
+        if self._detect_scale() < 1.0:
+            settings["detect_scale"] = self._detect_scale()
+        if self.config.ocr_det_model or self.config.ocr_rec_model:
+            settings["models"] = list(self.stage_models())
+        return settings
+
+    def extract(self, image: Path | Image.Image) -> OCRDocument:
+        """Run OCR on a page given as a path or as an already decoded image."""
+        self.load_engines()
+        if self.rec_engine is not None:
+            return self.extract_batch([image])[0]
+        source = self._engine_input(image)
+        document = OCRDocument(texts=self._parse_ocr_result(self.ocr_engine.ocr(source)))
+        self._extract_tables(document, source, image)
+        return document
+
+    def extract_batch(self, images: Sequence[Path | Image.Image]) -> List[OCRDocument]:
+        """OCR several pages, recognizing their text lines in shared batches.
+
+        Text detection still runs page by page, but the line crops of all pages
+        are recognized together, so the recognizer sees batches of up to
+        ``ocr_rec_batch_size`` lines instead of one page's worth at a time.
+        Without the separate PaddleOCR 3.x modules (see
+        :meth:`_load_stage_engines`) this falls back to :meth:`extract` per
+        page. With ``ocr_detect_dpi`` below ``dpi`` this is also the
+        single-page path, see :meth:`_detect`.
+        """
+        self.load_engines()
+        if self.rec_engine is None:
+            return [self.extract(image) for image in images]
+
+        pages = [self._as_image(image) for image in images]
+        boxes_per_page = [self._detect(page) for page in pages]
+
+        crops: List[np.ndarray] = []
+        owners: List[Tuple[int, list]] = []
+        for index, (page, boxes) in enumerate(zip(pages, boxes_per_page)):
+            for box in boxes:
+                crops.append(_crop_line(page, box))
+                owners.append((index, box))
+        recognized = self._recognize(crops) if crops else []
+
+        documents = [OCRDocument() for _ in pages]
+        for (index, box), text_info in zip(owners, recognized):
+            text, confidence = self._parse_text_info(text_info)
+            polygon = as_polygon(box)
+            if polygon is None or not text:
+                continue
+            documents[index].texts.add(text, polygon, confidence)
+        for document, page, image in zip(documents, pages, images):
+            self._extract_tables(document, self._engine_input(page), image)
+        return documents
+
+    def _detect(self, page: Image.Image) -> List[list]:
+        """Text line boxes of *page*, in its own pixel coordinates.
+
+        With ``ocr_detect_dpi`` set below the render ``dpi`` the detector sees
+        a downscaled copy and the boxes are scaled back up, so recognition
+        still crops the lines from the full-resolution page.
+        """
+        scale = self._detect_scale()
+        size = (max(1, round(page.width * scale)), max(1, round(page.height * scale)))
+        small = page.resize(size, Image.Resampling.BOX) if scale < 1.0 else page
+        result = self.det_engine.predict(self._engine_input(small), batch_size=1)
+        polys = result[0]["dt_polys"] if result else []
+        boxes = [np.asarray(box, dtype=float) for box in polys]
+        if small is not page:
+            factor = (page.width / small.width, page.height / small.height)
+            limit = (page.width, page.height)
+            boxes = [np.clip(box * factor, 0, limit) for box in boxes]
+        return _reading_order([box.tolist() for box in boxes])
+
+    def _detect_scale(self) -> float:
+        detect_dpi = self.config.ocr_detect_dpi
+        if not detect_dpi or detect_dpi >= self.config.dpi:
+            return 1.0
+        return detect_dpi / self.config.dpi
+
+    def _recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """``(text, score)`` of every line crop, recognized in shared batches.
+
+        Like the full pipeline, upside-down lines are turned first and crops
+        are fed in order of aspect ratio so each batch pads little.
+        """
+        batch_size = self.config.ocr_rec_batch_size
+        if self.cls_engine is not None:
+            angles = self.cls_engine.predict(crops, batch_size=batch_size)
+            crops = [
+                np.ascontiguousarray(crop[::-1, ::-1]) if int(angle["class_ids"][0]) == 1 else crop
+                for crop, angle in zip(crops, angles)
+            ]
+        order = sorted(
+            range(len(crops)), key=lambda index: crops[index].shape[1] / crops[index].shape[0]
+        )
+        results = self.rec_engine.predict([crops[index] for index in order], batch_size=batch_size)
+        recognized: List[Tuple[str, float]] = [("", 0.0)] * len(crops)
+        for index, result in zip(order, results):
+            recognized[index] = (result["rec_text"], float(result["rec_score"]))
+        return recognized
 
-    def extract(self, image_path: Path) -> OCRDocument:
-        ocr_result = self.ocr_engine.ocr(str(image_path))
-        document = OCRDocument()
+    def _parse_ocr_result(self, ocr_result) -> TextSpans:
+        texts = TextSpans()
         entries = ocr_result if ocr_result else []
 
         # Handle dict-style outputs (Paddlex doc pipeline)
@@ -49,12 +292,10 @@ class OCRService:
             rec_scores = entry.get("rec_scores", [])
             rec_polys = entry.get("rec_polys", [])
             for text, score, poly in zip(rec_texts, rec_scores, rec_polys):
-                bbox = self._normalize_bbox(poly)
-                if bbox is None or not text:
+                polygon = as_polygon(poly)
+                if polygon is None or not text:
                     continue
-                document.texts.append(
-                    TextSpan(text=text, confidence=float(score), bbox=bbox)
-                )
+                texts.add(text, polygon, float(score))
 
         # Flatten possible nested page lists
         if (
@@ -72,48 +313,79 @@ class OCRService:
             if not line:
                 continue
             bbox_raw, text_info, *rest = line
-            bbox = self._normalize_bbox(bbox_raw)
-            if bbox is None:
+            polygon = as_polygon(bbox_raw)
+            if polygon is None:
                 continue
             text, confidence = self._parse_text_info(text_info)
             if not text:
                 continue
-            document.texts.append(TextSpan(text=text, confidence=confidence, bbox=bbox))
+            texts.add(text, polygon, confidence)
+        return texts
 
-        if self.table_engine is not None:
-            try:
-                tables = self.table_engine(str(image_path))
-                document.tables.extend(self._parse_tables(tables))
-            except Exception as exc:  # pragma: no cover - defensive
-                LOGGER.warning("Table extraction failed for %s: %s", image_path, exc)
+    def _extract_tables(self, document: OCRDocument, source, image) -> None:
+        if self.table_engine is None:
+            return
+        timer = self.metrics.time("ocr.tables") if self.metrics is not None else nullcontext()
+        try:
+            with timer:
+                if self.layout_engine is not None:
+                    tables = self._recognize_table_regions(source, image)
+                else:
+                    tables = self.table_engine(source)
+            document.tables.extend(self._parse_tables(tables))
+        except Exception as exc:  # pragma: no cover - defensive
+            label = image if isinstance(image, Path) else "in-memory page"
+            LOGGER.warning("Table extraction failed for %s: %s", label, exc)
 
-        return document
+    def _recognize_table_regions(self, source, image: Path | Image.Image) -> List[dict]:
+        """Run table recognition only on the layout regions classified as tables.
+
+        Text lines come from the single PaddleOCR pass in :meth:`extract`, so a
+        page without tables costs one OCR pass plus layout detection.
+        """
+        regions = [
+            region
+            for region in self.layout_engine(source)
+            if region.get("type") == "table" and region.get("bbox")
+        ]
+        if not regions:
+            return []
+        page = self._as_image(image)
+        tables: List[dict] = []
+        for region in regions:
+            x1, y1, x2, y2 = (int(round(value)) for value in region["bbox"])
+            crop = page.crop((x1, y1, x2, y2))
+            for table in self.table_engine(self._engine_input(crop)):
+                if table.get("type") != "table":
+                    continue
+                # Results are relative to the crop; report them in page coordinates.
+                tables.append({**table, "bbox": [x1, y1, x2, y2]})
+        return tables
+
+    def _as_image(self, image: Path | Image.Image) -> Image.Image:
+        if isinstance(image, Image.Image):
+            return image.convert("RGB")
+        return load_image(image)
+
+    def _engine_input(self, image: Path | Image.Image):
+        if isinstance(image, Path) and image.suffix == ".npy":
+            # Paddle only reads encoded images from disk; decode raw arrays here.
+            image = load_image(image)
+        if isinstance(image, Image.Image):
+            # Paddle engines expect BGR ndarrays, the same layout cv2.imread returns.
+            return np.ascontiguousarray(np.asarray(image.convert("RGB"))[:, :, ::-1])
+        return str(image)
 
     def _parse_tables(self, tables: List[dict]) -> List[TableContent]:
         parsed: List[TableContent] = []
         for table in tables:
             if table.get("type") != "table":
                 continue
-            bbox = table.get("bbox")
-            bbox_obj = BoundingBox(points=bbox) if bbox else None
-            res = table.get("res", {})
-            html = res.get("html")
-            if not html or BeautifulSoup is None:
+            html = table.get("res", {}).get("html")
+            if not html:
                 continue
-            soup = BeautifulSoup(html, "html.parser")
-            rows = soup.find_all("tr")
-            row_count = len(rows)
-            col_count = 0
-            cells: List[TableCell] = []
-            for r_idx, row in enumerate(rows):
-                columns = row.find_all(["td", "th"])  # type: ignore[arg-type]
-                col_count = max(col_count, len(columns))
-                for c_idx, col in enumerate(columns):
-                    text = col.get_text(" ", strip=True)
-                    cells.append(TableCell(row=r_idx, col=c_idx, text=text))
-            parsed.append(
-                TableContent(rows=row_count, cols=col_count, cells=cells, bbox=bbox_obj)
-            )
+            bbox = table.get("bbox")
+            parsed.append(parse_table_html(html, BoundingBox(points=bbox) if bbox else None))
         return parsed
 
     def _parse_text_info(self, text_info):
@@ -128,27 +400,49 @@ class OCRService:
                 return text_info[0], 0.0
         return str(text_info), 0.0
 
-    def _normalize_bbox(self, bbox_raw) -> BoundingBox | None:
-        # Expect list/tuple/ndarray of 4 points, each point a list/tuple with at least 2 numbers.
-        try:
-            import numpy as np  # local import to avoid hard dependency at import time
-        except ImportError:  # pragma: no cover
-            np = None  # type: ignore
-
-        if np is not None and isinstance(bbox_raw, np.ndarray):
-            bbox_raw = bbox_raw.tolist()
-
-        if not isinstance(bbox_raw, (list, tuple)):
-            return None
-        if len(bbox_raw) < 4:
-            return None
-        points = []
-        for pt in bbox_raw:
-            if not isinstance(pt, (list, tuple)) or len(pt) < 2:
-                return None
-            try:
-                x, y = float(pt[0]), float(pt[1])
-            except (TypeError, ValueError):
-                return None
-            points.append([x, y])
-        return BoundingBox(points=points)
+
+def _has_ppstructure() -> bool:
+    """Whether the installed paddleocr still ships ``PPStructure`` (2.x).
+
+    Decided from the package metadata so it can be checked without importing
+    paddle; an unknown version is left for :meth:`OCRService.load_engines`.
+    """
+    version = engine_version("paddleocr")
+    major = version.split(".", 1)[0]
+    return not major.isdigit() or int(major) < 3
+
+
+def _crop_line(page: Image.Image, box: list) -> np.ndarray:
+    """Rectify the quadrilateral *box* of *page* into a BGR line image.
+
+    Mirrors PaddleOCR's ``get_rotate_crop_image``: the crop is as wide and tall
+    as the longest edges and tall crops are rotated to read horizontally.
+    """
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = box[:4]
+    width = max(1, round(max(np.hypot(x1 - x0, y1 - y0), np.hypot(x2 - x3, y2 - y3))))
+    height = max(1, round(max(np.hypot(x3 - x0, y3 - y0), np.hypot(x2 - x1, y2 - y1))))
+    # QUAD expects the source corners as upper-left, lower-left, lower-right, upper-right.
+    crop = page.transform(
+        (width, height),
+        Image.Transform.QUAD,
+        (x0, y0, x3, y3, x2, y2, x1, y1),
+        resample=Image.Resampling.BICUBIC,
+    )
+    if height / width >= 1.5:
+        crop = crop.transpose(Image.Transpose.ROTATE_90)
+    return np.ascontiguousarray(np.asarray(crop)[:, :, ::-1])
+
+
+def _reading_order(boxes: List[list]) -> List[list]:
+    """Sort detected boxes top-to-bottom, left-to-right like PaddleOCR does."""
+    ordered = sorted(boxes, key=lambda box: (box[0][1], box[0][0]))
+    for i in range(len(ordered) - 1):
+        for j in range(i, -1, -1):
+            if (
+                abs(ordered[j + 1][0][1] - ordered[j][0][1]) < 10
+                and ordered[j + 1][0][0] < ordered[j][0][0]
+            ):
+                ordered[j], ordered[j + 1] = ordered[j + 1], ordered[j]
+            else:
+                break
+    return ordered
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from importlib import metadata
+from pathlib import Path
+from typing import List, Tuple
+
+from PIL import Image
+
+from .models import OCRDocument
+from .storage import image_digest
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+def engine_version(package: str = "paddleocr") -> str:
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class OCRCache:
+    """On-disk cache of serialized ``OCRDocument``s.
+
+    Keys combine the hash of the page pixels with the OCR *settings* (language,
+    engine version, OCR mode...), so changing any of them misses the cache.
+    Entries are JSON files sharded by key prefix; once the cache grows beyond
+    *max_bytes* the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        settings: dict,
+        *,
+        max_bytes: int,
+        refresh: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self._salt = json.dumps({"version": CACHE_VERSION, **settings}, sort_keys=True)
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def key(self, image: Image.Image) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(self._salt.encode("utf-8"))
+        digest.update(image_digest(image).encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> OCRDocument | None:
+        if self.refresh:
+            return None
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Dropping unreadable OCR cache entry %s: %s", path, exc)
+            path.unlink(missing_ok=True)
+            return None
+        # Bump the mtime so eviction treats the entry as recently used; a
+        # concurrent eviction may have removed the file since it was read.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return OCRDocument.from_dict(data)
+
+    def put(self, key: str, document: OCRDocument) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        payload = json.dumps(document.to_dict(), ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(payload)
+        try:
+            # A refreshed entry replaces one already counted in the size.
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(payload) - replaced
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Trim to 90% of the budget so eviction does not run on every put.
+        with self._lock:
+            entries = sorted(self._entries())
+            size = sum(entry_size for _, _, entry_size in entries)
+            target = int(self.max_bytes * 0.9)
+            for _, path, entry_size in entries:
+                if size <= target:
+                    break
+                path.unlink(missing_ok=True)
+                size -= entry_size
+            self._size = size
+
+    def _entries(self) -> List[Tuple[int, Path, int]]:
+        entries: List[Tuple[int, Path, int]] = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, Path(entry.path), stat.st_size))
+        return entries
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Sequence
+
+from PIL import Image
+
+from .config import PipelineConfig
+from .models import OCRDocument
+from .ocr import OCRService
+
+# One OCRService per worker process, built once by the pool initializer.
+_WORKER_SERVICE: OCRService | None = None
+
+
+def _init_worker(config: PipelineConfig, language: str) -> None:
+    global _WORKER_SERVICE
+    _WORKER_SERVICE = OCRService(config, language=language)
+    _WORKER_SERVICE.load_engines()
+
+
+def _extract(image: Path | Image.Image) -> OCRDocument:
+    assert _WORKER_SERVICE is not None, "worker initializer did not run"
+    return _WORKER_SERVICE.extract(image)
+
+
+def _extract_batch(images: Sequence[Path | Image.Image]) -> List[OCRDocument]:
+    assert _WORKER_SERVICE is not None, "worker initializer did not run"
+    return _WORKER_SERVICE.extract_batch(images)
+
+
+class OCRProcessPool:
+    """Runs :meth:`OCRService.extract` in worker processes.
+
+    Each worker owns its own PaddleOCR/PPStructure engines, so pages are OCR'd
+    in parallel without sharing engine state or the GIL. Pages travel to the
+    workers as decoded images (or paths) and come back as ``OCRDocument``s.
+    """
+
+    def __init__(self, config: PipelineConfig, workers: int, language: str = "vi") -> None:
+        # Spawn rather than fork: the parent may already hold threads and
+        # native inference runtimes that are not fork-safe.
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config, language),
+        )
+
+    def submit(self, image: Path | Image.Image) -> Future:
+        return self._executor.submit(_extract, image)
+
+    def extract(self, image: Path | Image.Image) -> OCRDocument:
+        return self.submit(image).result()
+
+    def extract_batch(self, images: Sequence[Path | Image.Image]) -> List[OCRDocument]:
+        return self._executor.submit(_extract_batch, list(images)).result()
+
+    def close(self) -> None:
+        self._executor.shutdown()
@@ -1,109 +1,484 @@
 from __future__ import annotations
 
-import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterator, List, Set, Tuple
 
+from PIL import Image
+
+from .annotations import AnnotationWriter, RecordKey, load_completed_keys, record_key
 from .caption import CaptionGenerator
+from .columnar import ColumnarWriter, columnar_path, export_columnar
 from .config import PipelineConfig
-from .models import DatasetRecord, ImageArtifact
-from .converter import convert_pdf_to_images
+from .models import DatasetRecord, ImageArtifact, OCRDocument
+from .converter import convert_pdf_to_images, iter_pdf_pages, pdf_page_count, render_pdf_pages
+from .metrics import PipelineMetrics, ProgressPrinter
 from .ocr import OCRService
-from .preprocess import ImagePreprocessor
+from .ocr_cache import OCRCache
+from .ocr_pool import OCRProcessPool
+from .preprocess import ImagePreprocessor, split_source
 from .qa import QualityAssurance
+from .rasterizers import get_rasterizer
+from .sharding import MergeReport, merge_shards, select_shard, shard_path, validate_shard_args
+from .split_merge import merge_pieces
+from .stages import Stage, StagePipeline
+from .storage import ImageCodec, ImageWriter
 
 LOGGER = logging.getLogger(__name__)
 
+# Largest conversion job when pool workers hand back decoded pages.
+_IN_MEMORY_CHUNK_PAGES = 8
 
 class DatasetPipeline:
     """High-level orchestration for dataset creation."""
 
     def __init__(self, config: PipelineConfig) -> None:
+        validate_shard_args(config.shard_index, config.shard_count)
         self.config = config
-        self.preprocessor = ImagePreprocessor(config)
+        # Each shard writes its own annotations/metrics next to the configured paths.
+        self.annotation_path = shard_path(
+            config.annotation_output_path, config.shard_index, config.shard_count
+        )
+        self.metrics_path = (
+            shard_path(config.metrics_output_path, config.shard_index, config.shard_count)
+            if config.metrics_output_path is not None
+            else None
+        )
+        self.rasterizer = get_rasterizer(
+            config.rasterizer, thread_count=config.poppler_threads
+        )
+        self.image_writer = ImageWriter(
+            max_workers=config.image_writer_threads,
+            codec=ImageCodec(
+                config.image_format,
+                png_compress_level=config.png_compress_level,
+                png_optimize=config.png_optimize,
+            ),
+        )
+        self.preprocessor = ImagePreprocessor(config, writer=self.image_writer)
         self.ocr_service = OCRService(config)
+        self.ocr_pool: OCRProcessPool | None = None
+        # Opened by run(); conversion-only runs never touch OCR state.
+        self.ocr_cache: OCRCache | None = None
         self.captioner = CaptionGenerator()
         self.qa = QualityAssurance(config)
+        # Add hooks to export metrics elsewhere; they get periodic snapshots.
+        self.metrics = PipelineMetrics(interval=config.progress_interval)
+        if config.progress:
+            self.metrics.add_hook(ProgressPrinter())
+        self.ocr_service.metrics = self.metrics
+        self.image_writer.metrics = self.metrics
 
     def run(self) -> List[DatasetRecord]:
-        records: List[DatasetRecord] = []
-        artifacts = self.convert_pdfs()
-        if not artifacts:
-            LOGGER.warning("No artifacts generated; nothing to process.")
-            return records
-
-        derived_artifacts: List[ImageArtifact] = []
-        for artifact in artifacts:
-            derived_artifacts.extend(self.preprocessor.process(artifact))
-
-        if self.config.num_workers and self.config.num_workers > 1:
-            with ThreadPoolExecutor(max_workers=self.config.num_workers) as executor:
-                for record in executor.map(self._process_image, derived_artifacts):
-                    records.append(record)
-        else:
-            for derived in derived_artifacts:
-                record = self._process_image(derived)
-                records.append(record)
-        self._write_annotations(records)
-        LOGGER.info("Pipeline completed with %d records", len(records))
-        return records
+        """Process every page and return the records written in this run."""
+        return list(self.iter_records())
 
-    def convert_pdfs(self) -> List[ImageArtifact]:
+    def iter_records(self) -> Iterator[DatasetRecord]:
+        """Process pages and yield each record once it has been written.
+
+        Records are appended to the annotations file as they complete, so memory
+        does not grow with the corpus. With ``resume`` the existing annotations
+        are kept and pages already present in them are skipped.
+        """
         self._ensure_output_dirs()
-        pdf_files = sorted(self.config.raw_pdf_dir.glob(self.config.pdf_glob_pattern))
+        completed = set()
+        if self.config.resume:
+            completed = load_completed_keys(self.annotation_path)
+            LOGGER.info("Resuming; %d records already annotated", len(completed))
+        if self.config.ocr_cache and self.ocr_cache is None:
+            self.ocr_cache = OCRCache(
+                self.config.ocr_cache_dir,
+                self.ocr_service.cache_settings(),
+                max_bytes=self.config.ocr_cache_max_bytes,
+                refresh=self.config.refresh_ocr,
+            )
+        # Conversion, preprocessing, OCR and captioning run concurrently; bounded
+        # queues between them keep at most a few decoded pages in memory.
+        stages = StagePipeline(
+            [
+                Stage(
+                    "preprocess",
+                    fn=partial(self._preprocess_page, completed=completed),
+                    workers=self.config.preprocess_workers,
+                ),
+                Stage(
+                    "ocr",
+                    batch_fn=self._ocr_pages,
+                    workers=self.config.num_workers,
+                    batch_size=self.config.ocr_batch_size,
+                ),
+                Stage(
+                    "annotate",
+                    fn=self._annotate_page,
+                    workers=self.config.annotate_workers,
+                ),
+            ],
+            queue_size=self.config.stage_queue_size,
+            metrics=self.metrics,
+            source_name="convert",
+        )
 
-        if self.config.max_pdfs is not None:
-            pdf_files = pdf_files[: self.config.max_pdfs]
+        writer = AnnotationWriter(
+            self.annotation_path,
+            append=self.config.resume,
+            checkpoint_every=self.config.annotation_checkpoint_every,
+        )
+        columnar = self._open_columnar()
+        self.metrics.start()
+        try:
+            if self.config.num_workers > 1 and self.config.ocr_pool == "process":
+                self.ocr_pool = OCRProcessPool(self.config, self.config.num_workers)
+            with writer, columnar or nullcontext():
+                for page_records in stages.run(self.iter_artifacts(in_memory=True)):
+                    self.metrics.sample_queues(stages.queue_depths())
+                    if completed:
+                        page_records = [
+                            record
+                            for record in page_records
+                            if record_key(record.artifact) not in completed
+                        ]
+                    with self.metrics.time("write", len(page_records)):
+                        for record in page_records:
+                            writer.write(record)
+                            if columnar is not None:
+                                columnar.write(record)
+                    self.metrics.count("pages")
+                    self.metrics.count("records", len(page_records))
+                    yield from page_records
+            # A finished run always leaves its file, so a merge can tell an empty
+            # shard from one that never ran.
+            self.annotation_path.touch(exist_ok=True)
+        finally:
+            if self.ocr_pool is not None:
+                self.ocr_pool.close()
+                self.ocr_pool = None
+            self.image_writer.flush()
+            self.preprocessor.save_manifest()
+            self._finish_metrics()
+
+        if not writer.count:
+            if completed:
+                LOGGER.info(
+                    "All %d records already in %s; nothing left to process.",
+                    len(completed),
+                    self.annotation_path,
+                )
+            else:
+                LOGGER.warning("No artifacts generated; nothing to process.")
+            return
+        LOGGER.info("Pipeline completed with %d records", writer.count)
+
+    def convert_pdfs(self) -> List[ImageArtifact]:
+        artifacts = list(self.iter_artifacts())
+        self.image_writer.flush()
+        LOGGER.info("Prepared %d page images", len(artifacts))
+        return artifacts
+
+    def iter_artifacts(self, in_memory: bool = False) -> Iterator[ImageArtifact]:
+        """Yield page artifacts as soon as each page has been rendered.
+
+        With *in_memory* the rendered pages are not written here; artifacts carry
+        the decoded image and the preprocessor writes the final version.
+        """
+        self._ensure_output_dirs()
+        pdf_files = select_shard(
+            self.corpus_pdfs(),
+            self.config.raw_pdf_dir,
+            self.config.shard_index,
+            self.config.shard_count,
+        )
 
         if not pdf_files:
             LOGGER.warning(
-                "No PDF files matched pattern %s in %s",
+                "No PDF files matched pattern %s in %s (shard %d of %d)",
                 self.config.pdf_glob_pattern,
                 self.config.raw_pdf_dir,
+                self.config.shard_index,
+                self.config.shard_count,
             )
-            return []
+            return
 
-        artifacts: List[ImageArtifact] = []
+        # Pages whose split pieces are already up to date need not be rendered again.
+        cached = frozenset(self.preprocessor.cached_sources())
+        if self.config.conversion_workers > 1:
+            yield from self._convert_pdfs_parallel(pdf_files, in_memory, cached)
+            return
         for pdf_path in pdf_files:
             LOGGER.info("Converting PDF %s", pdf_path.name)
-            artifacts.extend(self._convert_pdf(pdf_path))
-        LOGGER.info("Prepared %d page images", len(artifacts))
-        return artifacts
+            yield from self._convert_pdf(pdf_path, in_memory, cached)
+
+    def corpus_pdfs(self) -> List[Path]:
+        """All PDFs of the corpus, across every shard, in processing order."""
+        pdf_files = sorted(self.config.raw_pdf_dir.glob(self.config.pdf_glob_pattern))
+        if self.config.max_pdfs is not None:
+            pdf_files = pdf_files[: self.config.max_pdfs]
+        return pdf_files
+
+    def merge_shards(self) -> MergeReport:
+        """Merge every shard's annotations into ``annotation_output_path``.
+
+        Fails (without writing) if a shard output is missing, a record appears
+        twice, or a page of the corpus has no record.
+        """
+        count = self.config.shard_count
+        expected_pages = {}
+        for pdf_path in self.corpus_pdfs():
+            expected_pages[pdf_path] = self._page_count(pdf_path)
+        shard_paths = [
+            shard_path(self.config.annotation_output_path, index, count)
+            for index in range(count)
+        ]
+        report = merge_shards(
+            shard_paths,
+            self.config.annotation_output_path,
+            expected_pages,
+            self.config.raw_pdf_dir,
+        )
+        if report.ok and self.config.columnar_format:
+            export_columnar(
+                self.config.annotation_output_path,
+                columnar_path(self.config.annotation_output_path, self.config.columnar_format),
+                self.config.columnar_format,
+            )
+        return report
 
     def _ensure_output_dirs(self) -> None:
         self.config.image_output_dir.mkdir(parents=True, exist_ok=True)
-        self.config.annotation_output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.annotation_path.parent.mkdir(parents=True, exist_ok=True)
 
-    def _convert_pdf(self, pdf_path: Path) -> List[ImageArtifact]:
-        image_paths = convert_pdf_to_images(
+    def _convert_pdf(
+        self, pdf_path: Path, in_memory: bool, cached: frozenset[Path]
+    ) -> Iterator[ImageArtifact]:
+        pages = iter_pdf_pages(
             pdf_path,
             self.config.image_output_dir,
             dpi=self.config.dpi,
             overwrite=self.config.overwrite_images,
             max_pages=self.config.max_pages_per_pdf,
+            window=self.config.conversion_window,
+            rasterizer=self.rasterizer,
+            codec=self.image_writer.codec,
+            save=self.image_writer.save,
+            write=not in_memory,
+            cached=cached,
         )
-        artifacts: List[ImageArtifact] = []
-        for idx, image_path in enumerate(image_paths, start=1):
+        for idx, (image_path, image) in enumerate(pages, start=1):
             LOGGER.debug("Prepared image %s", image_path.name)
-            artifacts.append(
-                ImageArtifact(
-                    image_path=image_path, parent_pdf=pdf_path, page_number=idx
+            yield ImageArtifact(
+                image_path=image_path, parent_pdf=pdf_path, page_number=idx, image=image
+            )
+
+    def _convert_pdfs_parallel(
+        self, pdf_files: List[Path], in_memory: bool, cached: frozenset[Path]
+    ) -> Iterator[ImageArtifact]:
+        """Convert page chunks of all *pdf_files* in a process pool, in input order.
+
+        With *in_memory* workers return the decoded pages instead of writing
+        them; only a few chunks are in flight so they do not pile up in memory.
+        """
+        convert = render_pdf_pages if in_memory else convert_pdf_to_images
+        chunk = self.config.conversion_chunk_pages
+        if in_memory:
+            # Decoded pages are ~25 MB each at 300 DPI; keep the chunks small.
+            chunk = min(chunk or _IN_MEMORY_CHUNK_PAGES, _IN_MEMORY_CHUNK_PAGES)
+        jobs = iter(self._conversion_jobs(pdf_files, chunk))
+        # Spawn rather than fork: the stage, encoder and OCR threads are running by now.
+        with ProcessPoolExecutor(
+            max_workers=self.config.conversion_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+
+            def submit(job: Tuple[Path, int, int]) -> Tuple[Path, int, Future]:
+                pdf_path, first_page, last_page = job
+                return pdf_path, first_page, executor.submit(
+                    convert,
+                    pdf_path,
+                    self.config.image_output_dir,
+                    dpi=self.config.dpi,
+                    overwrite=self.config.overwrite_images,
+                    window=self.config.conversion_window,
+                    first_page=first_page,
+                    last_page=last_page,
+                    rasterizer=self.rasterizer,
+                    codec=self.image_writer.codec,
+                    cached=cached,
+                )
+
+            # One job queued beyond the busy workers keeps them fed.
+            pending = deque(submit(job) for job in islice(jobs, self.config.conversion_workers + 1))
+            while pending:
+                pdf_path, first_page, future = pending.popleft()
+                pages = future.result()
+                for job in islice(jobs, 1):
+                    pending.append(submit(job))
+                if first_page == 1:
+                    LOGGER.info("Converting PDF %s", pdf_path.name)
+                for idx, page in enumerate(pages, start=first_page):
+                    image_path, image = page if in_memory else (page, None)
+                    LOGGER.debug("Prepared image %s", image_path.name)
+                    yield ImageArtifact(
+                        image_path=image_path, parent_pdf=pdf_path, page_number=idx, image=image
+                    )
+                del pages
+
+    def _conversion_jobs(
+        self, pdf_files: List[Path], chunk_pages: int
+    ) -> List[Tuple[Path, int, int]]:
+        """Split *pdf_files* into ``(pdf, first_page, last_page)`` jobs of *chunk_pages*."""
+        jobs: List[Tuple[Path, int, int]] = []
+        for pdf_path in pdf_files:
+            page_count = self._page_count(pdf_path)
+            chunk = chunk_pages or page_count
+            for first_page in range(1, page_count + 1, max(1, chunk)):
+                jobs.append((pdf_path, first_page, min(first_page + chunk - 1, page_count)))
+        return jobs
+
+    def _open_columnar(self) -> ColumnarWriter | None:
+        """Columnar copy of the annotations, if configured.
+
+        The columnar file cannot be appended to, so a resumed run first copies
+        the records already in the JSONL file into it.
+        """
+        fmt = self.config.columnar_format
+        if not fmt:
+            return None
+        columnar = ColumnarWriter(
+            columnar_path(self.annotation_path, fmt),
+            fmt,
+            chunk_records=self.config.annotation_checkpoint_every,
+        )
+        if self.config.resume and self.annotation_path.exists():
+            columnar.extend_from_jsonl(self.annotation_path)
+        return columnar
+
+    def _page_count(self, pdf_path: Path) -> int:
+        page_count = pdf_page_count(pdf_path, self.rasterizer)
+        if self.config.max_pages_per_pdf is not None:
+            page_count = min(page_count, self.config.max_pages_per_pdf)
+        return page_count
+
+    def _preprocess_page(
+        self, artifact: ImageArtifact, completed: Set[RecordKey]
+    ) -> List[ImageArtifact]:
+        if self.config.split_merge == "page" and record_key(artifact) in completed:
+            # Already written as one merged page record.
+            artifact.image = None
+            return []
+        derived = self.preprocessor.process(artifact)
+        if all(record_key(piece) in completed for piece in derived):
+            for piece in derived:
+                piece.image = None
+            return []
+        # A page cut short by a crash is redone whole: merging split pieces needs
+        # all of them. The records already written are skipped when writing.
+        return derived
+
+    def _ocr_pages(
+        self, pages: List[List[ImageArtifact]]
+    ) -> List[List[Tuple[ImageArtifact, Image.Image, OCRDocument]]]:
+        """OCR the pieces of several pages in one batch, grouped back per page."""
+        artifacts = [artifact for page in pages for artifact in page]
+        images = [artifact.load_image() for artifact in artifacts]
+        documents = iter(self._extract_documents(images) if images else [])
+        results = iter(zip(artifacts, images, documents))
+        return [[next(results) for _ in page] for page in pages]
+
+    def _annotate_page(
+        self, results: List[Tuple[ImageArtifact, Image.Image, OCRDocument]]
+    ) -> List[DatasetRecord]:
+        pieces = [(artifact, image.size, document) for artifact, image, document in results]
+        if self.config.split_merge and len(pieces) > 1:
+            with self.metrics.time("split_merge"):
+                pieces = self._merge_split_pieces(pieces)
+        records: List[DatasetRecord] = []
+        for artifact, size, document in pieces:
+            with self.metrics.time("caption"):
+                caption = self.captioner.generate(size, document)
+            # Drop the decoded buffer; the record only needs the image path from here on.
+            artifact.image = None
+            with self.metrics.time("qa"):
+                qa_result = self.qa.evaluate(document, caption)
+            records.append(
+                DatasetRecord(
+                    artifact=artifact, ocr=document, caption=caption, qa=qa_result
                 )
             )
-        return artifacts
+        return records
 
-    def _process_image(self, artifact: ImageArtifact) -> DatasetRecord:
-        document = self.ocr_service.extract(artifact.image_path)
-        caption = self.captioner.generate(artifact.image_path, document)
-        qa_result = self.qa.evaluate(document, caption)
-        return DatasetRecord(
-            artifact=artifact, ocr=document, caption=caption, qa=qa_result
+    def _merge_split_pieces(
+        self, pieces: List[Tuple[ImageArtifact, Tuple[int, int], OCRDocument]]
+    ) -> List[Tuple[ImageArtifact, Tuple[int, int], OCRDocument]]:
+        """Drop spans seen twice in the overlap of a page's split pieces.
+
+        With ``split_merge="page"`` the pieces are replaced by one page-level
+        entry whose spans are in page coordinates.
+        """
+        documents = [document for _, _, document in pieces]
+        extents = [(artifact.split_offset, size[1]) for artifact, size, _ in pieces]
+        page, trimmed = merge_pieces(documents, extents)
+        dropped = sum(len(document.texts) for document in documents) - len(page.texts)
+        self.metrics.count("split_spans_dropped", dropped)
+        if self.config.split_merge != "page":
+            return [
+                (artifact, size, document)
+                for (artifact, size, _), document in zip(pieces, trimmed)
+            ]
+        for artifact, _, _ in pieces:
+            artifact.image = None
+        first, (width, _), _ = pieces[0]
+        page_artifact = ImageArtifact(
+            image_path=split_source(first.image_path),
+            parent_pdf=first.parent_pdf,
+            page_number=first.page_number,
         )
+        height = max(offset + piece_height for offset, piece_height in extents)
+        return [(page_artifact, (width, height), page)]
+
+    def _extract_documents(self, images: List[Image.Image]) -> List[OCRDocument]:
+        """OCR *images*, serving pages seen before from the OCR cache."""
+        ocr = self.ocr_pool or self.ocr_service
+        cache = self.ocr_cache
+        if cache is None:
+            with self.metrics.time("ocr.engine", len(images)):
+                return ocr.extract_batch(images)
+        with self.metrics.time("ocr.cache", len(images)):
+            keys = [cache.key(image) for image in images]
+            documents = [cache.get(key) for key in keys]
+        missing = [index for index, document in enumerate(documents) if document is None]
+        self.metrics.count("ocr_cache_hits", len(images) - len(missing))
+        if missing:
+            with self.metrics.time("ocr.engine", len(missing)):
+                fresh = ocr.extract_batch([images[index] for index in missing])
+            for index, document in zip(missing, fresh):
+                cache.put(keys[index], document)
+                documents[index] = document
+        return documents
 
-    def _write_annotations(self, records: Iterable[DatasetRecord]) -> None:
-        output = self.config.annotation_output_path
-        with output.open("w", encoding="utf-8") as handle:
-            for record in records:
-                handle.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+    def _finish_metrics(self) -> None:
+        snapshot = self.metrics.stop()
+        if self.metrics_path is not None:
+            self.metrics.write(self.metrics_path, snapshot)
+        slowest = sorted(
+            snapshot["stages"].items(), key=lambda item: item[1]["wall"]["total"], reverse=True
+        )
+        LOGGER.info(
+            "Processed %d pages at %.2f pages/s; time by stage: %s",
+            snapshot["counters"].get("pages", 0),
+            snapshot["pages_per_second"],
+            ", ".join(f"{name} {stats['wall']['total']:.1f}s" for name, stats in slowest),
+        )
+        encoded = self.image_writer.stats.to_dict()
+        if encoded["images"]:
+            LOGGER.info(
+                "Encoded %d %s images: %.0f KiB and %.1f ms per image",
+                encoded["images"],
+                self.image_writer.codec.format,
+                encoded["bytes_per_image"] / 1024,
+                encoded["encode_ms_per_image"],
+            )
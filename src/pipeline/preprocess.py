@@ -2,44 +2,208 @@ from __future__ import annotations
 
 import math
 from pathlib import Path
-from typing import Iterable, List
+from typing import List, Set
 
 import numpy as np
-from PIL import Image, ImageOps
+from PIL import Image
 
 from .config import PipelineConfig
+from .manifest import PreprocessManifest
 from .models import ImageArtifact
+from .sharding import shard_path
+from .storage import ImageWriter, image_digest
+
+MANIFEST_NAME = "preprocess_manifest.json"
+SPLIT_SUFFIX = "_split_"
+
+
+def split_source(piece_path: Path) -> Path:
+    """Page image a split piece was cut from (``page_001_split_2.png`` -> ``page_001.png``)."""
+    stem = piece_path.stem.rpartition(SPLIT_SUFFIX)[0]
+    return piece_path.with_name(f"{stem}{piece_path.suffix}")
 
 
 class ImagePreprocessor:
     """Performs light image cleanup and optional page splitting."""
 
-    def __init__(self, config: PipelineConfig) -> None:
+    def __init__(self, config: PipelineConfig, writer: ImageWriter | None = None) -> None:
         self.config = config
+        self.writer = writer or ImageWriter(max_workers=0)
+        self.manifest = (
+            PreprocessManifest(
+                shard_path(
+                    config.image_output_dir / MANIFEST_NAME,
+                    config.shard_index,
+                    config.shard_count,
+                )
+            )
+            if config.preprocess_cache
+            else None
+        )
 
     def process(self, artifact: ImageArtifact) -> List[ImageArtifact]:
-        image = Image.open(artifact.image_path)
-        image = image.convert("RGB")
-        image = self._autocrop(image)
-        image.save(artifact.image_path)
+        """Crop (and maybe split) *artifact*; returned artifacts hold their decoded image.
+
+        Pages recorded in the manifest with the same pixels and parameters are
+        returned from the cache without being decoded or written again.
+        """
+        cached = self._cached_artifacts(artifact)
+        if cached is not None:
+            return cached
+
+        source = artifact.load_image()
+        source_hash = image_digest(source) if self.manifest is not None else ""
+        image = self._autocrop(source)
+        artifact.image = None
+        del source
 
         if self._needs_split(image):
-            return self._split_image(image, artifact)
+            results = self._split_image(image, artifact)
+        else:
+            self.writer.save(image, artifact.image_path)
+            artifact.image = image
+            results = [artifact]
+
+        if self.manifest is not None:
+            outputs = [
+                (result.image_path, result.split_index, result.split_offset)
+                for result in results
+            ]
+            if self.config.split_merge == "page" and results[0].split_index:
+                # The whole cropped page is an output too: page records point at it.
+                outputs.append((artifact.image_path, 0, 0))
+            self.manifest.record(artifact.image_path, source_hash, self._params(), outputs)
+        return results
 
-        return [artifact]
+    def cached_sources(self) -> Set[Path]:
+        """Page image paths whose preprocessed outputs are already up to date."""
+        if self.manifest is None:
+            return set()
+        return self.manifest.cached_sources(self._params())
+
+    def save_manifest(self) -> None:
+        """Persist the manifest; call after the image writer has been flushed."""
+        if self.manifest is not None:
+            self.manifest.save()
+
+    def _cached_artifacts(self, artifact: ImageArtifact) -> List[ImageArtifact] | None:
+        if self.manifest is None:
+            return None
+        # A page read from disk is not hashed: for an unsplit page the file is
+        # the cropped output itself, and outputs_unchanged below vouches for it.
+        source_hash = None if artifact.image is None else image_digest(artifact.image)
+        entry = self.manifest.lookup(artifact.image_path, self._params(), source_hash)
+        if entry is None or any("offset" not in out for out in entry["outputs"]):
+            # Entries written before pieces recorded their offset are redone.
+            return None
+        if not self.manifest.outputs_unchanged(entry):
+            # Something (e.g. a --convert-only re-render) touched the outputs since.
+            return None
+
+        pieces = [out for out in entry["outputs"] if out["split_index"]]
+        keeps_page = any(not out["split_index"] for out in entry["outputs"])
+        if pieces and self.config.split_merge == "page" and not keeps_page:
+            # Recorded before page mode listed the whole page among its outputs.
+            return None
+
+        artifact.image = None
+        if not keeps_page:
+            # A split page's full render is not kept; drop one a convert-only run left.
+            self.writer.discard(artifact.image_path)
+        parent = artifact.image_path.parent
+        return [
+            ImageArtifact(
+                image_path=parent / out["name"],
+                parent_pdf=artifact.parent_pdf,
+                page_number=artifact.page_number,
+                split_index=out["split_index"],
+                split_offset=out["offset"],
+                split_count=len(pieces),
+            )
+            for out in pieces or entry["outputs"]
+        ]
+
+    def _params(self) -> dict:
+        params = {
+            "split_height_ratio": self.config.split_height_ratio,
+            "split_overlap": self.config.split_overlap,
+            "autocrop_threshold": self.config.autocrop_threshold,
+            "autocrop_margin": self.config.autocrop_margin,
+            "split_mode": self.config.split_mode,
+            "split_gutter_max_ink": self.config.split_gutter_max_ink,
+        }
+        if self.config.split_merge == "page":
+            # Page records need the whole cropped page kept next to its pieces.
+            params["split_merge"] = "page"
+        return params
 
     def _autocrop(self, image: Image.Image) -> Image.Image:
-        gray = image.convert("L")
-        np_image = np.array(gray)
-        mask = np_image < 245
-        if not mask.any():
+        bounds = self._content_bounds(image)
+        if bounds is None:
             return image
-        rows = np.where(mask.any(axis=1))[0]
-        cols = np.where(mask.any(axis=0))[0]
-        top, bottom = rows[[0, -1]]
-        left, right = cols[[0, -1]]
-        cropped = image.crop((left, top, right + 1, bottom + 1))
-        return ImageOps.expand(cropped, border=5, fill="white")
+        left, top, right, bottom = bounds
+        # Crop the padded box in one copy and whiten the padding, rather than
+        # cropping and then copying again into an expanded canvas.
+        margin = self.config.autocrop_margin
+        cropped = image.crop((left - margin, top - margin, right + 1 + margin, bottom + 1 + margin))
+        width, height = cropped.size
+        if margin > 0:
+            for box in (
+                (0, 0, width, margin),
+                (0, height - margin, width, height),
+                (0, 0, margin, height),
+                (width - margin, 0, width, height),
+            ):
+                cropped.paste("white", box)
+        return cropped
+
+    def _content_bounds(self, image: Image.Image) -> tuple[int, int, int, int] | None:
+        """Return the inclusive ``(left, top, right, bottom)`` box of non-white pixels.
+
+        The box is first estimated on a nearest-neighbour downsample of the page.
+        Ink is known to exist on the sampled edge rows/columns, so the exact edges
+        can only lie further out and only the margins are converted to grayscale
+        and scanned at full resolution.
+        """
+        threshold = self.config.autocrop_threshold
+        stride = max(1, self.config.autocrop_stride)
+        width, height = image.size
+        coarse_size = (width // stride, height // stride)
+        if stride == 1 or min(coarse_size) == 0:
+            return _exact_bounds(_gray(image), threshold)
+        # With an integer scale, NEAREST samples pixel (i * stride + stride // 2).
+        coarse = _gray(
+            image.resize(
+                coarse_size,
+                Image.Resampling.NEAREST,
+                box=(0, 0, coarse_size[0] * stride, coarse_size[1] * stride),
+            )
+        ) < threshold
+        if not coarse.any():
+            # Strokes thinner than the stride can fall between samples.
+            return _exact_bounds(_gray(image), threshold)
+        offset = stride // 2
+        rows = np.flatnonzero(coarse.any(axis=1))
+        cols = np.flatnonzero(coarse.any(axis=0))
+        top, bottom = int(rows[0]) * stride + offset, int(rows[-1]) * stride + offset
+        left, right = int(cols[0]) * stride + offset, int(cols[-1]) * stride + offset
+
+        top_edge = _first_below(_gray(image, (0, 0, width, top + 1)).min(axis=1), threshold)
+        bottom_edge = _last_below(
+            _gray(image, (0, bottom, width, height)).min(axis=1), threshold
+        )
+        if top_edge is None or bottom_edge is None:
+            return _exact_bounds(_gray(image), threshold)
+        top, bottom = top_edge, bottom + bottom_edge
+        left_edge = _first_below(
+            _gray(image, (0, top, left + 1, bottom + 1)).min(axis=0), threshold
+        )
+        right_edge = _last_below(
+            _gray(image, (right, top, width, bottom + 1)).min(axis=0), threshold
+        )
+        if left_edge is None or right_edge is None:
+            return _exact_bounds(_gray(image), threshold)
+        return left_edge, top, right + right_edge, bottom
 
     def _needs_split(self, image: Image.Image) -> bool:
         if image.width == 0:
@@ -52,27 +216,101 @@ class ImagePreprocessor:
         max_ratio = max(self.config.split_height_ratio, 1.0)
         pieces = max(2, math.ceil(ratio / max_ratio))
         slice_height = math.ceil(image.height / pieces)
+        cuts = [idx * slice_height for idx in range(1, pieces)]
+        overlaps = [self.config.split_overlap] * len(cuts)
+        if self.config.split_mode == "gutter":
+            cuts, overlaps = self._gutter_cuts(image, cuts, slice_height)
+        bounds = [0, *cuts, image.height]
 
         artifacts: List[ImageArtifact] = []
         base = artifact.image_path.stem
         parent = artifact.image_path.parent
 
         for idx in range(pieces):
-            top = max(0, idx * slice_height - (self.config.split_overlap if idx > 0 else 0))
+            top = max(0, bounds[idx] - (overlaps[idx - 1] if idx > 0 else 0))
             bottom = min(
                 image.height,
-                (idx + 1) * slice_height + (self.config.split_overlap if idx < pieces - 1 else 0),
+                bounds[idx + 1] + (overlaps[idx] if idx < pieces - 1 else 0),
             )
             part = image.crop((0, top, image.width, bottom))
-            new_path = parent / f"{base}_split_{idx + 1}.png"
-            part.save(new_path)
+            new_path = parent / f"{base}{SPLIT_SUFFIX}{idx + 1}{self.writer.codec.suffix}"
+            self.writer.save(part, new_path)
             artifacts.append(
                 ImageArtifact(
                     image_path=new_path,
                     parent_pdf=artifact.parent_pdf,
                     page_number=artifact.page_number,
                     split_index=idx + 1,
+                    split_offset=top,
+                    split_count=pieces,
+                    image=part,
                 )
             )
-        artifact.image_path.unlink(missing_ok=True)
+        if self.config.split_merge == "page":
+            self.writer.save(image, artifact.image_path)
+        else:
+            self.writer.discard(artifact.image_path)
         return artifacts
+
+    def _gutter_cuts(
+        self, image: Image.Image, cuts: List[int], slice_height: int
+    ) -> tuple[List[int], List[int]]:
+        """Move each cut to the middle of the nearest blank horizontal band.
+
+        Rows with at most ``split_gutter_max_ink`` dark pixels count as blank. A cut
+        that lands in a blank band needs no overlap; cuts with no band within half
+        a slice keep their position and ``split_overlap``.
+        """
+        ink = (_gray(image) < self.config.autocrop_threshold).sum(axis=1)
+        blank = ink <= self.config.split_gutter_max_ink
+        inked_rows = np.flatnonzero(~blank)
+        window = slice_height // 2
+
+        moved: List[int] = []
+        overlaps: List[int] = []
+        previous = 0
+        for cut in cuts:
+            low, high = max(previous + 1, cut - window), min(image.height, cut + window)
+            candidates = np.flatnonzero(blank[low:high]) + low
+            if candidates.size == 0:
+                moved.append(cut)
+                overlaps.append(self.config.split_overlap)
+                previous = cut
+                continue
+            nearest = int(candidates[np.argmin(np.abs(candidates - cut))])
+            position = int(np.searchsorted(inked_rows, nearest))
+            band_start = int(inked_rows[position - 1]) + 1 if position > 0 else 0
+            band_end = (
+                int(inked_rows[position]) if position < inked_rows.size else image.height
+            )
+            middle = min(max((band_start + band_end) // 2, low), high - 1)
+            moved.append(middle)
+            overlaps.append(0)
+            previous = middle
+        return moved, overlaps
+
+
+def _gray(image: Image.Image, box: tuple[int, int, int, int] | None = None) -> np.ndarray:
+    if box is not None:
+        image = image.crop(box)
+    return np.asarray(image.convert("L"))
+
+
+def _exact_bounds(gray: np.ndarray, threshold: int) -> tuple[int, int, int, int] | None:
+    row_min = gray.min(axis=1)
+    top = _first_below(row_min, threshold)
+    if top is None:
+        return None
+    bottom = _last_below(row_min, threshold)
+    col_min = gray[top : bottom + 1].min(axis=0)
+    return _first_below(col_min, threshold), top, _last_below(col_min, threshold), bottom
+
+
+def _first_below(profile: np.ndarray, threshold: int) -> int | None:
+    hits = np.flatnonzero(profile < threshold)
+    return int(hits[0]) if hits.size else None
+
+
+def _last_below(profile: np.ndarray, threshold: int) -> int | None:
+    hits = np.flatnonzero(profile < threshold)
+    return int(hits[-1]) if hits.size else None
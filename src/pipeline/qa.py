@@ -1,11 +1,57 @@
 from __future__ import annotations
 
-from typing import List
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, List, Sequence
 
 from .config import PipelineConfig
 from .models import CaptionResult, OCRDocument, QAResult
 
 
+def normalize_text(text: str) -> str:
+    """NFC-normalize, lowercase and collapse runs of whitespace to one space."""
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+# Span texts (headers, footers, table labels) repeat across pages; captions do not.
+_normalize_span = lru_cache(maxsize=65536)(normalize_text)
+
+
+class CaptionMatcher:
+    """Substring lookups of many span texts in one normalized caption.
+
+    Long captions get an index of all their *GRAM*-character substrings; a
+    span is only searched for in full if its first, middle and last grams are
+    all in the index, which rejects almost every absent span in O(1). Short
+    captions are searched directly, which is cheaper than building the index.
+    """
+
+    GRAM = 8
+    INDEX_MIN_LENGTH = 512
+
+    def __init__(self, caption: str) -> None:
+        self.text = normalize_text(caption)
+        size = self.GRAM
+        self.grams = (
+            {self.text[i : i + size] for i in range(len(self.text) - size + 1)}
+            if len(self.text) >= self.INDEX_MIN_LENGTH
+            else None
+        )
+
+    def contains(self, normalized: str) -> bool:
+        """Whether *normalized* (see :func:`normalize_text`) occurs in the caption."""
+        size = self.GRAM
+        if self.grams is not None and len(normalized) >= size:
+            middle = (len(normalized) - size) // 2
+            if (
+                normalized[:size] not in self.grams
+                or normalized[-size:] not in self.grams
+                or normalized[middle : middle + size] not in self.grams
+            ):
+                return False
+        return normalized in self.text
+
+
 class QualityAssurance:
     """Rule-based QA checks for generated annotations."""
 
@@ -13,20 +59,59 @@ class QualityAssurance:
         self.config = config
 
     def evaluate(self, document: OCRDocument, caption: CaptionResult) -> QAResult:
+        return self.check(
+            document.texts.strings,
+            document.texts.confidences.tolist(),
+            bool(document.tables),
+            caption.caption,
+        )
+
+    def evaluate_many(
+        self, items: Iterable[tuple[OCRDocument, CaptionResult]]
+    ) -> List[QAResult]:
+        """Evaluate several ``(document, caption)`` pairs, one :meth:`evaluate` each.
+
+        A convenience only: captions differ per page, so nothing is shared
+        across the batch beyond the cached span normalization.
+        """
+        return [self.evaluate(document, caption) for document, caption in items]
+
+    def evaluate_record(self, data: dict) -> QAResult:
+        """Evaluate a record given as ``DatasetRecord.to_dict()`` output.
+
+        Works on the plain dict, so re-running QA over an annotations file
+        does not rebuild OCR documents.
+        """
+        texts = data["ocr"]["texts"]
+        return self.check(
+            [span["text"] for span in texts],
+            [span["confidence"] for span in texts],
+            bool(data["ocr"]["tables"]),
+            data["caption"]["text"],
+        )
+
+    def check(
+        self,
+        texts: Sequence[str],
+        confidences: Sequence[float],
+        has_tables: bool,
+        caption: str,
+    ) -> QAResult:
         warnings: List[str] = []
         blocking: List[str] = []
 
-        caption_text = caption.caption.lower()
+        matcher = CaptionMatcher(caption)
+        min_confidence = self.config.min_ocr_confidence
 
-        for span in document.texts:
-            if span.confidence < self.config.min_ocr_confidence:
-                warnings.append(f"Đoạn chữ '{span.text}' có độ tin cậy thấp ({span.confidence:.2f}).")
+        for text, confidence in zip(texts, confidences):
+            if confidence < min_confidence:
+                warnings.append(f"Đoạn chữ '{text}' có độ tin cậy thấp ({confidence:.2f}).")
                 continue
-            normalized = span.text.strip().lower()
-            if normalized and normalized not in caption_text:
-                blocking.append(f"Caption chưa nhắc đến đoạn chữ: '{span.text}'.")
+            normalized = _normalize_span(text)
+            if normalized and not matcher.contains(normalized):
+                blocking.append(f"Caption chưa nhắc đến đoạn chữ: '{text}'.")
 
-        if document.tables and "bảng" not in caption_text:
+        if has_tables and not matcher.contains("bảng"):
             blocking.append("Caption chưa mô tả bảng biểu trong ảnh.")
 
         return QAResult(warnings=warnings, blocking_issues=blocking)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import io
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, Type
+
+from PIL import Image
+
+
+class Rasterizer:
+    """Renders PDF pages to decoded PIL images."""
+
+    name = ""
+
+    def __init__(self, thread_count: int = 1) -> None:
+        self.thread_count = thread_count
+
+    def page_count(self, pdf_path: Path) -> int:
+        raise NotImplementedError
+
+    def render(
+        self, pdf_path: Path, first_page: int, last_page: int, *, dpi: int
+    ) -> Iterator[Image.Image]:
+        """Yield pages *first_page*..*last_page* (1-based, inclusive) as RGB images."""
+        raise NotImplementedError
+
+
+class Pdf2ImageRasterizer(Rasterizer):
+    """pdf2image wrapper; shells out to ``pdftoppm`` through a temporary directory."""
+
+    name = "pdf2image"
+
+    def page_count(self, pdf_path: Path) -> int:
+        from pdf2image import pdfinfo_from_path
+
+        info = pdfinfo_from_path(pdf_path)
+        return int(info.get("Pages", 0))
+
+    def render(
+        self, pdf_path: Path, first_page: int, last_page: int, *, dpi: int
+    ) -> Iterator[Image.Image]:
+        from pdf2image import convert_from_path
+
+        images = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            first_page=first_page,
+            last_page=last_page,
+            thread_count=self.thread_count,
+        )
+        while images:
+            yield images.pop(0)
+
+
+class PyMuPDFRasterizer(Rasterizer):
+    """In-process rendering with PyMuPDF; no subprocesses or temporary files."""
+
+    name = "pymupdf"
+
+    def page_count(self, pdf_path: Path) -> int:
+        import pymupdf
+
+        with pymupdf.open(pdf_path) as document:
+            return document.page_count
+
+    def render(
+        self, pdf_path: Path, first_page: int, last_page: int, *, dpi: int
+    ) -> Iterator[Image.Image]:
+        import pymupdf
+
+        with pymupdf.open(pdf_path) as document:
+            for index in range(first_page - 1, min(last_page, document.page_count)):
+                pixmap = document[index].get_pixmap(dpi=dpi, alpha=False)
+                yield Image.frombytes(
+                    "RGB", (pixmap.width, pixmap.height), pixmap.samples
+                )
+
+
+class PdftoppmRasterizer(Rasterizer):
+    """Calls poppler's ``pdftoppm`` directly and reads the PPM stream from stdout."""
+
+    name = "pdftoppm"
+
+    def page_count(self, pdf_path: Path) -> int:
+        output = subprocess.run(
+            [self._binary("pdfinfo"), str(pdf_path)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        for line in output.splitlines():
+            key, _, value = line.partition(":")
+            if key.strip() == "Pages":
+                return int(value.strip())
+        return 0
+
+    def render(
+        self, pdf_path: Path, first_page: int, last_page: int, *, dpi: int
+    ) -> Iterator[Image.Image]:
+        binary = self._binary("pdftoppm")
+        for page in range(first_page, last_page + 1):
+            # -singlefile lets pdftoppm stream one PPM to stdout instead of a file.
+            output = subprocess.run(
+                [
+                    binary,
+                    "-r",
+                    str(dpi),
+                    "-f",
+                    str(page),
+                    "-l",
+                    str(page),
+                    "-singlefile",
+                    str(pdf_path),
+                ],
+                check=True,
+                capture_output=True,
+            ).stdout
+            image = Image.open(io.BytesIO(output))
+            image.load()
+            yield image.convert("RGB")
+
+    def _binary(self, name: str) -> str:
+        path = shutil.which(name)
+        if path is None:
+            raise RuntimeError(f"{name} not found; install poppler-utils")
+        return path
+
+
+RASTERIZERS: Dict[str, Type[Rasterizer]] = {
+    cls.name: cls
+    for cls in (Pdf2ImageRasterizer, PyMuPDFRasterizer, PdftoppmRasterizer)
+}
+
+
+def get_rasterizer(name: str, thread_count: int = 1) -> Rasterizer:
+    """Instantiate the rasterizer registered under *name*."""
+    try:
+        return RASTERIZERS[name](thread_count=thread_count)
+    except KeyError:
+        raise ValueError(
+            f"Unknown rasterizer {name!r}; expected one of {sorted(RASTERIZERS)}"
+        ) from None
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+from collections import defaultdict
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from operator import itemgetter
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Sequence, Set, Tuple
+
+from .annotations import RecordKey
+
+LOGGER = logging.getLogger(__name__)
+
+
+def shard_of(pdf_path: Path, raw_dir: Path, shard_count: int) -> int:
+    """Return the shard that processes *pdf_path*.
+
+    The hash is taken over the path relative to *raw_dir*, so every node
+    agrees on the assignment regardless of where the corpus is mounted, and
+    adding PDFs never moves existing ones to another shard.
+    """
+    name = corpus_name(pdf_path, raw_dir)
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def select_shard(
+    pdf_files: Sequence[Path], raw_dir: Path, shard_index: int, shard_count: int
+) -> List[Path]:
+    if shard_count <= 1:
+        return list(pdf_files)
+    return [path for path in pdf_files if shard_of(path, raw_dir, shard_count) == shard_index]
+
+
+def shard_path(path: Path, shard_index: int, shard_count: int) -> Path:
+    """``annotations.jsonl`` -> ``annotations.shard-00002-of-00008.jsonl``.
+
+    Unsharded runs (*shard_count* of 1) keep *path* unchanged.
+    """
+    if shard_count <= 1:
+        return path
+    return path.with_name(
+        f"{path.stem}.shard-{shard_index:05d}-of-{shard_count:05d}{path.suffix}"
+    )
+
+
+def validate_shard_args(shard_index: int, shard_count: int) -> None:
+    if shard_count < 1:
+        raise ValueError(f"shard count must be at least 1, got {shard_count}")
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard index {shard_index} is outside 0..{shard_count - 1}")
+
+
+@dataclass(slots=True)
+class MergeReport:
+    """Outcome of :func:`merge_shards`; ``ok`` is False if any problem was found."""
+
+    records: int = 0
+    missing_shards: List[Path] = field(default_factory=list)
+    duplicates: List[RecordKey] = field(default_factory=list)
+    missing_pages: List[Tuple[str, int]] = field(default_factory=list)
+    unexpected_pages: List[Tuple[str, int]] = field(default_factory=list)
+    incomplete_splits: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (
+            self.missing_shards
+            or self.duplicates
+            or self.missing_pages
+            or self.unexpected_pages
+            or self.incomplete_splits
+        )
+
+    def problems(self) -> List[str]:
+        problems: List[str] = []
+        for path in self.missing_shards:
+            problems.append(f"missing shard output {path}")
+        for image_path, split_index in self.duplicates:
+            problems.append(f"duplicate record {image_path} (split {split_index})")
+        for pdf, page in self.missing_pages:
+            problems.append(f"missing page {page} of {pdf}")
+        for pdf, page in self.unexpected_pages:
+            problems.append(f"unexpected page {page} of {pdf}")
+        for pdf, page in self.incomplete_splits:
+            problems.append(f"split pieces missing for page {page} of {pdf}")
+        return problems
+
+
+def merge_shards(
+    shard_paths: Sequence[Path],
+    output_path: Path,
+    expected_pages: Dict[Path, int],
+    raw_dir: Path,
+) -> MergeReport:
+    """Combine shard annotation files into *output_path* and validate coverage.
+
+    Records are ordered by PDF (in *expected_pages* order), page number and
+    split index, so the merged file does not depend on how the corpus was
+    sharded. *expected_pages* maps each PDF to its page count; every page must
+    appear exactly once (as one record, or as split pieces ``1..split_count``).
+    PDFs are matched by their path relative to *raw_dir*, so shards run with
+    the corpus mounted elsewhere still line up. The output is only written when
+    validation passes.
+
+    Only the sort key and file offset of each record are held in memory; the
+    records themselves are streamed through a k-way merge of the shards.
+    """
+    report = MergeReport()
+    expected = {corpus_name(pdf, raw_dir): count for pdf, count in expected_pages.items()}
+    pdf_rank = {name: rank for rank, name in enumerate(expected)}
+    names = _NameResolver(expected, raw_dir)
+    seen: Set[RecordKey] = set()
+    pieces: Dict[Tuple[str, int], Set[int]] = defaultdict(set)
+    split_counts: Dict[Tuple[str, int], Set[int]] = defaultdict(set)
+    indexes: List[Tuple[Path, List[Tuple[Tuple[int, str, int, int], int]]]] = []
+
+    for path in shard_paths:
+        if not path.exists():
+            report.missing_shards.append(path)
+            continue
+        index: List[Tuple[Tuple[int, str, int, int], int]] = []
+        for offset, line in _read_lines(path):
+            data = json.loads(line)
+            key = (data["image_path"], data["split_index"])
+            if key in seen:
+                report.duplicates.append(key)
+                continue
+            seen.add(key)
+            name = names.resolve(data["parent_pdf"])
+            page = (name, data["page_number"])
+            pieces[page].add(data["split_index"])
+            if data["split_index"]:
+                split_counts[page].add(data.get("split_count", 0))
+            rank = pdf_rank.get(name, len(pdf_rank))
+            index.append(((rank, name, data["page_number"], data["split_index"]), offset))
+        index.sort()
+        indexes.append((path, index))
+
+    for name, page_count in expected.items():
+        for page in range(1, page_count + 1):
+            if (name, page) not in pieces:
+                report.missing_pages.append((name, page))
+    for (name, page), indices in sorted(pieces.items()):
+        if name not in expected or page > expected[name]:
+            report.unexpected_pages.append((name, page))
+        elif indices != {0} and not _complete_split(indices, split_counts[(name, page)]):
+            report.incomplete_splits.append((name, page))
+
+    report.records = len(seen)
+    if not report.ok:
+        return report
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with ExitStack() as stack, tmp_path.open("w", encoding="utf-8") as handle:
+        streams = [
+            _sorted_lines(stack.enter_context(path.open("rb")), index)
+            for path, index in indexes
+        ]
+        for _, line in heapq.merge(*streams, key=itemgetter(0)):
+            handle.write(line)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, output_path)
+    LOGGER.info("Merged %d records from %d shards into %s", len(seen), len(shard_paths), output_path)
+    return report
+
+
+def corpus_name(pdf_path: Path, raw_dir: Path) -> str:
+    """*pdf_path* relative to *raw_dir* (its file name if it lies elsewhere)."""
+    try:
+        return pdf_path.relative_to(raw_dir).as_posix()
+    except ValueError:
+        return pdf_path.name
+
+
+class _NameResolver:
+    """Maps a record's ``parent_pdf`` to the corpus name of an expected PDF.
+
+    A record written by a shard that saw the corpus under another mount point
+    is matched on the longest trailing part of its path that names an
+    expected PDF.
+    """
+
+    def __init__(self, expected: Dict[str, int], raw_dir: Path) -> None:
+        self.expected = expected
+        self.raw_dir = raw_dir
+        self._cache: Dict[str, str] = {}
+
+    def resolve(self, parent_pdf: str) -> str:
+        name = self._cache.get(parent_pdf)
+        if name is None:
+            name = self._cache[parent_pdf] = self._match(Path(parent_pdf))
+        return name
+
+    def _match(self, path: Path) -> str:
+        name = corpus_name(path, self.raw_dir)
+        if name in self.expected:
+            return name
+        parts = path.parts
+        for start in range(1, len(parts)):
+            suffix = "/".join(parts[start:])
+            if suffix in self.expected:
+                return suffix
+        return name
+
+
+def _complete_split(indices: Set[int], split_counts: Set[int]) -> bool:
+    """Whether split pieces *indices* cover their page.
+
+    Records carry the number of pieces the page was split into; records
+    written before they did can only be checked for gaps, not a missing
+    last piece.
+    """
+    if len(split_counts) != 1:
+        return False
+    (count,) = split_counts
+    if not count:
+        return indices == set(range(1, len(indices) + 1))
+    return indices == set(range(1, count + 1))
+
+
+def _sorted_lines(
+    handle: BinaryIO, index: List[Tuple[Tuple[int, str, int, int], int]]
+) -> Iterator[Tuple[Tuple[int, str, int, int], str]]:
+    """Lines of a shard in the order of its sorted *index* of ``(key, offset)``."""
+    for key, offset in index:
+        if handle.tell() != offset:
+            handle.seek(offset)
+        line = handle.readline().decode("utf-8")
+        yield key, line if line.endswith("\n") else line + "\n"
+
+
+def _read_lines(path: Path) -> Iterator[Tuple[int, str]]:
+    """``(byte offset, line)`` of every non-blank line of *path*."""
+    with path.open("rb") as handle:
+        offset = 0
+        for raw in handle:
+            if raw.strip():
+                yield offset, raw.decode("utf-8")
+            offset += len(raw)
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .models import BoundingBox, OCRDocument, TableContent, TextSpans
+
+SPLIT_MERGE_MODES = ("dedup", "page")
+
+# Two spans from different pieces are the same line when they overlap by at
+# least this fraction of the smaller one, both vertically and horizontally.
+MIN_OVERLAP = 0.5
+
+
+class YGrid:
+    """Buckets vertical intervals into fixed-height rows for overlap queries.
+
+    An interval is stored in every row it touches, so a query only looks at
+    items near it; with line-sized rows each span lands in one or two buckets
+    and dedup stays close to linear in the number of spans.
+    """
+
+    def __init__(self, cell: float) -> None:
+        self.cell = max(float(cell), 1.0)
+        self._rows: Dict[int, List[int]] = defaultdict(list)
+
+    def _span(self, top: float, bottom: float) -> range:
+        return range(int(top // self.cell), int(bottom // self.cell) + 1)
+
+    def insert(self, item: int, top: float, bottom: float) -> None:
+        for row in self._span(top, bottom):
+            self._rows[row].append(item)
+
+    def query(self, top: float, bottom: float) -> set[int]:
+        found: set[int] = set()
+        for row in self._span(top, bottom):
+            found.update(self._rows.get(row, ()))
+        return found
+
+
+def overlap_bands(pieces: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Page rows covered by more than one piece, given ``(offset, height)`` per piece."""
+    bands: List[Tuple[int, int]] = []
+    for (offset, height), (next_offset, _) in zip(pieces, pieces[1:]):
+        if next_offset < offset + height:
+            bands.append((next_offset, offset + height))
+    return bands
+
+
+def duplicate_spans(
+    boxes: np.ndarray,
+    confidences: np.ndarray,
+    piece_ids: np.ndarray,
+    bands: Sequence[Tuple[int, int]],
+) -> np.ndarray:
+    """Boolean mask of spans that repeat a better span from another piece.
+
+    *boxes* are ``(N, 4)`` page-coordinate ``left, top, right, bottom`` rows.
+    Only spans touching an overlap band can be duplicates. Among duplicates
+    the larger box wins (a line cut by the piece edge is smaller), then the
+    more confident one, then the earlier piece.
+    """
+    duplicate = np.zeros(len(boxes), dtype=bool)
+    if not len(boxes) or not bands:
+        return duplicate
+    left, top, right, bottom = boxes.T
+    in_band = np.zeros(len(boxes), dtype=bool)
+    for band_top, band_bottom in bands:
+        in_band |= (top < band_bottom) & (bottom > band_top)
+    candidates = np.flatnonzero(in_band)
+    if not candidates.size:
+        return duplicate
+
+    heights = bottom - top
+    widths = right - left
+    grid = YGrid(float(np.median(heights[candidates])) or 1.0)
+    # Best spans first; each later span is checked only against kept neighbours.
+    order = candidates[
+        np.lexsort(
+            (
+                piece_ids[candidates],
+                -confidences[candidates],
+                -(heights * widths)[candidates],
+            )
+        )
+    ]
+    for index in order.tolist():
+        for other in grid.query(top[index], bottom[index]):
+            if piece_ids[other] == piece_ids[index]:
+                continue
+            dy = min(bottom[index], bottom[other]) - max(top[index], top[other])
+            dx = min(right[index], right[other]) - max(left[index], left[other])
+            if (
+                dy >= MIN_OVERLAP * min(heights[index], heights[other])
+                and dx >= MIN_OVERLAP * min(widths[index], widths[other])
+            ):
+                duplicate[index] = True
+                break
+        else:
+            grid.insert(index, top[index], bottom[index])
+    return duplicate
+
+
+def merge_pieces(
+    documents: Sequence[OCRDocument], pieces: Sequence[Tuple[int, int]]
+) -> Tuple[OCRDocument, List[OCRDocument]]:
+    """Combine the OCR of a page's split pieces.
+
+    *pieces* holds the ``(offset, height)`` of each piece within the page.
+    Returns the page-level document, in page coordinates and with the spans
+    and tables of the overlap bands kept once, and the per-piece documents
+    with the same duplicates removed but coordinates left piece-local.
+    """
+    bands = overlap_bands(pieces)
+    sizes = [len(document.texts) for document in documents]
+    page_polygons = np.concatenate([document.texts.polygons for document in documents])
+    page_polygons[:, :, 1] += np.repeat(
+        np.asarray([offset for offset, _ in pieces], dtype=np.float64), sizes
+    )[:, None]
+    boxes = np.concatenate((page_polygons.min(axis=1), page_polygons.max(axis=1)), axis=1)
+    confidences = np.concatenate([document.texts.confidences for document in documents])
+    piece_ids = np.repeat(np.arange(len(documents)), sizes)
+    keep = ~duplicate_spans(boxes, confidences, piece_ids, bands)
+
+    strings = [text for document in documents for text in document.texts.strings]
+    page_tables, piece_tables = _merge_tables(documents, pieces, bands)
+    page = OCRDocument(
+        texts=TextSpans.from_arrays(
+            [text for text, kept in zip(strings, keep.tolist()) if kept],
+            page_polygons[keep],
+            confidences[keep],
+        ),
+        tables=page_tables,
+    )
+
+    trimmed: List[OCRDocument] = []
+    start = 0
+    for document, tables in zip(documents, piece_tables):
+        stop = start + len(document.texts)
+        piece_keep = keep[start:stop]
+        texts = document.texts.strings
+        trimmed.append(
+            OCRDocument(
+                texts=TextSpans.from_arrays(
+                    [text for text, kept in zip(texts, piece_keep.tolist()) if kept],
+                    document.texts.polygons[piece_keep],
+                    document.texts.confidences[piece_keep],
+                ),
+                tables=tables,
+            )
+        )
+        start = stop
+    return page, trimmed
+
+
+def _merge_tables(
+    documents: Sequence[OCRDocument],
+    pieces: Sequence[Tuple[int, int]],
+    bands: Sequence[Tuple[int, int]],
+) -> Tuple[List[TableContent], List[List[TableContent]]]:
+    """Shift table boxes to page coordinates and drop tables repeated in an overlap."""
+    entries = [
+        (piece, table, _shift(table.bbox, offset))
+        for piece, (document, (offset, _)) in enumerate(zip(documents, pieces))
+        for table in document.tables
+    ]
+    rects = [_rect(bbox) for _, _, bbox in entries]
+    boxes = np.asarray(
+        [rect or (0.0, 0.0, 0.0, 0.0) for rect in rects], dtype=np.float64
+    ).reshape(-1, 4)
+    duplicate = duplicate_spans(
+        boxes,
+        np.zeros(len(entries)),
+        np.asarray([piece for piece, _, _ in entries], dtype=np.int64),
+        bands,
+    ) & np.asarray([rect is not None for rect in rects], dtype=bool)
+
+    page_tables: List[TableContent] = []
+    piece_tables: List[List[TableContent]] = [[] for _ in documents]
+    for (piece, table, bbox), repeated in zip(entries, duplicate.tolist()):
+        if repeated:
+            continue
+        piece_tables[piece].append(table)
+        page_tables.append(
+            TableContent(rows=table.rows, cols=table.cols, cells=table.cells, bbox=bbox)
+        )
+    return page_tables, piece_tables
+
+
+def _shift(bbox: BoundingBox | None, offset: int) -> BoundingBox | None:
+    """Move a table box down by *offset*, keeping its ``[x1, y1, x2, y2]`` or point form."""
+    if bbox is None:
+        return None
+    points = np.asarray(bbox.points)
+    if points.shape == (4,):
+        points = points + (0, offset, 0, offset)
+    elif points.ndim == 2 and points.shape[1] >= 2:
+        points = points.copy()
+        points[:, 1] += offset
+    else:
+        return bbox
+    return BoundingBox(points=points.tolist())
+
+
+def _rect(bbox: BoundingBox | None) -> Tuple[float, float, float, float] | None:
+    """``left, top, right, bottom`` of a table box."""
+    if bbox is None:
+        return None
+    points = np.asarray(bbox.points, dtype=np.float64)
+    if points.shape == (4,):
+        return tuple(points.tolist())
+    if points.ndim == 2 and points.shape[1] >= 2:
+        return (
+            float(points[:, 0].min()),
+            float(points[:, 1].min()),
+            float(points[:, 0].max()),
+            float(points[:, 1].max()),
+        )
+    return None
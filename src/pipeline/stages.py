@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+from .metrics import PipelineMetrics
+
+_STOP = object()
+_POLL_SECONDS = 0.1
+
+
+class _Failure:
+    """Carries an exception downstream in place of the item that raised it."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+@dataclass(slots=True)
+class Stage:
+    """One step of a :class:`StagePipeline`, run by *workers* threads.
+
+    Either *fn* maps one input to one output, or *batch_fn* maps a list of
+    *batch_size* inputs to a list of outputs in the same order. A worker waits
+    until it has a full batch; only the last batch of a run can be smaller.
+    """
+
+    name: str
+    fn: Callable[[Any], Any] | None = None
+    batch_fn: Callable[[List[Any]], List[Any]] | None = None
+    workers: int = 1
+    batch_size: int = 1
+
+
+class StagePipeline:
+    """Runs stages concurrently, connected by bounded queues.
+
+    The source iterable is consumed on its own thread, every stage has its own
+    worker threads, and each queue holds at most *queue_size* items, so a slow
+    stage throttles the ones before it instead of letting work pile up in
+    memory. Results are yielded in source order; the first exception raised
+    by the source or a stage is re-raised in that order too.
+
+    With *metrics*, every stage call and every item pulled from the source
+    (timed as *source_name*) is recorded there.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        queue_size: int = 4,
+        metrics: PipelineMetrics | None = None,
+        source_name: str = "source",
+    ) -> None:
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self.metrics = metrics
+        self.source_name = source_name
+        self.queues: List[queue.Queue] = []
+
+    def queue_depths(self) -> dict:
+        """Current number of items waiting in front of each stage (and the output)."""
+        names = [stage.name for stage in self.stages] + ["output"]
+        return {name: q.qsize() for name, q in zip(names, self.queues)}
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        cancel = threading.Event()
+        self.queues = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        consumers = [max(1, stage.workers) for stage in self.stages] + [1]
+        threads = [
+            threading.Thread(
+                target=self._feed,
+                args=(source, self.queues[0], cancel, consumers[0]),
+                name="stage-source",
+                daemon=True,
+            )
+        ]
+        for index, stage in enumerate(self.stages):
+            remaining = [consumers[index]]
+            lock = threading.Lock()
+            for number in range(consumers[index]):
+                threads.append(
+                    threading.Thread(
+                        target=self._work,
+                        args=(
+                            stage,
+                            self.queues[index],
+                            self.queues[index + 1],
+                            cancel,
+                            remaining,
+                            lock,
+                            consumers[index + 1],
+                        ),
+                        name=f"stage-{stage.name}-{number}",
+                        daemon=True,
+                    )
+                )
+        for thread in threads:
+            thread.start()
+
+        try:
+            buffered: dict = {}
+            next_seq = 0
+            while True:
+                item = _get(self.queues[-1], cancel)
+                if item is _STOP:
+                    break
+                seq, payload = item
+                buffered[seq] = payload
+                while next_seq in buffered:
+                    payload = buffered.pop(next_seq)
+                    next_seq += 1
+                    if isinstance(payload, _Failure):
+                        raise payload.error
+                    yield payload
+        finally:
+            # Also reached when the consumer stops early or a stage failed.
+            cancel.set()
+            for thread in threads:
+                thread.join()
+
+    def _feed(
+        self, source: Iterable[Any], out_q: queue.Queue, cancel: threading.Event, consumers: int
+    ) -> None:
+        iterator = iter(source)
+        seq = 0
+        try:
+            while True:
+                wall_start, cpu_start = time.perf_counter(), time.thread_time()
+                item = next(iterator, _STOP)
+                if item is _STOP:
+                    break
+                if self.metrics is not None:
+                    self.metrics.record(
+                        self.source_name,
+                        time.perf_counter() - wall_start,
+                        time.thread_time() - cpu_start,
+                    )
+                if not _put(out_q, (seq, item), cancel):
+                    return
+                seq += 1
+        except BaseException as exc:
+            _put(out_q, (seq, _Failure(exc)), cancel)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            for _ in range(consumers):
+                _put(out_q, _STOP, cancel)
+
+    def _work(
+        self,
+        stage: Stage,
+        in_q: queue.Queue,
+        out_q: queue.Queue,
+        cancel: threading.Event,
+        remaining: List[int],
+        lock: threading.Lock,
+        consumers: int,
+    ) -> None:
+        try:
+            stopped = False
+            while not stopped:
+                item = _get(in_q, cancel)
+                if item is _STOP:
+                    break
+                batch = [item]
+                while len(batch) < max(1, stage.batch_size):
+                    # Wait for a full batch; only the end of the input cuts one short.
+                    extra = _get(in_q, cancel)
+                    if extra is _STOP:
+                        # Each worker receives exactly one stop marker: finish this batch.
+                        stopped = True
+                        break
+                    batch.append(extra)
+                for result in self._apply(stage, batch):
+                    if not _put(out_q, result, cancel):
+                        return
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(consumers):
+                    _put(out_q, _STOP, cancel)
+
+    def _apply(self, stage: Stage, batch: List[tuple]) -> List[tuple]:
+        live = [(seq, payload) for seq, payload in batch if not isinstance(payload, _Failure)]
+        outputs: dict = {}
+        if stage.batch_fn is not None:
+            try:
+                results = self._call(stage, stage.batch_fn, [payload for _, payload in live], len(live))
+            except Exception as exc:
+                results = [_Failure(exc)] * len(live)
+            outputs = {seq: result for (seq, _), result in zip(live, results)}
+        else:
+            for seq, payload in live:
+                try:
+                    outputs[seq] = self._call(stage, stage.fn, payload, 1)
+                except Exception as exc:
+                    outputs[seq] = _Failure(exc)
+        return [(seq, outputs.get(seq, payload)) for seq, payload in batch]
+
+    def _call(self, stage: Stage, fn: Callable[[Any], Any], arg: Any, items: int) -> Any:
+        if self.metrics is None:
+            return fn(arg)
+        with self.metrics.time(stage.name, items):
+            return fn(arg)
+
+
+def _put(q: queue.Queue, item: Any, cancel: threading.Event) -> bool:
+    while not cancel.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, cancel: threading.Event) -> Any:
+    while not cancel.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _STOP
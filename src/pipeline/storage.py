@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+from .metrics import PipelineMetrics
+
+IMAGE_FORMATS = ("png", "webp", "tiff", "npy")
+
+
+@dataclass(frozen=True, slots=True)
+class ImageCodec:
+    """How page images are encoded on disk; the format also picks the file suffix.
+
+    ``png`` is the default (zlib level *png_compress_level*, plus an extra
+    filter search with *png_optimize*); ``webp`` is lossless WebP, usually
+    the smallest; ``tiff`` (uncompressed) and ``npy`` (raw array) are the
+    fastest to write and read, for scratch directories where size does not
+    matter. Every format is lossless, so OCR sees the same pixels.
+    """
+
+    format: str = "png"
+    png_compress_level: int = 6
+    png_optimize: bool = False
+
+    def __post_init__(self) -> None:
+        if self.format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"Unknown image format {self.format!r}; choose from {', '.join(IMAGE_FORMATS)}"
+            )
+
+    @property
+    def suffix(self) -> str:
+        return ".tif" if self.format == "tiff" else f".{self.format}"
+
+    def __call__(self, image: Image.Image, path: Path) -> None:
+        """Encode *image* to *path*; makes a codec usable as a converter ``save``."""
+        if self.format == "png":
+            image.save(
+                path, "PNG", compress_level=self.png_compress_level, optimize=self.png_optimize
+            )
+        elif self.format == "webp":
+            image.save(path, "WEBP", lossless=True)
+        elif self.format == "tiff":
+            image.save(path, "TIFF", compression="raw")
+        else:
+            with path.open("wb") as handle:
+                np.save(handle, np.asarray(image))
+
+
+def load_image(path: Path) -> Image.Image:
+    """Decode a page image written by any :class:`ImageCodec` as RGB."""
+    if path.suffix == ".npy":
+        return Image.fromarray(np.load(path)).convert("RGB")
+    with Image.open(path) as image:
+        return image.convert("RGB")
+
+
+class EncodeStats:
+    """Images, bytes and encode time of an :class:`ImageWriter`, updated as writes finish."""
+
+    def __init__(self) -> None:
+        self.images = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, size: int, seconds: float) -> None:
+        with self._lock:
+            self.images += 1
+            self.bytes += size
+            self.seconds += seconds
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            images = self.images
+            return {
+                "images": images,
+                "bytes": self.bytes,
+                "encode_s": round(self.seconds, 6),
+                "bytes_per_image": round(self.bytes / images) if images else None,
+                "encode_ms_per_image": round(self.seconds * 1000 / images, 3) if images else None,
+            }
+
+
+class ImageWriter:
+    """Encodes and writes page images on a background thread pool.
+
+    Operations on the same path run in submission order, so a page that is
+    written and then replaced or deleted by a later stage ends up in the final
+    state. ``max_workers=0`` performs every write synchronously. Encoding time
+    and output size are tallied in :attr:`stats` (and reported to *metrics*
+    as the ``encode`` stage and ``encoded_bytes`` counter when set).
+    """
+
+    def __init__(self, max_workers: int = 2, codec: ImageCodec | None = None) -> None:
+        self.codec = codec or ImageCodec()
+        self.stats = EncodeStats()
+        self.metrics: PipelineMetrics | None = None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-writer")
+            if max_workers > 0
+            else None
+        )
+        self._pending: Dict[Path, Future] = {}
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+
+    def save(self, image: Image.Image, path: Path) -> None:
+        self._submit(path, lambda: self._encode(image, path))
+
+    def discard(self, path: Path) -> None:
+        self._submit(path, lambda: path.unlink(missing_ok=True))
+
+    def flush(self) -> None:
+        """Block until every submitted operation has finished."""
+        while True:
+            with self._lock:
+                pending = [future for future in self._pending.values() if not future.done()]
+            if not pending:
+                break
+            wait(pending)
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def _encode(self, image: Image.Image, path: Path) -> None:
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        self.codec(image, path)
+        wall = time.perf_counter() - wall_start
+        size = path.stat().st_size
+        self.stats.add(size, wall)
+        if self.metrics is not None:
+            self.metrics.record("encode", wall, time.thread_time() - cpu_start)
+            self.metrics.count("encoded_bytes", size)
+
+    def _submit(self, path: Path, operation: Callable[[], None]) -> None:
+        if self._executor is None:
+            operation()
+            return
+        with self._lock:
+            previous = self._pending.get(path)
+            future = self._executor.submit(self._run, previous, operation)
+            self._pending[path] = future
+        future.add_done_callback(lambda done: self._finish(path, done))
+
+    def _run(self, previous: Future | None, operation: Callable[[], None]) -> None:
+        if previous is not None:
+            # Submitted earlier, so it is already running or ahead of us in the queue.
+            previous.exception()
+        try:
+            operation()
+        except Exception as exc:
+            with self._lock:
+                self._errors.append(exc)
+
+    def _finish(self, path: Path, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+
+
+def image_digest(image: Image.Image) -> str:
+    """Hash the decoded pixels of *image*, independent of how it was encoded."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.width}x{image.height}".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
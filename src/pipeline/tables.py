@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import re
+from html import unescape
+from typing import Dict, List, Set
+
+from .models import BoundingBox, TableCell, TableContent
+
+# Part of the OCR cache key: cached documents hold parsed tables, not their HTML.
+TABLE_PARSER_VERSION = 2
+
+# Browsers clamp spans to these limits; anything larger is a recognition glitch.
+_MAX_COLSPAN = 1000
+_MAX_ROWSPAN = 65534
+
+# One token per match: a start/end tag (quoted attribute values may contain
+# ">"), a comment, or a run of text. A "<" that cannot start a tag is text.
+_TOKEN = re.compile(
+    r"""<(/?)([a-zA-Z][^\s/>]*)((?:"[^"]*"|'[^']*'|[^'">])*)>"""
+    r"""|<!.*?(?:>|$)"""
+    r"""|([^<]+(?:<(?![a-zA-Z/!])[^<]*)*|<)""",
+    re.S,
+)
+_SPAN_ATTR = re.compile(r"""\b(rowspan|colspan)\s*=\s*["']?\s*(\d+)""", re.I)
+
+
+class _Grid:
+    """Places cells on the table grid as they are read.
+
+    Each cell takes the next column of its row not already covered by a
+    ``rowspan`` from an earlier row, and covers ``rowspan`` x ``colspan`` slots.
+    """
+
+    __slots__ = ("cells", "cols", "row", "col", "_covered")
+
+    def __init__(self) -> None:
+        self.cells: List[TableCell] = []
+        self.cols = 0
+        self.row = -1
+        self.col = 0
+        self._covered: Dict[int, Set[int]] = {}
+
+    def next_row(self) -> None:
+        self.row += 1
+        self.col = 0
+
+    def place(self, text: str, row_span: int, col_span: int) -> None:
+        if self.row < 0:
+            # Cell outside any row: start one, as browsers do.
+            self.row = 0
+        row, col = self.row, self.col
+        covered = self._covered.get(row)
+        if covered:
+            while col in covered:
+                col += 1
+        for below in range(row + 1, row + row_span):
+            self._covered.setdefault(below, set()).update(range(col, col + col_span))
+        self.col = col + col_span
+        self.cols = max(self.cols, self.col)
+        self.cells.append(
+            TableCell(row=row, col=col, text=text, row_span=row_span, col_span=col_span)
+        )
+
+    def finish(self, bbox: BoundingBox | None) -> TableContent:
+        rows = self.row + 1
+        # A rowspan cannot reach past the last row of the table.
+        for cell in self.cells:
+            cell.row_span = min(cell.row_span, rows - cell.row)
+        return TableContent(rows=rows, cols=self.cols, cells=self.cells, bbox=bbox)
+
+
+def _spans(attrs: str) -> tuple[int, int]:
+    row_span = col_span = 1
+    for name, value in _SPAN_ATTR.findall(attrs):
+        if name.lower() == "rowspan":
+            row_span = min(max(int(value), 1), _MAX_ROWSPAN)
+        else:
+            col_span = min(max(int(value), 1), _MAX_COLSPAN)
+    return row_span, col_span
+
+
+def parse_table_html(html: str, bbox: BoundingBox | None = None) -> TableContent:
+    """Parse the ``<table>`` HTML that PPStructure emits into a span-aware table.
+
+    A single streaming pass over the tokens, without building a document
+    tree. Cell text is joined like BeautifulSoup's ``get_text(" ", strip=True)``;
+    cells left open are closed by the next cell, row or table end; tables
+    nested inside a cell only contribute their text to that cell.
+    """
+    grid = _Grid()
+    depth = 0
+    # (row_span, col_span) of the open cell, and its text pieces.
+    cell: tuple[int, int] | None = None
+    text: List[str] = []
+
+    for match in _TOKEN.finditer(html):
+        data = match.group(4)
+        if data is not None:
+            if cell is not None:
+                data = (unescape(data) if "&" in data else data).strip()
+                if data:
+                    text.append(data)
+            continue
+        tag = match.group(2)
+        if tag is None:
+            continue  # comment or doctype
+        tag = tag.lower()
+        closing = bool(match.group(1))
+        if tag == "table" and not closing:
+            depth += 1
+        if depth != 1 or tag not in ("td", "th", "tr", "table"):
+            if tag == "table" and closing:
+                depth = max(depth - 1, 0)
+            continue
+        if cell is not None and (tag != "table" or closing):
+            grid.place(" ".join(text), *cell)
+            cell, text = None, []
+        if closing:
+            if tag == "table":
+                depth -= 1
+        elif tag == "tr":
+            grid.next_row()
+        elif tag != "table":
+            cell = _spans(match.group(3))
+
+    if cell is not None:
+        grid.place(" ".join(text), *cell)
+    return grid.finish(bbox)
@@ -0,0 +1,38 @@
+import json
+
+from pipeline.annotations import load_completed_keys
+
+
+def _line(image_path, split_index=0):
+    return json.dumps({"image_path": image_path, "split_index": split_index}) + "\n"
+
+
+def test_missing_file_has_no_completed_keys(tmp_path):
+    assert load_completed_keys(tmp_path / "annotations.jsonl") == set()
+
+
+def test_complete_file_is_left_untouched(tmp_path):
+    path = tmp_path / "annotations.jsonl"
+    content = _line("a.png") + _line("b.png", 1) + _line("b.png", 2)
+    path.write_text(content, encoding="utf-8")
+
+    assert load_completed_keys(path) == {("a.png", 0), ("b.png", 1), ("b.png", 2)}
+    assert path.read_text(encoding="utf-8") == content
+
+
+def test_partial_trailing_line_is_truncated(tmp_path):
+    path = tmp_path / "annotations.jsonl"
+    complete = _line("a.png") + _line("b.png")
+    path.write_text(complete + '{"image_path": "c.png", "spl', encoding="utf-8")
+
+    assert load_completed_keys(path) == {("a.png", 0), ("b.png", 0)}
+    assert path.read_text(encoding="utf-8") == complete
+
+
+def test_unterminated_but_valid_last_line_is_truncated(tmp_path):
+    path = tmp_path / "annotations.jsonl"
+    complete = _line("a.png")
+    path.write_text(complete + _line("b.png").rstrip("\n"), encoding="utf-8")
+
+    assert load_completed_keys(path) == {("a.png", 0)}
+    assert path.read_text(encoding="utf-8") == complete
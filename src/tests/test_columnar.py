@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pipeline.columnar import ColumnarWriter, load_columns
+from pipeline.models import (
+    CaptionResult,
+    DatasetRecord,
+    ImageArtifact,
+    OCRDocument,
+    QAResult,
+    TableCell,
+    TableContent,
+)
+
+
+def _records():
+    records = []
+    for number, span_count in enumerate([2, 0, 3], start=1):
+        document = OCRDocument()
+        for index in range(span_count):
+            polygon = np.array([[0, 0], [40, 0], [40, 10], [0, 10]], dtype=np.float32) + index * 12.5
+            document.texts.add(f"dòng {number}.{index}", polygon, 0.5 + index / 10)
+        if number == 3:
+            document.tables.append(TableContent(rows=1, cols=1, cells=[TableCell(0, 0, "ô")]))
+        records.append(
+            DatasetRecord(
+                artifact=ImageArtifact(Path(f"img/p{number}.png"), Path("raw/a.pdf"), number),
+                ocr=document,
+                caption=CaptionResult(f"caption {number}", [f"dòng {number}.0"] if span_count else []),
+                qa=QAResult(blocking_issues=[] if span_count else ["no text"]),
+            )
+        )
+    return records
+
+
+def _write(path: Path, fmt: str):
+    records = _records()
+    # Two records per chunk so the output spans several batches/appends.
+    with ColumnarWriter(path, fmt, chunk_records=2) as writer:
+        for record in records:
+            writer.write(record)
+    return records
+
+
+def test_npy_round_trip(tmp_path):
+    records = _write(tmp_path / "out.columns", "npy")
+    columns = load_columns(tmp_path / "out.columns")
+
+    assert [columns["image_path"][i] for i in range(3)] == [str(r.artifact.image_path) for r in records]
+    assert columns["page_number"].tolist() == [1, 2, 3]
+    assert columns["qa_is_acceptable"].tolist() == [True, False, True]
+    assert json.loads(columns["supporting_sentences"][0]) == ["dòng 1.0"]
+    assert json.loads(columns["tables"][2]) == OCRDocument(tables=records[2].ocr.tables).to_dict()["tables"]
+
+    offsets = columns["span_offsets"].tolist()
+    assert offsets == [0, 2, 2, 5]
+    for row, record in enumerate(records):
+        start, end = offsets[row], offsets[row + 1]
+        assert [columns["span_text"][i] for i in range(start, end)] == record.ocr.texts.strings
+        np.testing.assert_array_equal(columns["span_bbox"][start:end], record.ocr.texts.polygons)
+        np.testing.assert_allclose(columns["span_confidence"][start:end], record.ocr.texts.confidences, rtol=1e-6)
+
+
+def test_arrow_round_trip(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    records = _write(tmp_path / "out.arrow", "arrow")
+    with pa.memory_map(str(tmp_path / "out.arrow")) as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    assert table.column("page_number").to_pylist() == [1, 2, 3]
+    assert table.column("span_text").to_pylist() == [r.ocr.texts.strings for r in records]
+    for boxes, record in zip(table.column("span_bbox").to_pylist(), records):
+        np.testing.assert_array_equal(np.array(boxes, dtype=np.float32).reshape(-1, 4, 2), record.ocr.texts.polygons)
+    assert table.column("qa_blocking_issues").to_pylist() == [[], ["no text"], []]
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from PIL import Image
+
+from pipeline.converter import convert_pdf_to_images, iter_pdf_pages
+from pipeline.rasterizers import Rasterizer
+
+
+class _FakeRasterizer(Rasterizer):
+    """Renders blank pages of a 5-page document and records each call."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    def page_count(self, pdf_path: Path) -> int:
+        return 5
+
+    def render(self, pdf_path, first_page, last_page, *, dpi):
+        self.calls.append((first_page, last_page))
+        for _ in range(first_page, last_page + 1):
+            yield Image.new("RGB", (8, 8), "white")
+
+
+def _convert(tmp_path: Path, rasterizer: Rasterizer, **options):
+    return convert_pdf_to_images(
+        tmp_path / "doc.pdf", tmp_path / "img", rasterizer=rasterizer, window=2, **options
+    )
+
+
+def test_existing_pages_are_not_rendered_again(tmp_path):
+    rasterizer = _FakeRasterizer()
+    paths = _convert(tmp_path, rasterizer)
+    assert [path.name for path in paths] == [f"doc_page_{page:03d}.png" for page in range(1, 6)]
+    assert rasterizer.calls == [(1, 2), (3, 4), (5, 5)]
+
+    rasterizer.calls.clear()
+    assert _convert(tmp_path, rasterizer) == paths
+    assert rasterizer.calls == []
+
+    paths[1].unlink()
+    paths[2].unlink()
+    paths[4].unlink()
+    assert _convert(tmp_path, rasterizer) == paths
+    assert rasterizer.calls == [(2, 3), (5, 5)]
+    assert all(path.exists() for path in paths)
+
+
+def test_cached_pages_count_as_present_and_overwrite_renders_all(tmp_path):
+    rasterizer = _FakeRasterizer()
+    paths = _convert(tmp_path, rasterizer, max_pages=3)
+    for path in paths:
+        path.unlink()
+
+    rasterizer.calls.clear()
+    pages = list(
+        iter_pdf_pages(
+            tmp_path / "doc.pdf",
+            tmp_path / "img",
+            rasterizer=rasterizer,
+            max_pages=3,
+            cached={paths[0], paths[2]},
+        )
+    )
+    assert rasterizer.calls == [(2, 2)]
+    assert [(path, image is None) for path, image in pages] == [
+        (paths[0], True), (paths[1], False), (paths[2], True)
+    ]
+
+    rasterizer.calls.clear()
+    _convert(tmp_path, rasterizer, max_pages=3, overwrite=True)
+    assert rasterizer.calls == [(1, 2), (3, 3)]
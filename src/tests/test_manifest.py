@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from pipeline.config import PipelineConfig
+from pipeline.manifest import PreprocessManifest
+from pipeline.models import ImageArtifact
+from pipeline.preprocess import MANIFEST_NAME, ImagePreprocessor
+from pipeline.storage import ImageWriter
+
+_PARAMS = {"split_height_ratio": 1.6, "autocrop_margin": 5}
+
+
+def _saved_manifest(tmp_path: Path) -> PreprocessManifest:
+    (tmp_path / "p.png").write_bytes(b"cropped page")
+    manifest = PreprocessManifest(tmp_path / MANIFEST_NAME)
+    manifest.record(tmp_path / "p.png", "hash-1", _PARAMS, [(tmp_path / "p.png", 0, 0)])
+    manifest.save()
+    return PreprocessManifest(tmp_path / MANIFEST_NAME)
+
+
+def test_lookup_misses_when_source_or_params_change(tmp_path):
+    manifest = _saved_manifest(tmp_path)
+    source = tmp_path / "p.png"
+
+    assert manifest.lookup(source, _PARAMS, "hash-1") is not None
+    assert manifest.lookup(source, _PARAMS) is not None
+    assert manifest.lookup(source, _PARAMS, "hash-2") is None
+    assert manifest.lookup(source, {**_PARAMS, "autocrop_margin": 0}) is None
+    assert manifest.lookup(tmp_path / "q.png", _PARAMS) is None
+    assert manifest.cached_sources(_PARAMS) == {source}
+    assert manifest.cached_sources({**_PARAMS, "autocrop_margin": 0}) == set()
+
+
+def test_rewritten_output_invalidates_entry(tmp_path):
+    manifest = _saved_manifest(tmp_path)
+    entry = manifest.lookup(tmp_path / "p.png", _PARAMS)
+    assert manifest.outputs_unchanged(entry)
+
+    (tmp_path / "p.png").write_bytes(b"re-rendered page")
+
+    assert not manifest.outputs_unchanged(entry)
+    assert manifest.cached_sources(_PARAMS) == set()
+
+
+def _page(label_top: int) -> Image.Image:
+    page = Image.new("RGB", (200, 200), "white")
+    ImageDraw.Draw(page).rectangle((20, label_top, 180, label_top + 30), fill="black")
+    return page
+
+
+def _process(config: PipelineConfig, page: Image.Image) -> ImageArtifact:
+    preprocessor = ImagePreprocessor(config, writer=ImageWriter(max_workers=0))
+    artifact = ImageArtifact(
+        image_path=config.image_output_dir / "a_page_001.png",
+        parent_pdf=config.raw_pdf_dir / "a.pdf",
+        page_number=1,
+        image=page,
+    )
+    (result,) = preprocessor.process(artifact)
+    preprocessor.save_manifest()
+    return result
+
+
+def test_preprocessor_redoes_pages_whose_source_or_params_changed(tmp_path):
+    config = PipelineConfig(raw_pdf_dir=tmp_path, image_output_dir=tmp_path / "img")
+    config.image_output_dir.mkdir()
+
+    assert _process(config, _page(20)).image is not None
+    # Same pixels and parameters: served from the manifest.
+    assert _process(config, _page(20)).image is None
+    # Different pixels under the same file name are preprocessed again.
+    assert _process(config, _page(100)).image is not None
+    assert _process(config, _page(100)).image is None
+    # So is the same page under different crop parameters.
+    wider = PipelineConfig(raw_pdf_dir=tmp_path, image_output_dir=tmp_path / "img", autocrop_margin=9)
+    result = _process(wider, _page(100))
+    assert result.image is not None
+    assert result.image.size == (160 + 1 + 18, 30 + 1 + 18)
@@ -0,0 +1,37 @@
+import json
+
+import numpy as np
+
+from pipeline.models import BoundingBox, OCRDocument, TextSpan, TextSpans
+
+_BOX = [[0.1, 0.2], [10.3, 0.2], [10.3, 5.7], [0.1, 5.7]]
+
+
+def test_text_spans_serialize_coordinates_unchanged():
+    document = OCRDocument()
+    document.texts.add("a", np.asarray(_BOX), 0.93)
+    square = BoundingBox(points=[[1, 2], [3, 2], [3, 4], [1, 4]])
+    document.texts.append(TextSpan(text="b", confidence=0.5, bbox=square))
+
+    data = document.to_dict()
+    assert data["texts"] == [
+        {"text": "a", "confidence": 0.93, "bbox": _BOX},
+        {"text": "b", "confidence": 0.5, "bbox": [[1, 2], [3, 2], [3, 4], [1, 4]]},
+    ]
+    assert '"bbox": [[0.1, 0.2], [10.3, 0.2]' in json.dumps(data)
+
+    restored = OCRDocument.from_dict(json.loads(json.dumps(data)))
+    assert restored.texts == document.texts
+    assert restored.to_dict() == data
+
+
+def test_text_spans_behave_like_a_span_list():
+    spans = TextSpans([TextSpan(text="a", confidence=0.9, bbox=BoundingBox(points=_BOX))])
+    spans.add("b", np.asarray(_BOX) + 10, 0.8)
+
+    assert len(spans) == 2
+    assert [span.text for span in spans] == ["a", "b"]
+    assert spans[0].bbox.points == _BOX
+    assert spans[-1].bbox.points == (np.asarray(_BOX) + 10).tolist()
+    assert [span.text for span in spans[1:]] == ["b"]
+    np.testing.assert_allclose(spans.centers[0], [5.2, 2.95])
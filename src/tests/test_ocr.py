@@ -0,0 +1,29 @@
+from dataclasses import replace
+
+import pytest
+
+from pipeline import PipelineConfig, ocr
+from pipeline.ocr import OCRService
+
+
+def test_layout_mode_rejected_without_ppstructure(monkeypatch):
+    monkeypatch.setattr(ocr, "engine_version", lambda package: "3.3.2")
+    config = replace(PipelineConfig(), ocr_mode="layout")
+    with pytest.raises(ValueError, match="--ocr-mode layout"):
+        OCRService(config)
+    # The default mode does not need PPStructure.
+    OCRService(replace(config, ocr_mode="separate"))
+
+
+def test_layout_mode_allowed_on_paddleocr_2(monkeypatch):
+    monkeypatch.setattr(ocr, "engine_version", lambda package: "2.7.3")
+    OCRService(replace(PipelineConfig(), ocr_mode="layout"))
+
+
+def test_stage_models_pinned_per_language():
+    config = PipelineConfig()
+    assert OCRService(config).stage_models() == ocr.STAGE_MODELS["vi"]
+    assert OCRService(config, language="xx").stage_models() == (None, None)
+    override = replace(config, ocr_rec_model="custom_rec")
+    assert OCRService(override, language="xx").stage_models() == (None, "custom_rec")
+    assert OCRService(override).stage_models() == ("PP-OCRv5_server_det", "custom_rec")
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from pipeline.models import OCRDocument
+from pipeline.ocr_cache import OCRCache
+
+
+def _document(text: str) -> OCRDocument:
+    document = OCRDocument()
+    document.texts.add(text, np.array([[0, 0], [10, 0], [10, 5], [0, 5]]), 0.9)
+    return document
+
+
+def _page(shade: int) -> Image.Image:
+    return Image.new("RGB", (8, 8), (shade, shade, shade))
+
+
+def test_hit_and_miss(tmp_path):
+    cache = OCRCache(tmp_path, {"language": "vi"}, max_bytes=1 << 20)
+    key = cache.key(_page(0))
+    assert cache.get(key) is None
+    cache.put(key, _document("xin chào"))
+    assert cache.get(key).texts.strings == ["xin chào"]
+    # Other pixels or other settings miss.
+    assert cache.get(cache.key(_page(1))) is None
+    other = OCRCache(tmp_path, {"language": "en"}, max_bytes=1 << 20)
+    assert other.get(other.key(_page(0))) is None
+
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    cache = OCRCache(tmp_path, {}, max_bytes=1 << 20)
+    keys = [cache.key(_page(shade)) for shade in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, _document("line"))
+        # Oldest first: keys[0] is the least recently used.
+        os.utime(cache._path(key), ns=(age * 10**9, age * 10**9))
+    entry_size = cache._path(keys[0]).stat().st_size
+    cache.get(keys[0])  # touching an entry makes it recent again
+
+    cache.max_bytes = 3 * entry_size
+    cache.put(cache.key(_page(3)), _document("line"))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache._size == sum(size for _, _, size in cache._entries())
+    assert cache._size <= cache.max_bytes
+
+
+def test_refreshed_entry_is_not_counted_twice(tmp_path):
+    cache = OCRCache(tmp_path, {}, max_bytes=1 << 20, refresh=True)
+    key = cache.key(_page(0))
+    for _ in range(5):
+        cache.put(key, _document("line"))
+    assert cache._size == cache._path(key).stat().st_size
@@ -0,0 +1,130 @@
+import numpy as np
+from PIL import Image, ImageDraw, ImageOps
+
+from pipeline.config import PipelineConfig
+from pipeline.models import ImageArtifact
+from pipeline.preprocess import ImagePreprocessor
+from pipeline.storage import ImageWriter
+
+
+def _tall_page() -> Image.Image:
+    page = Image.new("RGB", (300, 1200), "white")
+    draw = ImageDraw.Draw(page)
+    for top in range(40, 1160, 60):
+        draw.rectangle((30, top, 270, top + 20), fill="black")
+    return page
+
+
+def _run(config: PipelineConfig, names):
+    writer = ImageWriter(max_workers=0)
+    preprocessor = ImagePreprocessor(config, writer=writer)
+    results = []
+    for number, name in enumerate(names, start=1):
+        artifact = ImageArtifact(
+            image_path=config.image_output_dir / name,
+            parent_pdf=config.raw_pdf_dir / "a.pdf",
+            page_number=number,
+            image=_tall_page(),
+        )
+        results.append(preprocessor.process(artifact))
+    writer.flush()
+    preprocessor.save_manifest()
+    return results
+
+
+def test_page_mode_rerun_keeps_whole_pages(tmp_path):
+    config = PipelineConfig(
+        raw_pdf_dir=tmp_path / "raw", image_output_dir=tmp_path / "img", split_merge="page"
+    )
+    config.image_output_dir.mkdir()
+    names = ["a_page_001.png", "a_page_002.png"]
+
+    first = _run(config, names)
+    second = _run(config, names)
+
+    for name in names:
+        assert (config.image_output_dir / name).exists()
+    # The warm run is served from the manifest: same pieces, no decoded images.
+    assert [[piece.image_path for piece in page] for page in second] == [
+        [piece.image_path for piece in page] for page in first
+    ]
+    assert all(piece.image is None for page in second for piece in page)
+    assert [piece.split_count for piece in second[0]] == [len(first[0])] * len(first[0])
+
+
+def test_split_rerun_drops_stale_full_render(tmp_path):
+    config = PipelineConfig(raw_pdf_dir=tmp_path / "raw", image_output_dir=tmp_path / "img")
+    config.image_output_dir.mkdir()
+    _run(config, ["a_page_001.png"])
+    # A --convert-only run leaves the uncropped render behind.
+    _tall_page().save(config.image_output_dir / "a_page_001.png")
+
+    (pieces,) = _run(config, ["a_page_001.png"])
+
+    assert all(piece.image is None for piece in pieces)
+    assert not (config.image_output_dir / "a_page_001.png").exists()
+
+
+def _legacy_autocrop(image: Image.Image) -> Image.Image:
+    """The original full-page autocrop the stride-sampled version replaced."""
+    mask = np.array(image.convert("L")) < 245
+    if not mask.any():
+        return image
+    rows = np.where(mask.any(axis=1))[0]
+    cols = np.where(mask.any(axis=0))[0]
+    cropped = image.crop((cols[0], rows[0], cols[-1] + 1, rows[-1] + 1))
+    return ImageOps.expand(cropped, border=5, fill="white")
+
+
+def test_autocrop_matches_legacy_algorithm():
+    rng = np.random.default_rng(7)
+    pages = [Image.new("RGB", (120, 90), "white"), _tall_page()]
+    for _ in range(20):
+        page = Image.new("RGB", (int(rng.integers(20, 200)), int(rng.integers(20, 200))), "white")
+        draw = ImageDraw.Draw(page)
+        for _ in range(int(rng.integers(1, 4))):
+            # One-pixel strokes and edge-touching boxes fall between coarse samples.
+            x0, y0 = int(rng.integers(0, page.width)), int(rng.integers(0, page.height))
+            x1 = min(page.width - 1, x0 + int(rng.integers(0, 30)))
+            y1 = min(page.height - 1, y0 + int(rng.integers(0, 3)))
+            draw.rectangle((x0, y0, x1, y1), fill=(int(rng.integers(0, 245)),) * 3)
+        pages.append(page)
+
+    for stride in (1, 8):
+        preprocessor = ImagePreprocessor(
+            PipelineConfig(autocrop_stride=stride, preprocess_cache=False)
+        )
+        for page in pages:
+            expected = _legacy_autocrop(page)
+            assert preprocessor._autocrop(page).tobytes() == expected.tobytes()
+            assert preprocessor._autocrop(page).size == expected.size
+
+
+def _page_with_gutter(gutter: tuple[int, int] | None) -> Image.Image:
+    page = Image.new("RGB", (300, 600), "white")
+    draw = ImageDraw.Draw(page)
+    for top in range(0, 600, 10):
+        if gutter is None or not gutter[0] - 10 < top < gutter[1]:
+            draw.rectangle((10, top, 290, top + 9), fill="black")
+    return page
+
+
+def _split(tmp_path, page: Image.Image, split_mode: str):
+    config = PipelineConfig(image_output_dir=tmp_path, split_mode=split_mode, preprocess_cache=False)
+    preprocessor = ImagePreprocessor(config, writer=ImageWriter(max_workers=0))
+    artifact = ImageArtifact(image_path=tmp_path / "p.png", parent_pdf=tmp_path / "a.pdf", page_number=1)
+    return preprocessor._split_image(page, artifact)
+
+
+def test_gutter_split_cuts_in_the_middle_of_a_blank_band(tmp_path):
+    # Rows 250-269 are blank; the uniform cut would fall at row 300.
+    pieces = _split(tmp_path, _page_with_gutter((250, 270)), "gutter")
+    assert [(p.split_offset, p.image.height) for p in pieces] == [(0, 260), (260, 340)]
+
+    uniform = _split(tmp_path, _page_with_gutter((250, 270)), "uniform")
+    assert [(p.split_offset, p.image.height) for p in uniform] == [(0, 332), (268, 332)]
+
+
+def test_gutter_split_without_band_keeps_uniform_cut_and_overlap(tmp_path):
+    pieces = _split(tmp_path, _page_with_gutter(None), "gutter")
+    assert [(p.split_offset, p.image.height) for p in pieces] == [(0, 332), (268, 332)]
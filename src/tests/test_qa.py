@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import numpy as np
+
+from pipeline.config import PipelineConfig
+from pipeline.models import CaptionResult, DatasetRecord, ImageArtifact, OCRDocument, TableContent
+from pipeline.qa import CaptionMatcher, QualityAssurance, normalize_text
+
+_BOX = np.array([[0, 0], [10, 0], [10, 5], [0, 5]])
+
+
+def _long_caption() -> str:
+    words = [f"từ{index} Tiếng Việt" for index in range(80)]
+    return "  ".join(words) + " bảng số liệu"
+
+
+def test_matcher_agrees_with_substring_search():
+    for caption in ("Ảnh có  Tiêu Đề và bảng", _long_caption()):
+        matcher = CaptionMatcher(caption)
+        assert (matcher.grams is not None) == (len(matcher.text) >= CaptionMatcher.INDEX_MIN_LENGTH)
+        normalized = normalize_text(caption)
+        spans = [
+            "tiêu đề", "từ7 tiếng việt", "từ79 tiếng việt bảng", "tiếng việt từ3",
+            "từ1 tiếng việt từ2", "bảng số liệu", "vắng mặt", "t", normalized, normalized + "x",
+        ]
+        for span in spans:
+            assert matcher.contains(span) == (span in normalized), span
+
+
+def _pairs():
+    pairs = []
+    for texts, confidences, tables, caption in [
+        (["Tiêu  đề", "Chú thích"], [0.9, 0.3], False, "Ảnh có tiêu đề."),
+        (["từ5 tiếng việt", "không có"], [0.8, 0.9], True, _long_caption()),
+        ([], [], True, "Không nhắc tới gì"),
+    ]:
+        document = OCRDocument()
+        for text, confidence in zip(texts, confidences):
+            document.texts.add(text, _BOX, confidence)
+        if tables:
+            document.tables.append(TableContent(rows=1, cols=1))
+        pairs.append((document, CaptionResult(caption, [])))
+    return pairs
+
+
+def test_evaluate_many_and_evaluate_record_match_evaluate():
+    qa = QualityAssurance(PipelineConfig())
+    pairs = _pairs()
+    expected = [qa.evaluate(document, caption) for document, caption in pairs]
+    assert [result.blocking_issues for result in expected] == [
+        [],
+        ["Caption chưa nhắc đến đoạn chữ: 'không có'."],
+        ["Caption chưa mô tả bảng biểu trong ảnh."],
+    ]
+    assert expected[0].warnings == ["Đoạn chữ 'Chú thích' có độ tin cậy thấp (0.30)."]
+
+    assert qa.evaluate_many(pairs) == expected
+    for (document, caption), result in zip(pairs, expected):
+        artifact = ImageArtifact(image_path=Path("p.png"), parent_pdf=Path("a.pdf"), page_number=1)
+        record = DatasetRecord(artifact, document, caption, result)
+        assert qa.evaluate_record(record.to_dict()) == result
@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.fixtures import write_synthetic_scan_pdf
+from benchmarks.stub_ocr import install_stub_engines
+from pipeline.config import PipelineConfig
+from pipeline.pipeline import DatasetPipeline
+
+pytest.importorskip("fitz")
+
+
+def _run(config: PipelineConfig) -> list:
+    pipeline = DatasetPipeline(config)
+    install_stub_engines(pipeline.ocr_service)
+    return pipeline.run()
+
+
+def test_resume_redoes_a_partly_written_split_page(tmp_path):
+    config = PipelineConfig(
+        raw_pdf_dir=tmp_path / "raw",
+        image_output_dir=tmp_path / "img",
+        annotation_output_path=tmp_path / "annotations.jsonl",
+        dpi=100,
+        rasterizer="pymupdf",
+        split_height_ratio=0.5,
+        split_overlap=80,
+        split_merge="dedup",
+        ocr_cache=False,
+        metrics_output_path=None,
+        resume=True,
+    )
+    write_synthetic_scan_pdf(config.raw_pdf_dir / "scan.pdf", pages=1, dpi=100, seed=0)
+    _run(config)
+    lines = config.annotation_output_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) > 1
+
+    # A crash after the first piece of the page was written.
+    config.annotation_output_path.write_text(lines[0] + "\n", encoding="utf-8")
+    resumed = _run(config)
+
+    assert [record.artifact.split_index for record in resumed] == list(range(2, len(lines) + 1))
+    # The remaining pieces were merged against all their neighbours, as in the full run.
+    assert config.annotation_output_path.read_text(encoding="utf-8").splitlines() == lines
+    assert _run(config) == []
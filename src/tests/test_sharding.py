@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+
+from pipeline.sharding import merge_shards
+
+RAW = Path("/data/raw")
+
+
+def _record(pdf, page, split_index=0, split_count=0, root=RAW):
+    return json.dumps(
+        {
+            "image_path": f"{pdf}_{page:03d}_{split_index}.png",
+            "parent_pdf": str(root / pdf),
+            "page_number": page,
+            "split_index": split_index,
+            "split_count": split_count,
+        }
+    ) + "\n"
+
+
+def _shards(tmp_path, *contents):
+    paths = []
+    for index, lines in enumerate(contents):
+        path = tmp_path / f"annotations.shard-{index:05d}-of-{len(contents):05d}.jsonl"
+        path.write_text("".join(lines), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def _merged(path):
+    return [
+        (data["parent_pdf"], data["page_number"], data["split_index"])
+        for data in map(json.loads, path.read_text(encoding="utf-8").splitlines())
+    ]
+
+
+def test_merge_orders_records_across_shards(tmp_path):
+    shards = _shards(
+        tmp_path,
+        [_record("b.pdf", 1), _record("a.pdf", 2, 2, 2), _record("a.pdf", 2, 1, 2)],
+        [_record("a.pdf", 1)],
+    )
+    output = tmp_path / "annotations.jsonl"
+
+    report = merge_shards(shards, output, {RAW / "a.pdf": 2, RAW / "b.pdf": 1}, RAW)
+
+    assert report.ok, report.problems()
+    assert report.records == 4
+    assert _merged(output) == [
+        (str(RAW / "a.pdf"), 1, 0),
+        (str(RAW / "a.pdf"), 2, 1),
+        (str(RAW / "a.pdf"), 2, 2),
+        (str(RAW / "b.pdf"), 1, 0),
+    ]
+
+
+def test_missing_trailing_split_piece_fails(tmp_path):
+    shards = _shards(tmp_path, [_record("a.pdf", 1, 1, 3), _record("a.pdf", 1, 2, 3)])
+    output = tmp_path / "annotations.jsonl"
+
+    report = merge_shards(shards, output, {RAW / "a.pdf": 1}, RAW)
+
+    assert report.incomplete_splits == [("a.pdf", 1)]
+    assert not output.exists()
+
+
+def test_missing_duplicate_and_unexpected_pages_are_reported(tmp_path):
+    shards = _shards(
+        tmp_path,
+        [_record("a.pdf", 1), _record("a.pdf", 3)],
+        [_record("a.pdf", 1)],
+    )
+    missing_shard = tmp_path / "annotations.shard-00002-of-00003.jsonl"
+
+    report = merge_shards(
+        [*shards, missing_shard], tmp_path / "annotations.jsonl", {RAW / "a.pdf": 2}, RAW
+    )
+
+    assert report.missing_shards == [missing_shard]
+    assert report.duplicates == [("a.pdf_001_0.png", 0)]
+    assert report.missing_pages == [("a.pdf", 2)]
+    assert report.unexpected_pages == [("a.pdf", 3)]
+    assert not report.ok
+
+
+def test_records_from_another_mount_point_match_the_corpus(tmp_path):
+    other = Path("/mnt/node7/raw")
+    shards = _shards(
+        tmp_path, [_record("docs/a.pdf", 1, root=other)], [_record("b.pdf", 1, root=other)]
+    )
+
+    report = merge_shards(
+        shards, tmp_path / "annotations.jsonl", {RAW / "docs/a.pdf": 1, RAW / "b.pdf": 1}, RAW
+    )
+
+    assert report.ok, report.problems()
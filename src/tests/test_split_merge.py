@@ -0,0 +1,65 @@
+import numpy as np
+
+from pipeline.models import OCRDocument, TextSpans
+from pipeline.split_merge import merge_pieces, overlap_bands
+
+
+def _line(left, top, right, bottom):
+    return [[left, top], [right, top], [right, bottom], [left, bottom]]
+
+
+def _document(lines):
+    texts, boxes, scores = zip(*lines) if lines else ((), (), ())
+    return OCRDocument(
+        texts=TextSpans.from_arrays(
+            list(texts), np.asarray(boxes, dtype=np.float32).reshape(-1, 4, 2), list(scores)
+        )
+    )
+
+
+def test_overlap_bands():
+    assert overlap_bands([(0, 120), (100, 120), (220, 50)]) == [(100, 120)]
+    assert overlap_bands([(0, 100), (100, 100)]) == []
+
+
+def test_line_in_overlap_is_kept_once_in_page_coordinates():
+    # Pieces cover page rows 0-120 and 100-220; the line at page rows 105-115
+    # is read by both.
+    first = _document(
+        [("đầu trang", _line(10, 20, 200, 30), 0.9), ("chồng", _line(10, 105, 200, 115), 0.8)]
+    )
+    second = _document(
+        [("chồng", _line(10, 5, 200, 15), 0.95), ("cuối", _line(10, 60, 150, 70), 0.9)]
+    )
+
+    page, pieces = merge_pieces([first, second], [(0, 120), (100, 120)])
+
+    assert page.texts.strings == ["đầu trang", "chồng", "cuối"]
+    # The more confident copy (from the second piece) wins, shifted to page rows.
+    kept = page.texts.strings.index("chồng")
+    assert page.texts.confidences[kept] == np.float64(0.95)
+    assert page.texts.tops[kept] == 105
+    assert pieces[0].texts.strings == ["đầu trang"]
+    assert pieces[1].texts.strings == ["chồng", "cuối"]
+    # Per-piece documents keep piece-local coordinates.
+    assert pieces[1].texts.tops.tolist() == [5, 60]
+
+
+def test_cut_line_loses_to_the_whole_one():
+    # The first piece only sees the top half of the line; the larger box wins.
+    first = _document([("nửa", _line(10, 110, 200, 120), 0.99)])
+    second = _document([("cả dòng", _line(10, 10, 200, 25), 0.9)])
+
+    page, pieces = merge_pieces([first, second], [(0, 120), (100, 120)])
+
+    assert page.texts.strings == ["cả dòng"]
+    assert pieces[0].texts.strings == []
+
+
+def test_lines_outside_overlap_are_never_merged():
+    first = _document([("a", _line(10, 10, 100, 20), 0.9)])
+    second = _document([("a", _line(10, 10, 100, 20), 0.9)])
+
+    page, _ = merge_pieces([first, second], [(0, 100), (100, 100)])
+
+    assert page.texts.tops.tolist() == [10, 110]
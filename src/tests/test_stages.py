@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from pipeline.stages import Stage, StagePipeline
+
+
+def test_results_keep_source_order_with_parallel_workers():
+    def jitter(value):
+        # Later items finish first, so order must come from the reordering buffer.
+        time.sleep(0.001 * (value % 3))
+        return value * 2
+
+    stages = StagePipeline([Stage("double", fn=jitter, workers=4)], queue_size=2)
+
+    assert list(stages.run(range(40))) == [value * 2 for value in range(40)]
+
+
+def test_batch_stage_waits_for_full_batches():
+    sizes = []
+
+    def batch(values):
+        sizes.append(len(values))
+        return [value + 1 for value in values]
+
+    stages = StagePipeline(
+        [
+            Stage("slow", fn=lambda value: value, workers=2),
+            Stage("batch", batch_fn=batch, batch_size=8),
+        ],
+        queue_size=2,
+    )
+
+    assert list(stages.run(range(20))) == list(range(1, 21))
+    assert sizes == [8, 8, 4]
+
+
+def test_stage_exception_is_raised_in_source_order():
+    def fail_on_five(value):
+        if value == 5:
+            raise ValueError("bad item 5")
+        return value
+
+    results = []
+    stages = StagePipeline([Stage("check", fn=fail_on_five, workers=3)])
+    with pytest.raises(ValueError, match="bad item 5"):
+        for value in stages.run(range(20)):
+            results.append(value)
+
+    assert results == [0, 1, 2, 3, 4]
+
+
+def test_source_exception_propagates_and_stops_threads():
+    def source():
+        yield 1
+        yield 2
+        raise RuntimeError("source broke")
+
+    before = threading.active_count()
+    stages = StagePipeline([Stage("identity", fn=lambda value: value)])
+    with pytest.raises(RuntimeError, match="source broke"):
+        list(stages.run(source()))
+
+    assert threading.active_count() == before
+
+
+def test_batch_failure_fails_every_item_of_the_batch():
+    def batch(values):
+        raise KeyError("engine down")
+
+    stages = StagePipeline([Stage("ocr", batch_fn=batch, batch_size=4)])
+    with pytest.raises(KeyError):
+        list(stages.run(range(3)))
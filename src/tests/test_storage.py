@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pipeline.storage import IMAGE_FORMATS, ImageCodec, ImageWriter, image_digest, load_image
+
+
+def _page() -> Image.Image:
+    pixels = np.random.default_rng(3).integers(0, 256, size=(40, 30, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+@pytest.mark.parametrize("fmt", IMAGE_FORMATS)
+def test_codecs_are_lossless(tmp_path, fmt):
+    codec = ImageCodec(format=fmt, png_compress_level=1)
+    path = tmp_path / f"page{codec.suffix}"
+    codec(_page(), path)
+    assert image_digest(load_image(path)) == image_digest(_page())
+
+
+def test_codec_suffixes_and_unknown_format():
+    assert [ImageCodec(format=fmt).suffix for fmt in IMAGE_FORMATS] == [".png", ".webp", ".tif", ".npy"]
+    with pytest.raises(ValueError, match="Unknown image format"):
+        ImageCodec(format="jpeg")
+
+
+class _SlowCodec(ImageCodec):
+    def __call__(self, image, path):
+        time.sleep(0.05)
+        super().__call__(image, path)
+
+
+def test_writer_applies_operations_on_a_path_in_order(tmp_path):
+    writer = ImageWriter(max_workers=4, codec=_SlowCodec())
+    kept, dropped = tmp_path / "kept.png", tmp_path / "dropped.png"
+    writer.save(Image.new("RGB", (4, 4), "black"), kept)
+    writer.save(_page(), kept)
+    writer.save(_page(), dropped)
+    writer.discard(dropped)
+    writer.close()
+
+    assert image_digest(load_image(kept)) == image_digest(_page())
+    assert not dropped.exists()
+    assert writer.stats.images == 3
+    assert writer.stats.to_dict()["bytes"] > 0
+
+
+def test_writer_reports_failed_writes_on_flush(tmp_path):
+    writer = ImageWriter(max_workers=2)
+    writer.save(_page(), tmp_path / "missing" / "page.png")
+    with pytest.raises(OSError):
+        writer.flush()
+    # The error is reported once.
+    writer.flush()
+    writer.close()
@@ -0,0 +1,73 @@
+from pipeline.models import BoundingBox, TableCell
+from pipeline.tables import parse_table_html
+
+
+def _cells(table):
+    return [(cell.row, cell.col, cell.text, cell.row_span, cell.col_span) for cell in table.cells]
+
+
+def test_plain_table():
+    table = parse_table_html(
+        "<html><body><table>"
+        "<tr><td>a</td><td>b</td></tr><tr><td>c</td><td>d</td></tr>"
+        "</table></body></html>"
+    )
+
+    assert (table.rows, table.cols) == (2, 2)
+    assert table.cells[3] == TableCell(row=1, col=1, text="d")
+
+
+def test_rowspan_pushes_later_cells_right():
+    table = parse_table_html(
+        "<table>"
+        '<tr><td rowspan="2">Tên</td><td>Tuổi</td><td>Lớp</td></tr>'
+        "<tr><td>12</td><td>6A</td></tr>"
+        "</table>"
+    )
+
+    assert (table.rows, table.cols) == (2, 3)
+    assert _cells(table) == [
+        (0, 0, "Tên", 2, 1),
+        (0, 1, "Tuổi", 1, 1),
+        (0, 2, "Lớp", 1, 1),
+        (1, 1, "12", 1, 1),
+        (1, 2, "6A", 1, 1),
+    ]
+
+
+def test_colspan_and_rowspan_together():
+    table = parse_table_html(
+        "<table>"
+        "<tr><th colspan=2 rowspan=2>Tổng</th><th>x</th></tr>"
+        "<tr><td>y</td></tr>"
+        "<tr><td>1</td><td>2</td><td>3</td></tr>"
+        "</table>"
+    )
+
+    assert (table.rows, table.cols) == (3, 3)
+    assert _cells(table) == [
+        (0, 0, "Tổng", 2, 2),
+        (0, 2, "x", 1, 1),
+        (1, 2, "y", 1, 1),
+        (2, 0, "1", 1, 1),
+        (2, 1, "2", 1, 1),
+        (2, 2, "3", 1, 1),
+    ]
+
+
+def test_rowspan_is_clamped_to_the_table():
+    table = parse_table_html('<table><tr><td rowspan="9">a</td><td>b</td></tr></table>')
+
+    assert table.rows == 1
+    assert table.cells[0].row_span == 1
+
+
+def test_unclosed_cells_entities_and_nested_tables():
+    bbox = BoundingBox(points=[0, 0, 10, 10])
+    table = parse_table_html(
+        "<table><tr><td>a &amp; b<td>x <table><tr><td>inner</td></tr></table> y</tr></table>",
+        bbox,
+    )
+
+    assert _cells(table) == [(0, 0, "a & b", 1, 1), (0, 1, "x inner y", 1, 1)]
+    assert table.bbox is bbox